@@ -1,7 +1,65 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Pattern
 
+import aiohttp
+
+from src.agent.llm.budget import GenerationBudget, estimate_tokens
+from src.agent.llm.constrained import DecodingConstraints
+from src.agent.llm.hedging import HedgePolicy
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.limiter import backend_limiters
+from src.agent.llm.prompt_cache import PromptCacheConfig
+from src.agent.llm.resilience import CircuitOpenError, LLMBackendError, RetryPolicy, backend_breakers
+from src.agent.llm.router import BackendRouter, backend_routers
+from src.agent.llm.streaming import iter_sse_content
+from src.common import tracing
 from src.common.interfaces import Message
+from src.common.metrics import Counter, Gauge, Histogram
+
+LLM_REQUEST_DURATION = Histogram(
+    "llm_backend_request_duration_seconds",
+    "Latency of chat completions per processor, backend and outcome",
+    ["processor", "backend", "outcome"],
+)
+LLM_REQUESTS_IN_FLIGHT = Gauge(
+    "llm_backend_requests_in_flight",
+    "Chat completions currently waiting on a backend",
+    ["backend"],
+)
+PARSE_FAILURES = Counter(
+    "llm_parse_failures_total",
+    "Completions whose action block could not be parsed, per processor",
+    ["processor"],
+)
+
+
+@contextmanager
+def _track_backend_request(processor: str, backend: str) -> Iterator[None]:
+    started = time.perf_counter()
+    outcome = "error"
+    span = tracing.start_span("llm.chat_completion", "llm", {"processor": processor, "backend": backend})
+    with span, LLM_REQUESTS_IN_FLIGHT.track_inprogress(backend=backend):
+        try:
+            yield
+            outcome = "success"
+        except (asyncio.CancelledError, GeneratorExit):
+            # Hedged requests that lost the race and streams closed early
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_REQUEST_DURATION.labels(processor=processor, backend=backend, outcome=outcome).observe(
+                time.perf_counter() - started
+            )
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
 
 
 class CodeAction:
@@ -24,15 +82,224 @@ class BaseLLMProcessor(ABC):
 
     This class defines the interface for processing messages through different LLM implementations,
     including message formatting, completion generation, and response parsing.
+
+    Attributes:
+        router (Optional[BackendRouter]): Balancer over the OpenAI-compatible backends of the processor
+        base_url (str): URL of the first configured backend. Assigning it routes the processor
+            to that single backend.
+        model (Optional[str]): Model name sent with each completion, if the backend needs one
+        temperature (float): Default sampling temperature of the processor
+        http_client (Optional[LLMHttpClient]): Shared pooled HTTP client. When not attached,
+            each completion falls back to a short-lived session.
+        hedging (Optional[HedgePolicy]): Policy for hedging slow non-streaming completions
+        retry_policy (Optional[RetryPolicy]): Policy for retrying non-streaming completions
+            that failed with a transient error
+        prompt_cache (Optional[PromptCacheConfig]): Prompt cache hints sent with each completion
+        constraints (Optional[DecodingConstraints]): JSON schema or grammar sent with each
+            completion so backends with constrained decoding always return parseable output
+        stop_sequences (Optional[List[str]]): Stop sequences sent with each completion. The first
+            one closes the structured block and is re-appended to content stopped on it, since
+            backends strip the matched stop sequence.
+        stop_block_start (Optional[str]): Text opening the block closed by the first stop sequence;
+            the stop sequence is only restored if the content ends inside such a block, not when
+            the model finished on its own
+        generation_budget (Optional[GenerationBudget]): Adaptive `max_tokens` of each completion
+        action_type_pattern (Optional[Pattern]): Regex whose first group is the first action of a
+            response, used to learn the generation budget per action type
     """
 
+    router: Optional[BackendRouter] = None
+    model: Optional[str] = None
+    temperature: float = 0.7
+    http_client: Optional[LLMHttpClient] = None
+    hedging: Optional[HedgePolicy] = None
+    retry_policy: Optional[RetryPolicy] = None
+    prompt_cache: Optional[PromptCacheConfig] = None
+    constraints: Optional[DecodingConstraints] = None
+    stop_sequences: Optional[List[str]] = None
+    stop_block_start: Optional[str] = None
+    generation_budget: Optional[GenerationBudget] = None
+    action_type_pattern: Optional[Pattern] = None
+
+    @property
+    def base_url(self) -> str:
+        return self.router.primary_url if self.router is not None else ""
+
+    @base_url.setter
+    def base_url(self, url: str) -> None:
+        self.router = backend_routers.get([url])
+
+    def _session(self, backend_url: str) -> Optional[aiohttp.ClientSession]:
+        return self.http_client.session(backend_url) if self.http_client is not None else None
+
+    @staticmethod
+    def _session_id(message: Message) -> str:
+        """Conversation a message belongs to: `metadata["session_id"]` if set, otherwise the user."""
+        return message.metadata.get("session_id") or message.user_id
+
+    def _prepare_payload(self, payload: Dict[str, Any], session_id: Optional[str]) -> Dict[str, Any]:
+        if self.model:
+            payload = {"model": self.model, **payload}
+        if self.prompt_cache is not None:
+            payload = {**payload, **self.prompt_cache.hints(session_id)}
+        if self.constraints is not None:
+            payload = {**payload, **self.constraints.fields}
+        if self.stop_sequences and "stop" not in payload:
+            payload = {**payload, "stop": self.stop_sequences}
+        if self.generation_budget is not None and "max_tokens" not in payload:
+            payload = {**payload, "max_tokens": self.generation_budget.max_tokens()}
+        return payload
+
+    def _action_type(self, content: str) -> str:
+        match = self.action_type_pattern.search(content) if self.action_type_pattern is not None else None
+        return match.group(1) if match else "none"
+
+    def _inside_stop_block(self, content: str) -> bool:
+        """Whether the content opens the block closed by the first stop sequence and has not closed it."""
+        if not self.stop_sequences or not self.stop_block_start:
+            return False
+        start = content.rfind(self.stop_block_start)
+        return start != -1 and self.stop_sequences[0] not in content[start:]
+
+    def _completion_content(self, result: Dict[str, Any]) -> str:
+        """
+        Extract the generated content of a chat completion response.
+
+        Restores the closing stop sequence if generation stopped on it and records the
+        completion length in the generation budget.
+
+        Args:
+            result (Dict[str, Any]): Decoded /chat/completions response
+
+        Returns:
+            str: The generated content
+        """
+        choice = result["choices"][0]
+        content = choice["message"]["content"]
+        finish_reason = choice.get("finish_reason")
+        if finish_reason == "stop" and self._inside_stop_block(content):
+            content += self.stop_sequences[0]
+        if self.generation_budget is not None:
+            tokens = (result.get("usage") or {}).get("completion_tokens") or estimate_tokens(content)
+            self.generation_budget.record(self._action_type(content), tokens, truncated=finish_reason == "length")
+        return content
+
+    async def _post_chat_completion(self, payload: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send a chat completion request to a backend and return the decoded JSON body.
+
+        The router picks the backend with the fewest latency-weighted outstanding requests. The
+        request uses the pooled session of the attached HTTP client for that backend so
+        connections are kept alive between turns, and holds a permit of the backend's adaptive
+        concurrency limiter. Backends whose circuit breaker is open are skipped, transient
+        errors are retried with backoff if a retry policy is set, and if a hedge policy is set a
+        slow completion is duplicated to another backend and the first response wins.
+
+        Requests with a session id stick to the session's backend and carry prompt cache hints,
+        so follow-up steps of a conversation reuse the backend's cached prompt prefix.
+
+        Args:
+            payload (Dict[str, Any]): Request body for the /chat/completions endpoint
+            session_id (Optional[str]): Conversation the request belongs to
+
+        Returns:
+            Dict[str, Any]: Decoded JSON response
+
+        Raises:
+            LLMBackendError: If the backend returns a non-200 status code
+            CircuitOpenError: If every backend's circuit breaker is open
+        """
+        payload = self._prepare_payload(payload, session_id)
+        if self.hedging is None:
+            return await self._post_with_retries(payload, [], session_id)
+        return await self.hedging.run(lambda tried: self._post_with_retries(payload, tried, session_id))
+
+    async def _post_with_retries(
+        self, payload: Dict[str, Any], tried: List[str], session_id: Optional[str]
+    ) -> Dict[str, Any]:
+        if self.retry_policy is None:
+            return await self._post_to_backend(payload, tried, session_id)
+        # Retries avoid the backends already tried as long as another one is left
+        return await self.retry_policy.run(lambda: self._post_to_backend(payload, tried, session_id))
+
+    async def _post_to_backend(
+        self, payload: Dict[str, Any], tried: List[str], session_id: Optional[str]
+    ) -> Dict[str, Any]:
+        exclude = tried + backend_breakers.unavailable()
+        try:
+            async with self.router.route(exclude=exclude, affinity=session_id) as backend:
+                tried.append(backend.url)
+                async with backend_breakers.get(backend.url).guard(), backend_limiters.acquire(backend.url):
+                    url = f"{backend.url}/chat/completions"
+                    session = self._session(backend.url)
+                    with _track_backend_request(type(self).__name__, backend.url):
+                        if session is None:
+                            async with aiohttp.ClientSession() as session:
+                                return await self._send_chat_completion(session, url, payload)
+                        return await self._send_chat_completion(session, url, payload)
+        except CircuitOpenError as e:
+            # Only worth retrying if the next attempt can go to a backend not tried yet
+            skipped = set(tried + backend_breakers.unavailable())
+            e.alternatives_available = any(backend.url not in skipped for backend in self.router.backends)
+            raise
+
+    async def _stream_chat_completion(
+        self, payload: Dict[str, Any], session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a streaming chat completion request and yield content deltas as they arrive.
+
+        Leaving the iteration early closes the response, which stops generation on backends
+        that abort on client disconnect.
+
+        Args:
+            payload (Dict[str, Any]): Request body for the /chat/completions endpoint
+            session_id (Optional[str]): Conversation the request belongs to
+
+        Yields:
+            str: Generated text fragments
+        """
+        payload = self._prepare_payload({**payload, "stream": True}, session_id)
+        async with self.router.route(exclude=backend_breakers.unavailable(), affinity=session_id) as backend:
+            async with backend_breakers.get(backend.url).guard(), backend_limiters.acquire(backend.url):
+                url = f"{backend.url}/chat/completions"
+                session = self._session(backend.url)
+                with _track_backend_request(type(self).__name__, backend.url):
+                    if session is None:
+                        async with aiohttp.ClientSession() as session:
+                            async for delta in self._send_streaming_chat_completion(session, url, payload):
+                                yield delta
+                    else:
+                        async for delta in self._send_streaming_chat_completion(session, url, payload):
+                            yield delta
+
+    @staticmethod
+    async def _send_streaming_chat_completion(
+        session: aiohttp.ClientSession, url: str, payload: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        async with session.post(url, json=payload) as response:
+            if response.status != 200:
+                raise LLMBackendError(response.status, _retry_after(response))
+            async for delta in iter_sse_content(response):
+                yield delta
+
+    @staticmethod
+    async def _send_chat_completion(
+        session: aiohttp.ClientSession, url: str, payload: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        async with session.post(url, json=payload) as response:
+            if response.status != 200:
+                raise LLMBackendError(response.status, _retry_after(response))
+            return await response.json()
+
     @abstractmethod
-    async def process_message(self, message: Message) -> Dict[str, Any]:
+    async def process_message(self, message: Message, chat_history: Optional[list] = None) -> Dict[str, Any]:
         """
         Process a message and return a response with structured function calls.
 
         Args:
             message (Message): The input message to process
+            chat_history (Optional[list]): Previous turns of the conversation as chat messages
 
         Returns:
             Dict[str, Any]: A dictionary containing:
@@ -57,13 +324,17 @@ class BaseLLMProcessor(ABC):
         pass
 
     @abstractmethod
-    async def _create_chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+    async def _create_chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.7, session_id: Optional[str] = None
+    ) -> str:
         """
         Create a chat completion using the LLM's API.
 
         Args:
             messages (List[Dict[str, str]]): The formatted messages
             temperature (float): Sampling temperature for generation
+            session_id (Optional[str]): Conversation the request belongs to, used for backend
+                affinity and prompt cache hints
 
         Returns:
             str: The LLM's response content
@@ -0,0 +1,117 @@
+"""
+Adaptive generation budget (`max_tokens`) for LLM completions.
+
+A fixed `max_tokens` is either too small for long final answers or lets a drifting model decode
+hundreds of useless tokens. The budget learns the completion length distribution per action type
+(e.g. short tool calls vs. long `response_to_user` answers) and caps generation at a high
+percentile of the longest type plus headroom.
+"""
+
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text for backends that do not report usage."""
+    return max(1, len(text) // 4)
+
+
+class GenerationBudget:
+    """
+    Learns `max_tokens` from the lengths of recent completions.
+
+    Attributes:
+        adaptive: Whether the budget adapts; if not, `default_tokens` is always used
+        default_tokens: Budget used until enough completions have been observed
+        min_tokens: Lower bound of the adapted budget
+        max_tokens_limit: Upper bound of the adapted budget
+        percentile: Length percentile of each action type the budget must cover
+        headroom: Multiplier applied on top of the percentile
+        min_samples: Number of observed completions required before adapting
+    """
+
+    def __init__(
+        self,
+        adaptive: bool = True,
+        default_tokens: int = 1024,
+        min_tokens: int = 128,
+        max_tokens_limit: int = 4096,
+        percentile: float = 99.0,
+        headroom: float = 1.5,
+        min_samples: int = 20,
+        window: int = 500,
+    ):
+        self.adaptive = adaptive
+        self.default_tokens = default_tokens
+        self.min_tokens = min_tokens
+        self.max_tokens_limit = max_tokens_limit
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        # One shared window, so lengths of action types that stopped occurring age out as well
+        self._samples: Deque[Tuple[str, int]] = deque(maxlen=window)
+        self.completions = 0
+        self.truncated = 0
+
+    @classmethod
+    def from_env(cls) -> "GenerationBudget":
+        """Build the budget from LLM_MAX_TOKENS* environment variables."""
+        return cls(
+            adaptive=os.getenv("LLM_ADAPTIVE_MAX_TOKENS", "true").lower() == "true",
+            default_tokens=int(os.getenv("LLM_MAX_TOKENS", "1024")),
+            min_tokens=int(os.getenv("LLM_MAX_TOKENS_MIN", "128")),
+            max_tokens_limit=int(os.getenv("LLM_MAX_TOKENS_LIMIT", "4096")),
+            percentile=float(os.getenv("LLM_MAX_TOKENS_PERCENTILE", "99")),
+        )
+
+    def _percentiles(self) -> Dict[str, int]:
+        lengths: Dict[str, list] = {}
+        for action_type, tokens in self._samples:
+            lengths.setdefault(action_type, []).append(tokens)
+        percentiles = {}
+        for action_type, values in lengths.items():
+            values.sort()
+            index = min(len(values) - 1, int(round(self.percentile / 100 * (len(values) - 1))))
+            percentiles[action_type] = values[index]
+        return percentiles
+
+    def max_tokens(self) -> int:
+        """
+        Budget for the next completion.
+
+        Any action type can come next, so the budget covers the longest one.
+
+        Returns:
+            int: `max_tokens` to send with the completion
+        """
+        if not self.adaptive or len(self._samples) < self.min_samples:
+            return self.default_tokens
+        longest = max(self._percentiles().values())
+        return max(self.min_tokens, min(self.max_tokens_limit, int(longest * self.headroom)))
+
+    def record(self, action_type: str, tokens: int, truncated: bool = False) -> None:
+        """
+        Record the length of a finished completion.
+
+        Args:
+            action_type: First action of the completion, or "none" if it had none
+            tokens: Number of generated tokens
+            truncated: Whether generation hit `max_tokens`; the length is then only a lower
+                bound, so it is recorded doubled to grow the budget quickly
+        """
+        self.completions += 1
+        if truncated:
+            self.truncated += 1
+            tokens *= 2
+        self._samples.append((action_type, tokens))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current budget, truncation count and length percentile per action type."""
+        return {
+            "adaptive": self.adaptive,
+            "max_tokens": self.max_tokens(),
+            "completions": self.completions,
+            "truncated": self.truncated,
+            "percentiles": self._percentiles(),
+        }
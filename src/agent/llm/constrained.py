@@ -0,0 +1,132 @@
+"""
+Schema-constrained decoding for the XML and JSON response formats.
+
+Backends that support constrained decoding only sample tokens that keep the output valid for a
+JSON schema (`response_format` of type `json_schema`, understood by llama.cpp, vLLM and LM Studio)
+or a GBNF grammar (llama.cpp `grammar`). Both are derived from the agent's tool list, so the
+`thought`/`actions` structure always parses and tool names cannot be misspelled.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# Tools listed in the XML and JSON prompts, mapped to whether they take an argument
+AGENT_TOOLS: Dict[str, bool] = {
+    "get_coin_price": True,
+    "get_coin_history": True,
+    "get_stock_price": True,
+    "get_stock_history": True,
+    "get_news": False,
+    "get_market_news": False,
+    "get_coin_news": True,
+    "response_to_user": True,
+}
+
+
+def action_schema(tools: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """
+    Build the JSON schema of a `{"thought": ..., "actions": [...]}` response.
+
+    `thought` comes first so constrained backends still generate the reasoning before the actions.
+
+    Args:
+        tools: Tool names mapped to whether they take an argument, defaults to AGENT_TOOLS
+
+    Returns:
+        Dict[str, Any]: JSON schema of the response object
+    """
+    tools = AGENT_TOOLS if tools is None else tools
+    variants = []
+    for name, takes_argument in tools.items():
+        properties: Dict[str, Any] = {"name": {"const": name}}
+        if takes_argument:
+            properties["argument"] = {"type": "string"}
+        variants.append(
+            {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+        )
+    return {
+        "type": "object",
+        "properties": {
+            "thought": {"type": "string"},
+            "actions": {"type": "array", "items": {"anyOf": variants}, "minItems": 1},
+        },
+        "required": ["thought", "actions"],
+        "additionalProperties": False,
+    }
+
+
+def json_response_format(schema: Dict[str, Any], name: str = "agent_response") -> Dict[str, Any]:
+    """Wrap a JSON schema in an OpenAI-style `response_format` field."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _rule_name(tool: str) -> str:
+    return "tool-" + re.sub(r"[^a-zA-Z0-9]+", "-", tool)
+
+
+def xml_grammar(tools: Optional[Dict[str, bool]] = None) -> str:
+    """
+    Build a GBNF grammar for a `<response><thought/><actions><action/>...</actions></response>` block.
+
+    Text content may not contain `<` or `&`, so the generated block is always well-formed XML.
+
+    Args:
+        tools: Tool names mapped to whether they take an argument, defaults to AGENT_TOOLS
+
+    Returns:
+        str: GBNF grammar with `root` as the start rule
+    """
+    tools = AGENT_TOOLS if tools is None else tools
+    lines = [
+        'root ::= "<response>" ws "<thought>" text "</thought>" ws "<actions>" ws (action ws)+ "</actions>" ws '
+        '"</response>"',
+        'action ::= "<action>" ws ({}) ws "</action>"'.format(" | ".join(_rule_name(tool) for tool in tools)),
+    ]
+    for tool, takes_argument in tools.items():
+        rule = f'{_rule_name(tool)} ::= "<name>{tool}</name>"'
+        if takes_argument:
+            rule += ' ws "<argument>" text "</argument>"'
+        lines.append(rule)
+    lines.append("text ::= [^<&]*")
+    # Bounded so a model cannot loop on whitespace
+    lines.append("ws ::= [ \\t\\n]{0,16}")
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class DecodingConstraints:
+    """
+    Constraint fields added to every completion request of a processor.
+
+    Attributes:
+        fields: Request fields describing the constraint, e.g. `response_format` or `grammar`
+    """
+
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def for_json(cls, schema: Optional[Dict[str, Any]] = None) -> "DecodingConstraints":
+        """Constrain output to a JSON schema, by default the agent's `thought`/`actions` schema."""
+        return cls({"response_format": json_response_format(schema if schema is not None else action_schema())})
+
+    @classmethod
+    def for_xml(cls, tools: Optional[Dict[str, bool]] = None) -> "DecodingConstraints":
+        """Constrain output to the XML response grammar."""
+        return cls({"grammar": xml_grammar(tools)})
+
+    @classmethod
+    def from_env(cls, response_format: str) -> Optional["DecodingConstraints"]:
+        """
+        Build the constraints of a response format if LLM_CONSTRAINED_DECODING is enabled.
+
+        Args:
+            response_format: "json" or "xml"
+
+        Returns:
+            Optional[DecodingConstraints]: The constraints, or None if disabled
+        """
+        if os.getenv("LLM_CONSTRAINED_DECODING", "false").lower() != "true":
+            return None
+        return cls.for_xml() if response_format == "xml" else cls.for_json()
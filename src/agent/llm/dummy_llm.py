@@ -15,7 +15,9 @@ class DummyStockProcessor(BaseLLMProcessor):
         """Initialize with a stock-focused system prompt."""
         self.system_prompt = "I am a stock-loving AI assistant."
 
-    async def _create_chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+    async def _create_chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.7, session_id: Optional[str] = None
+    ) -> str:
         """
         Returns a fixed response about stock market investment opportunities.
         Ignores input messages and temperature.
@@ -48,8 +50,8 @@ class DummyStockProcessor(BaseLLMProcessor):
             },
         }
 
-    async def process_message(self, message: Message) -> Dict[str, Any]:
-        messages = self._format_message_history(message)
+    async def process_message(self, message: Message, chat_history: Optional[list] = None) -> Dict[str, Any]:
+        messages = self._format_message_history(message, chat_history)
         response_content = await self._create_chat_completion(messages)
 
         return {
@@ -0,0 +1,149 @@
+"""
+Request hedging for LLM completions.
+
+If a completion has not returned after a high percentile of recently observed latency, a
+duplicate is sent to another backend and whichever finishes first wins; the loser is cancelled.
+This trades a little extra load for a much shorter tail when one backend or generation is stuck.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """
+    Decides when to hedge a completion and keeps the statistics needed to tune it.
+
+    Attributes:
+        enabled: Whether hedging is active
+        percentile: Latency percentile after which a hedge is sent
+        min_delay: Lower bound of the hedge delay in seconds
+        min_samples: Number of observed latencies required before hedging starts
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        percentile: float = 95.0,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        clock=time.monotonic,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._clock = clock
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.backend_seconds = 0.0
+        self.cancelled_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["HedgePolicy"]:
+        """
+        Build the policy from LLM_HEDGE_* environment variables if LLM_HEDGE_ENABLED is set.
+
+        Returns:
+            Optional[HedgePolicy]: The policy, or None if disabled so completions skip hedging entirely
+        """
+        if os.getenv("LLM_HEDGE_ENABLED", "false").lower() != "true":
+            return None
+        return cls(
+            percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.05")),
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+        )
+
+    def delay(self) -> Optional[float]:
+        """
+        Seconds to wait before sending a hedge.
+
+        Returns:
+            Optional[float]: The configured latency percentile, or None if hedging is disabled
+                or not enough latencies have been observed yet
+        """
+        if not self.enabled or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(self.percentile / 100 * (len(ordered) - 1))))
+        return max(self.min_delay, ordered[index])
+
+    def record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    async def run(self, attempt: Callable[[List[str]], Awaitable[T]]) -> T:
+        """
+        Run a completion, hedging it if it is slower than the hedge delay.
+
+        Args:
+            attempt: Sends one completion. It receives the list of backend URLs already tried
+                and must append the URL it sends to, so a hedge can avoid that backend.
+
+        Returns:
+            The result of whichever attempt finished first
+
+        Raises:
+            Exception: The error of the first failed attempt if no attempt succeeded
+        """
+        self.requests += 1
+        tried: List[str] = []
+        started = self._clock()
+        delay = self.delay()
+        tasks = [asyncio.ensure_future(attempt(tried))]
+        started_at = [started]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                logger.debug(f"Hedging completion after {delay:.3f}s (tried {tried})")
+                tasks.append(asyncio.ensure_future(attempt(tried)))
+                started_at.append(self._clock())
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                        self.record_latency(self._clock() - started)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            now = self._clock()
+            losers = []
+            for task, task_started in zip(tasks, started_at):
+                self.backend_seconds += now - task_started
+                if not task.done():
+                    self.cancelled_seconds += now - task_started
+                    task.cancel()
+                    losers.append(task)
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedge rate, win rate, extra load and the current hedge delay."""
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            # Share of backend time spent on attempts that were cancelled
+            "extra_load": self.cancelled_seconds / self.backend_seconds if self.backend_seconds else 0.0,
+            "delay": self.delay(),
+        }
@@ -0,0 +1,93 @@
+"""
+Pooled HTTP client shared by the LLM processors.
+
+Keeps one long-lived aiohttp session per LLM backend so that consecutive completions
+reuse TCP/TLS connections instead of paying the connection setup on every agent turn.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HttpPoolConfig:
+    """
+    Connection pool settings applied to every backend session.
+
+    Attributes:
+        limit: Maximum number of simultaneous connections per session
+        limit_per_host: Maximum number of simultaneous connections to the same host
+        keepalive_timeout: Seconds an idle connection is kept open for reuse
+        dns_cache_ttl: Seconds resolved DNS entries are cached
+        request_timeout: Total timeout for a single request in seconds
+    """
+
+    limit: int = 100
+    limit_per_host: int = 32
+    keepalive_timeout: float = 60.0
+    dns_cache_ttl: int = 300
+    request_timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "HttpPoolConfig":
+        """Build the pool configuration from LLM_HTTP_* environment variables."""
+        return cls(
+            limit=int(os.getenv("LLM_HTTP_POOL_LIMIT", cls.limit)),
+            limit_per_host=int(os.getenv("LLM_HTTP_POOL_LIMIT_PER_HOST", cls.limit_per_host)),
+            keepalive_timeout=float(os.getenv("LLM_HTTP_KEEPALIVE_TIMEOUT", cls.keepalive_timeout)),
+            dns_cache_ttl=int(os.getenv("LLM_HTTP_DNS_CACHE_TTL", cls.dns_cache_ttl)),
+            request_timeout=float(os.getenv("LLM_HTTP_REQUEST_TIMEOUT", cls.request_timeout)),
+        )
+
+
+class LLMHttpClient:
+    """
+    Owner of the pooled aiohttp sessions used to talk to LLM backends.
+
+    Sessions are created lazily on first use (inside the running event loop) and keyed
+    by backend base URL, so each backend gets its own connection pool.
+    """
+
+    def __init__(self, config: Optional[HttpPoolConfig] = None):
+        self.config = config or HttpPoolConfig.from_env()
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def session(self, base_url: str) -> aiohttp.ClientSession:
+        """
+        Get the pooled session for a backend, creating it if needed.
+
+        Args:
+            base_url: Base URL of the LLM backend
+
+        Returns:
+            aiohttp.ClientSession: Session bound to a keep-alive connection pool
+        """
+        session = self._sessions.get(base_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.limit,
+                limit_per_host=self.config.limit_per_host,
+                keepalive_timeout=self.config.keepalive_timeout,
+                ttl_dns_cache=self.config.dns_cache_ttl,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.config.request_timeout),
+            )
+            self._sessions[base_url] = session
+            logger.info(f"Opened pooled HTTP session for {base_url}")
+        return session
+
+    async def close(self) -> None:
+        """Close all pooled sessions and their connections."""
+        for base_url, session in self._sessions.items():
+            if not session.closed:
+                await session.close()
+                logger.info(f"Closed pooled HTTP session for {base_url}")
+        self._sessions.clear()
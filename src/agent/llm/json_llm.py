@@ -1,11 +1,18 @@
-import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
-
-import aiohttp
-
-from src.agent.llm.base_llm import BaseLLMProcessor
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.agent.llm.base_llm import PARSE_FAILURES, BaseLLMProcessor
+from src.agent.llm.budget import GenerationBudget
+from src.agent.llm.constrained import DecodingConstraints
+from src.agent.llm.hedging import HedgePolicy
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.parsing import NO_JSON_OBJECT, PARSE_ERROR_PREFIX, parse_json_response
+from src.agent.llm.prompt_cache import PromptCacheConfig
+from src.agent.llm.resilience import RetryPolicy
+from src.agent.llm.router import backend_routers
+from src.agent.llm.streaming import AnswerStreamExtractor, JsonActionStreamParser
 from src.agent.planning.prompts.json_prompt import JSON_PROMPT
 from src.common.interfaces import Message
 
@@ -18,32 +25,41 @@ class JsonProcessor(BaseLLMProcessor):
     Expects responses to contain structured JSON with 'thought' and 'actions' fields.
     """
 
-    def __init__(self):
-        """Initialize JSON format processor."""
-        self.base_url = os.getenv("LLM_API_URL", "http://localhost:1234/v1")
+    def __init__(self, http_client: Optional[LLMHttpClient] = None):
+        """
+        Initialize JSON format processor.
+
+        Args:
+            http_client (Optional[LLMHttpClient]): Shared pooled HTTP client for the LLM backend
+        """
+        self.router = backend_routers.from_env_urls("LLM_API_URLS", "LLM_API_URL", "http://localhost:1234/v1")
+        self.model = os.getenv("LLM_MODEL")
+        self.http_client = http_client
+        self.hedging = HedgePolicy.from_env()
+        self.retry_policy = RetryPolicy.from_env()
+        self.prompt_cache = PromptCacheConfig.from_env()
+        self.generation_budget = GenerationBudget.from_env()
+        self.action_type_pattern = re.compile(r'"name"\s*:\s*"([\w.]+)"')
+        self.constraints = DecodingConstraints.from_env("json")
         self.system_prompt = JSON_PROMPT
-        logger.info(f"Initialized JsonProcessor with base URL: {self.base_url}")
+        logger.info(f"Initialized JsonProcessor with backends: {list(self.router.stats())}")
 
-    async def _create_chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+    async def _create_chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.7, session_id: Optional[str] = None
+    ) -> str:
         """Create a chat completion using the LLM API."""
         try:
             logger.info(f"Sending request to LLM API with temperature: {temperature}")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    json={
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": False,
-                    },
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"API returned non-200 status code: {response.status}")
-                        raise Exception(f"API returned status code {response.status}")
-
-                    result = await response.json()
-                    logger.info("Successfully received response from LLM API")
-                    return result["choices"][0]["message"]["content"]
+            result = await self._post_chat_completion(
+                {
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": False,
+                },
+                session_id=session_id,
+            )
+            logger.info("Successfully received response from LLM API")
+            return self._completion_content(result)
         except Exception as e:
             logger.error(f"Error in LLM processing: {str(e)}", exc_info=True)
             raise Exception(f"Error in LLM processing: {str(e)}")
@@ -73,57 +89,17 @@ class JsonProcessor(BaseLLMProcessor):
         Returns:
             Dict containing parsed thought and actions, or error message if parsing fails
         """
-        try:
-            start = "```json"
-            end = "```"
-            if start in content:
-                content = content[content.find(start) + len(start) :]
-                content = content[: content.find(end)]
-            # Remove markdown code block markers if present
-            cleaned_content = content.replace("```json", "").replace("```", "").strip()
-            parsed_content = "{}"
-            # Extract the JSON object between the first '{' and the last '}'
-            start = cleaned_content.find("{")
-            end = cleaned_content.rfind("}") + 1  # Include the closing '}'
-            if start != -1 and end != -1:
-                json_string = cleaned_content[start:end]
-                json_string.replace("\n", " ")
-                try:
-                    parsed_content = json.loads(json_string)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON content: {str(e)}")
-                    return {
-                        "thought": f"I apologize, but I couldn't parse the response format correctly. _parse_action_block:\n{json_string}",
-                        "actions": [],
-                    }
-            else:
-                logger.error("No JSON object found in the content")
-                return {
-                    "thought": "I apologize, but I couldn't parse the response format correctly. _parse_action_block else",
-                    "actions": [],
-                }
-
-            return {
-                "thought": parsed_content.get("thought", ""),
-                "actions": parsed_content.get("actions", []),
-            }
-        except Exception as e:
-            logger.error(f"Failed to parse JSON content: {str(e)}")
-            return {
-                "thought": "I apologize, but I couldn't parse the response format correctly. _parse_action_block except",
-                "actions": [],
-            }
+        parsed = parse_json_response(content)
+        if parsed.error:
+            logger.error(f"Failed to parse JSON content: {parsed.error}")
+            PARSE_FAILURES.labels(processor=type(self).__name__).inc()
+        return parsed.to_dict()
 
     def _extract_thought(self, content: str) -> Optional[str]:
         """Extract the thought process from the response content."""
-        try:
-            parsed_content = self._parse_action_block(content)
-            return parsed_content.get("thought")
-        except Exception as e:
-            logger.error(f"Error extracting thought: {str(e)}")
-            return None
+        return parse_json_response(content).thought
 
-    async def process_message(self, message: Message) -> Dict[str, Any]:
+    async def process_message(self, message: Message, chat_history: Optional[list] = None) -> Dict[str, Any]:
         """
         Process a message through the LLM and parse its JSON response.
 
@@ -132,8 +108,10 @@ class JsonProcessor(BaseLLMProcessor):
         """
         try:
             logger.info(f"Processing message: {message.content[:50]}...")
-            messages = self._format_message_history(message)
-            response = await self._create_chat_completion(messages)
+            messages = self._format_message_history(message, chat_history)
+            response = await self._create_chat_completion(
+                messages, temperature=self.temperature, session_id=self._session_id(message)
+            )
             logger.debug("Successfully received completion from LLM")
 
             # Parse the response and extract thought and actions
@@ -144,3 +122,49 @@ class JsonProcessor(BaseLLMProcessor):
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
             return {"thought": f"Error in LLM processing: {str(e)}", "actions": []}
+
+    async def stream_actions(
+        self, message: Message, temperature: float = 0.7, chat_history: Optional[list] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the LLM response and yield the thought and each action as soon as it is complete.
+
+        The completion is requested with `"stream": true` and the `actions` array is tokenized
+        incrementally, so tool dispatch can overlap with the rest of the generation.
+
+        Args:
+            message (Message): The input message to process
+            temperature (float): Sampling temperature for generation
+            chat_history (Optional[list]): Previous turns of the conversation as chat messages
+
+        Yields:
+            Dict[str, Any]: {"event": "thought", "thought": str}, {"event": "action", "action": dict},
+                or {"event": "answer_delta", "text": str} with new text of a `response_to_user` answer
+        """
+        logger.info(f"Streaming message: {message.content[:50]}...")
+        messages = self._format_message_history(message, chat_history)
+        parser = JsonActionStreamParser()
+        answer = AnswerStreamExtractor("json")
+        try:
+            async for delta in self._stream_chat_completion(
+                {"messages": messages, "temperature": temperature}, session_id=self._session_id(message)
+            ):
+                text = answer.feed(delta)
+                if text:
+                    yield {"event": "answer_delta", "text": text}
+                for event in parser.feed(delta):
+                    yield event
+                if parser.done or parser.error:
+                    break
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}", exc_info=True)
+            yield {"event": "thought", "thought": f"Error in LLM processing: {str(e)}"}
+            return
+
+        if parser.error or (not parser.done and not parser.actions):
+            PARSE_FAILURES.labels(processor=type(self).__name__).inc()
+            reason = parser.error or NO_JSON_OBJECT
+            yield {
+                "event": "thought",
+                "thought": f"{PARSE_ERROR_PREFIX} {reason}",
+            }
@@ -0,0 +1,203 @@
+"""
+Adaptive concurrency limiting for LLM backends.
+
+Each backend gets a limiter that learns how many concurrent completions it can serve before
+latency starts to degrade, in the spirit of Netflix's gradient concurrency limits: the limit
+grows while the measured round-trip time stays close to the long-term baseline and shrinks as
+soon as requests queue up inside the backend or fail.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Gradient-based concurrency limiter for a single backend.
+
+    After every completed request the limit is multiplied by the gradient between the long-term
+    RTT baseline and the latest RTT (capped to [0.5, 1]) and a small headroom of sqrt(limit) is
+    added, then smoothed. Failed requests multiplicatively back the limit off.
+
+    Attributes:
+        limit: Current (fractional) concurrency limit
+        min_limit: Lower bound of the limit
+        max_limit: Upper bound of the limit
+        in_flight: Number of requests currently holding a permit
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        backoff: float = 0.9,
+        long_window: int = 100,
+        clock=time.monotonic,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._long_decay = 2 / (long_window + 1)
+        self._clock = clock
+        self.in_flight = 0
+        self.last_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+        self.successes = 0
+        self.drops = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def effective_limit(self) -> int:
+        """Integer number of permits currently available."""
+        return max(self.min_limit, int(self.limit))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """
+        Hold a permit for one request, waiting while the backend is at its limit.
+
+        The round-trip time of the block is fed back into the limit; an exception raised inside
+        the block counts as a dropped request, while cancellation is neither a success nor a drop.
+        """
+        while self.in_flight >= self.effective_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Pass the wake-up on to the next waiter
+                    self._wake_next()
+                raise
+        self.in_flight += 1
+
+        started = self._clock()
+        in_flight_at_start = self.in_flight
+        try:
+            yield
+        except Exception:
+            self._on_drop()
+            raise
+        else:
+            self._on_success(self._clock() - started, in_flight_at_start)
+        finally:
+            self.in_flight -= 1
+            self._wake_next()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a permit."""
+        return len(self._waiters)
+
+    def _wake_next(self) -> None:
+        available = self.effective_limit - self.in_flight
+        while available > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    def _on_success(self, rtt: float, in_flight: int) -> None:
+        self.successes += 1
+        self.last_rtt = rtt
+        if self.long_rtt is None:
+            self.long_rtt = rtt
+        else:
+            self.long_rtt += (rtt - self.long_rtt) * self._long_decay
+            if self.long_rtt > rtt:
+                # Recover the baseline quickly once the backend is fast again
+                self.long_rtt = (self.long_rtt + rtt) / 2
+
+        if in_flight < self.limit / 2:
+            # The limit was not the bottleneck; the sample says nothing about a higher limit
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / max(rtt, 1e-9)))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self._set_limit(self.limit * (1 - self.smoothing) + new_limit * self.smoothing)
+
+    def _on_drop(self) -> None:
+        self.drops += 1
+        self._set_limit(self.limit * self.backoff)
+
+    def _set_limit(self, limit: float) -> None:
+        limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        if int(limit) != int(self.limit):
+            logger.info(f"Concurrency limit changed from {int(self.limit)} to {int(limit)}")
+        self.limit = limit
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit, in-flight count and measured RTTs."""
+        return {
+            "limit": self.effective_limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "last_rtt": self.last_rtt,
+            "long_rtt": self.long_rtt,
+            "successes": self.successes,
+            "drops": self.drops,
+        }
+
+
+class LimiterRegistry:
+    """Holds one adaptive limiter per backend URL."""
+
+    def __init__(self, enabled: bool = True, initial_limit: float = 4, min_limit: int = 1, max_limit: int = 64):
+        self.enabled = enabled
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> "LimiterRegistry":
+        """Build the registry from LLM_LIMITER_* environment variables."""
+        return cls(
+            enabled=os.getenv("LLM_LIMITER_ENABLED", "true").lower() == "true",
+            initial_limit=float(os.getenv("LLM_LIMITER_INITIAL", "4")),
+            min_limit=int(os.getenv("LLM_LIMITER_MIN", "1")),
+            max_limit=int(os.getenv("LLM_LIMITER_MAX", "64")),
+        )
+
+    def get(self, base_url: str) -> AdaptiveConcurrencyLimiter:
+        """Get the limiter of a backend, creating it on first use."""
+        limiter = self._limiters.get(base_url)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=self.initial_limit, min_limit=self.min_limit, max_limit=self.max_limit
+            )
+            self._limiters[base_url] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def acquire(self, base_url: str) -> AsyncIterator[None]:
+        """Hold a permit of the backend's limiter, or pass through if limiting is disabled."""
+        if not self.enabled:
+            yield
+            return
+        async with self.get(base_url).acquire():
+            yield
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return limiter statistics keyed by backend URL."""
+        return {base_url: limiter.stats() for base_url, limiter in self._limiters.items()}
+
+
+backend_limiters = LimiterRegistry.from_env()
+"""Process-wide limiters shared by all LLM processors."""
@@ -3,9 +3,14 @@ import os
 import re
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-
-from src.agent.llm.base_llm import BaseLLMProcessor
+from src.agent.llm.base_llm import PARSE_FAILURES, BaseLLMProcessor
+from src.agent.llm.budget import GenerationBudget
+from src.agent.llm.hedging import HedgePolicy
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.parsing import parse_code_action
+from src.agent.llm.prompt_cache import PromptCacheConfig
+from src.agent.llm.resilience import RetryPolicy
+from src.agent.llm.router import backend_routers
 from src.agent.planning.prompts.code_action_prompt import CODE_ACTION_SYSTEM_PROMPT
 from src.common.interfaces import Message
 
@@ -16,35 +21,44 @@ class LMStudioProcessor(BaseLLMProcessor):
     Handles function calling with parameter mapping based on provided mock functions.
     """
 
-    def __init__(self, mock_functions: Optional[List[callable]] = None):
+    def __init__(self, mock_functions: Optional[List[callable]] = None, http_client: Optional[LLMHttpClient] = None):
         """
         Initialize LMStudio processor.
 
         Args:
             mock_functions (Optional[List[callable]]): List of mock functions to use for parameter parsing.
                 If None, no function parameter mapping will be attempted.
+            http_client (Optional[LLMHttpClient]): Shared pooled HTTP client for the LLM backend
         """
-        self.base_url = os.getenv("LMSTUDIO_API_URL", "http://localhost:1234/v1")
+        self.router = backend_routers.from_env_urls("LMSTUDIO_API_URLS", "LMSTUDIO_API_URL", "http://localhost:1234/v1")
+        self.model = os.getenv("LMSTUDIO_MODEL")
+        self.http_client = http_client
+        self.hedging = HedgePolicy.from_env()
+        self.retry_policy = RetryPolicy.from_env()
+        self.prompt_cache = PromptCacheConfig.from_env()
+        self.stop_sequences = ["End Action"]
+        self.stop_block_start = "Action:"
+        self.generation_budget = GenerationBudget.from_env()
+        self.action_type_pattern = re.compile(r"Action:\s*([\w.]+)\(")
         self.system_prompt = CODE_ACTION_SYSTEM_PROMPT
         self.mock_functions = mock_functions or []
+        # Parameter names per mock function, resolved once instead of on every parse
+        self._signatures = {func.__name__: list(inspect.signature(func).parameters) for func in self.mock_functions}
 
-    async def _create_chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
+    async def _create_chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.7, session_id: Optional[str] = None
+    ) -> str:
         """Create a chat completion using LM Studio's API."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    json={
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": False,
-                    },
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"API returned status code {response.status}")
-
-                    result = await response.json()
-                    return result["choices"][0]["message"]["content"]
+            result = await self._post_chat_completion(
+                {
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": False,
+                },
+                session_id=session_id,
+            )
+            return self._completion_content(result)
         except Exception as e:
             raise Exception(f"Error in LM Studio processing: {str(e)}")
 
@@ -60,106 +74,47 @@ class LMStudioProcessor(BaseLLMProcessor):
 
     def _parse_action_block(self, content: str) -> Dict[str, Any]:
         """
-        Parse action blocks to extract function calls and their parameters.
+        Parse action blocks to extract the first function call and its parameters.
 
-        Uses regex to extract function names and parameters, then attempts to map
-        parameters to function signatures if mock functions are provided.
+        The action code is parsed with `ast` (falling back to a regex for invalid code), and
+        positional arguments are mapped to mock function signatures when available.
 
         Features:
         - Handles both named and positional parameters
         - Preserves parameter types (int, float, string)
         - Maps parameters to function signatures when available
         """
-        try:
-            # Extract content between Action: and End Action markers
-            action_match = re.search(r"Action:\s*(.*?)\s*End Action", content, re.DOTALL)
-            if not action_match:
-                return {}
-
-            # Parse function name and parameters
-            action_code = action_match.group(1).strip()
-
-            # Extract function call using regex
-            func_match = re.search(r"(\w+)\((.*?)\)", action_code)
-            if not func_match:
-                return {}
-
-            function_name = func_match.group(1)
-            params_str = func_match.group(2)
-
-            # Parse parameters
-            params = {}
-            if params_str:
-                # Split by comma, but not within quotes
-                param_parts = re.findall(r"""(?:[^,"]|"(?:\\.|[^"])*")+""", params_str)
-
-                # Get function signature if available
-                param_names = []
-                for func in self.mock_functions:
-                    if func.__name__ == function_name:
-                        sig = inspect.signature(func)
-                        param_names = list(sig.parameters.keys())
-                        break
-
-                for i, part in enumerate(param_parts):
-                    part = part.strip()
-
-                    # Handle named parameters (key=value)
-                    if "=" in part:
-                        key, value = part.split("=", 1)
-                        key = key.strip()
-                        value = value.strip()
-                    else:
-                        # Positional parameter
-                        if i < len(param_names):
-                            key = param_names[i]
-                        else:
-                            # If no parameter name mapping available, use index as key
-                            key = f"param_{i}"
-                        value = part
-
-                    # Clean up value
-                    value = value.strip("\"'")
-
-                    # Convert to appropriate type
-                    try:
-                        if value.isdigit():
-                            value = int(value)
-                        elif value.replace(".", "").isdigit() and value.count(".") == 1:
-                            value = float(value)
-                    except (ValueError, AttributeError):
-                        pass
-
-                    params[key] = value
-
-            return {"function_name": function_name, "function_params": params}
-        except Exception:
-            return {}
-
-    async def process_message(self, message: Message) -> Dict[str, Any]:
+        return parse_code_action(content, self._signatures).function
+
+    async def process_message(self, message: Message, chat_history: Optional[list] = None) -> Dict[str, Any]:
         """Process a message and return a response with structured function calls."""
         try:
-            messages = self._format_message_history(message)
-            response_content = await self._create_chat_completion(messages)
-
-            # Parse the action block
-            parsed_action = self._parse_action_block(response_content)
+            messages = self._format_message_history(message, chat_history)
+            response_content = await self._create_chat_completion(
+                messages, temperature=self.temperature, session_id=self._session_id(message)
+            )
+
+            # Parse thought and all calls of the action block in one pass
+            parsed = parse_code_action(response_content, self._signatures)
+            # An "Answer:" without an action is a valid final reply, not a parse failure
+            has_action = "Action:" in response_content
+            if (has_action and not parsed.calls) or (not has_action and "Answer:" not in response_content):
+                PARSE_FAILURES.labels(processor=type(self).__name__).inc()
 
             return {
                 "message": response_content,
-                "thought": self._extract_thought(response_content),
-                "function": parsed_action,
+                "thought": parsed.thought,
+                "function": parsed.function,
+                "calls": parsed.calls,
             }
         except Exception as e:
             return {
                 "message": f"I apologize, but I encountered an error: {str(e)}",
                 "thought": None,
                 "function": None,
+                "calls": [],
             }
 
     def _extract_thought(self, content: str) -> Optional[str]:
         """Extract the thought from the response content."""
-        thought_match = re.search(r"Thought:(.*?)(?:Action:|Answer:)", content, re.DOTALL)
-        if thought_match:
-            return thought_match.group(1).strip()
-        return None
+        return parse_code_action(content).thought
@@ -0,0 +1,228 @@
+"""
+Single-pass parsers for the response formats of the LLM processors.
+
+Each parser scans a response once and returns a `ParsedResponse` holding everything the
+processors need (thought, actions or function calls, parse error), so `process_message` never
+has to re-parse the same content to get at the thought.
+"""
+
+import ast
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PARSE_ERROR_PREFIX = "I apologize, but I couldn't parse the response format correctly."
+# Reason the JSON processor has always given for a reply without a JSON object
+NO_JSON_OBJECT = "_parse_action_block else"
+
+_XML_START = "<response>"
+_XML_END = "</response>"
+_JSON_FENCE = "```json"
+_FENCE = "```"
+
+_CODE_THOUGHT_RE = re.compile(r"Thought:(.*?)(?:Action:|Answer:)", re.DOTALL)
+_CODE_ACTION_RE = re.compile(r"Action:\s*(.*?)\s*End Action", re.DOTALL)
+# Fallback for action code that is not valid Python
+_CODE_CALL_RE = re.compile(r"(\w+)\((.*?)\)")
+_CODE_PARAM_RE = re.compile(r"""(?:[^,"]|"(?:\\.|[^"])*")+""")
+
+
+class ParsedResponse:
+    """
+    Result of parsing one LLM response.
+
+    Attributes:
+        thought: Extracted reasoning, or an apology if the response could not be parsed
+        actions: Actions of XML/JSON responses
+        calls: Function calls of code-action responses, each with `function_name` and `function_params`
+        error: Description of the parse failure, None if the response was parsed
+    """
+
+    __slots__ = ("thought", "actions", "calls", "error")
+
+    def __init__(
+        self,
+        thought: Optional[str] = None,
+        actions: Optional[List[Dict[str, Any]]] = None,
+        calls: Optional[List[Dict[str, Any]]] = None,
+        error: Optional[str] = None,
+    ):
+        self.thought = thought
+        self.actions = actions if actions is not None else []
+        self.calls = calls if calls is not None else []
+        self.error = error
+
+    @classmethod
+    def failure(cls, reason: str) -> "ParsedResponse":
+        return cls(thought=f"{PARSE_ERROR_PREFIX} {reason}", error=reason)
+
+    @property
+    def function(self) -> Dict[str, Any]:
+        """First function call of a code action, or an empty dict if there is none."""
+        return self.calls[0] if self.calls else {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Thought and actions in the shape returned by the XML and JSON processors."""
+        return {"thought": self.thought, "actions": self.actions}
+
+    def __repr__(self) -> str:
+        return f"ParsedResponse(thought={self.thought!r}, actions={self.actions!r}, calls={self.calls!r})"
+
+
+def parse_xml_response(content: str) -> ParsedResponse:
+    """
+    Parse a `<response><thought/><actions><action/>...</actions></response>` block.
+
+    Args:
+        content: Raw response content; text around the block is ignored
+
+    Returns:
+        ParsedResponse: Thought and actions, or a failure with an apology thought
+    """
+    start = content.find(_XML_START)
+    end = content.find(_XML_END)
+    if start == -1 or end == -1:
+        return ParsedResponse.failure("No XML block found.")
+
+    try:
+        root = ET.fromstring(content[start : end + len(_XML_END)])
+    except ET.ParseError as e:
+        return ParsedResponse.failure(f"XML parsing error: {str(e)}")
+
+    thought_element = root.find("thought")
+    actions = []
+    for action in root.iterfind("actions/action"):
+        name = action.find("name")
+        argument = action.find("argument")
+        action_data = {"name": name.text if name is not None else ""}
+        if argument is not None and argument.text:
+            action_data["argument"] = argument.text
+        actions.append(action_data)
+    return ParsedResponse(thought=thought_element.text if thought_element is not None else "", actions=actions)
+
+
+def parse_json_response(content: str) -> ParsedResponse:
+    """
+    Parse a `{"thought": ..., "actions": [...]}` object, optionally wrapped in a ```json fence.
+
+    Args:
+        content: Raw response content; text around the object is ignored
+
+    Returns:
+        ParsedResponse: Thought and actions, or a failure with an apology thought
+    """
+    fence = content.find(_JSON_FENCE)
+    if fence != -1:
+        content = content[fence + len(_JSON_FENCE) :]
+        closing = content.find(_FENCE)
+        if closing != -1:
+            content = content[:closing]
+
+    start = content.find("{")
+    end = content.rfind("}")
+    if start == -1 or end == -1:
+        return ParsedResponse.failure(NO_JSON_OBJECT)
+
+    json_string = content[start : end + 1]
+    try:
+        parsed = json.loads(json_string)
+    except json.JSONDecodeError:
+        return ParsedResponse.failure(f"_parse_action_block:\n{json_string}")
+    if not isinstance(parsed, dict):
+        return ParsedResponse.failure("_parse_action_block except")
+
+    actions = parsed.get("actions", [])
+    return ParsedResponse(thought=parsed.get("thought", ""), actions=actions if isinstance(actions, list) else [])
+
+
+def parse_code_action(content: str, signatures: Optional[Dict[str, List[str]]] = None) -> ParsedResponse:
+    """
+    Parse a `Thought: ... Action: <python calls> End Action` response.
+
+    The action code is parsed with `ast`, so every call is extracted (including nested calls
+    used as arguments) with literal arguments evaluated safely. Code that is not valid Python
+    falls back to extracting the first `name(...)` call with a regex.
+
+    Args:
+        content: Raw response content
+        signatures: Parameter names per function, used to name positional arguments
+
+    Returns:
+        ParsedResponse: Thought and function calls; calls are empty if there is no action block
+    """
+    signatures = signatures or {}
+    thought_match = _CODE_THOUGHT_RE.search(content)
+    thought = thought_match.group(1).strip() if thought_match else None
+
+    action_match = _CODE_ACTION_RE.search(content)
+    if not action_match:
+        return ParsedResponse(thought=thought)
+
+    code = action_match.group(1).strip()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        calls = _regex_calls(code, signatures)
+    else:
+        nodes = [node for node in ast.walk(tree) if isinstance(node, ast.Call) and _call_name(node.func)]
+        nodes.sort(key=lambda node: (node.lineno, node.col_offset))
+        calls = [_ast_call(node, signatures) for node in nodes]
+    return ParsedResponse(thought=thought, calls=calls)
+
+
+def _call_name(func: ast.expr) -> Optional[str]:
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        owner = _call_name(func.value)
+        return f"{owner}.{func.attr}" if owner else None
+    return None
+
+
+def _ast_value(node: ast.expr) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        # Non-literal arguments (names, nested calls) are kept as source text
+        return ast.unparse(node)
+
+
+def _ast_call(node: ast.Call, signatures: Dict[str, List[str]]) -> Dict[str, Any]:
+    function_name = _call_name(node.func)
+    param_names = signatures.get(function_name, [])
+    params = {}
+    for i, arg in enumerate(node.args):
+        params[param_names[i] if i < len(param_names) else f"param_{i}"] = _ast_value(arg)
+    for keyword in node.keywords:
+        if keyword.arg is not None:
+            params[keyword.arg] = _ast_value(keyword.value)
+    return {"function_name": function_name, "function_params": params}
+
+
+def _regex_calls(code: str, signatures: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    func_match = _CODE_CALL_RE.search(code)
+    if not func_match:
+        return []
+
+    function_name, params_str = func_match.group(1), func_match.group(2)
+    param_names = signatures.get(function_name, [])
+    params = {}
+    for i, part in enumerate(_CODE_PARAM_RE.findall(params_str) if params_str else []):
+        part = part.strip()
+        if "=" in part:
+            key, value = part.split("=", 1)
+            key, value = key.strip(), value.strip()
+        else:
+            key = param_names[i] if i < len(param_names) else f"param_{i}"
+            value = part
+        value = value.strip("\"'")
+        if value.isdigit():
+            value = int(value)
+        elif value.count(".") == 1 and value.replace(".", "").isdigit():
+            value = float(value)
+        params[key] = value
+    return [{"function_name": function_name, "function_params": params}]
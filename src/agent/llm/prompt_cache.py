@@ -0,0 +1,62 @@
+"""
+Prompt (KV-cache) reuse hints for LLM backends.
+
+The processors always send the static system prompt first, so consecutive requests of a session
+share a long prefix. llama.cpp-style servers can keep that prefix in a slot's KV cache if asked to
+(`cache_prompt`) and if the session keeps hitting the same slot (`id_slot`) on the same backend;
+the router pins sessions to backends for the latter.
+"""
+
+import os
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class PromptCacheConfig:
+    """
+    Cache hints added to every completion request.
+
+    Attributes:
+        enabled: Send `cache_prompt: true` so the backend reuses the cached prompt prefix
+        slots: Number of server slots per backend; when positive, each session is mapped to a
+            fixed `id_slot` so its follow-up requests land on the slot holding its prefix
+    """
+
+    enabled: bool = True
+    slots: int = 0
+
+    @classmethod
+    def from_env(cls) -> "PromptCacheConfig":
+        """
+        Build the configuration from LLM_PROMPT_CACHE* environment variables.
+
+        Hints are off unless LLM_PROMPT_CACHE is "true": strict OpenAI-compatible servers reject
+        the unknown `cache_prompt` and `id_slot` fields.
+        """
+        return cls(
+            enabled=os.getenv("LLM_PROMPT_CACHE", "false").lower() == "true",
+            slots=int(os.getenv("LLM_PROMPT_CACHE_SLOTS", "0")),
+        )
+
+    def slot_for(self, session_id: str) -> int:
+        """Map a session to a backend slot, stably across processes."""
+        return zlib.crc32(session_id.encode("utf-8")) % self.slots
+
+    def hints(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the cache hint fields of a completion request.
+
+        Args:
+            session_id: Conversation the request belongs to, if known
+
+        Returns:
+            Dict[str, Any]: Fields to merge into the request payload
+        """
+        if not self.enabled:
+            return {}
+        hints: Dict[str, Any] = {"cache_prompt": True}
+        if session_id and self.slots > 0:
+            hints["id_slot"] = self.slot_for(session_id)
+        return hints
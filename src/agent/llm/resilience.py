@@ -0,0 +1,328 @@
+"""
+Retries and circuit breaking for LLM completions.
+
+Transient backend errors are retried a bounded number of times with jittered exponential backoff,
+and every backend has a circuit breaker that fails fast while the backend is down instead of
+letting each request wait for a connect timeout.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, FrozenSet, List, Optional, TypeVar
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class LLMBackendError(Exception):
+    """
+    Raised when a backend answers a completion with a non-200 status code.
+
+    Attributes:
+        status: HTTP status code returned by the backend
+        retry_after: Seconds the backend asked to wait before retrying, if it sent Retry-After
+    """
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"API returned status code {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request to a backend whose circuit breaker is open.
+
+    Attributes:
+        alternatives_available: Whether another backend could still take the request
+    """
+
+    def __init__(self, message: str, alternatives_available: bool = False):
+        super().__init__(message)
+        self.alternatives_available = alternatives_available
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an error says something about backend health (client errors such as 400 do not)."""
+    if isinstance(error, LLMBackendError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, Exception)
+
+
+class RetryPolicy:
+    """
+    Bounded retries with full-jitter exponential backoff.
+
+    Attributes:
+        max_attempts: Total number of attempts including the first one
+        base_delay: Backoff ceiling of the first retry in seconds
+        max_delay: Upper bound of any backoff in seconds
+        retryable_statuses: Backend status codes worth retrying
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retryable_statuses: FrozenSet[int] = RETRYABLE_STATUSES,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_statuses = retryable_statuses
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self.exhausted = 0
+        self.retries_by_reason: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build the policy from LLM_RETRY_* environment variables."""
+        return cls(
+            max_attempts=int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "8")),
+        )
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Retry retryable statuses, connection problems, timeouts and open circuits with a backend left."""
+        if isinstance(error, LLMBackendError):
+            return error.status in self.retryable_statuses
+        if isinstance(error, CircuitOpenError):
+            # Retrying the same open circuit would only burn attempts and backoff
+            return error.alternatives_available
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def backoff(self, retry: int, error: Optional[BaseException] = None) -> float:
+        """
+        Delay before a retry.
+
+        Args:
+            retry: Zero-based number of the retry
+            error: The error that caused it; a Retry-After hint raises the delay
+
+        Returns:
+            float: Seconds to wait
+        """
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(self.max_delay, retry_after))
+        return delay
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a call, retrying it on retryable errors.
+
+        Args:
+            call: Zero-argument coroutine factory, invoked once per attempt
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            Exception: The last error if it is not retryable or the attempts are exhausted
+        """
+        self.calls += 1
+        for attempt in range(self.max_attempts):
+            try:
+                return await call()
+            except Exception as e:
+                if not self.is_retryable(e):
+                    raise
+                if attempt + 1 >= self.max_attempts:
+                    self.exhausted += 1
+                    raise
+                reason = str(e.status) if isinstance(e, LLMBackendError) else type(e).__name__
+                self.retries += 1
+                self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+                delay = self.backoff(attempt, e)
+                logger.warning(f"Retrying LLM completion in {delay:.2f}s after error: {str(e)}")
+                await self._sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call, retry and exhaustion counters."""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+            "retries_by_reason": dict(self.retries_by_reason),
+        }
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+
+    Closed: requests flow and consecutive failures are counted. Open: requests fail fast until
+    `reset_timeout` has passed. Half-open: a limited number of probe requests are let through; a
+    successful probe closes the circuit, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+        clock=time.monotonic,
+        on_transition: Optional[Callable[[str, str, str], None]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._clock = clock
+        self._on_transition = on_transition
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probes = 0
+        self.rejected = 0
+        self.transitions = 0
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent, moving from open to half-open when it is time."""
+        if self.state == OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.probes < self.half_open_max:
+            self.probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Whether a request would currently be let through, without reserving a probe."""
+        if self.state == OPEN:
+            return self._clock() - self.opened_at >= self.reset_timeout
+        return self.state == CLOSED or self.probes < self.half_open_max
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.opened_at = self._clock()
+            self._transition(OPEN)
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe whose request ended without a verdict (e.g. cancelled)."""
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        self.probes = 0
+        self.transitions += 1
+        logger.warning(f"Circuit breaker {self.name} changed from {previous} to {state}")
+        if self._on_transition is not None:
+            self._on_transition(self.name, previous, state)
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run one request under the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all half-open probes are taken
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker of {self.name} is open")
+        try:
+            yield
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure()
+            else:
+                self.release_probe()
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        else:
+            self.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "transitions": self.transitions,
+        }
+
+
+class BreakerRegistry:
+    """Holds one circuit breaker per backend URL and a log of recent state transitions."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=100)
+
+    @classmethod
+    def from_env(cls) -> "BreakerRegistry":
+        """Build the registry from LLM_BREAKER_* environment variables."""
+        return cls(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", "30")),
+            half_open_max=int(os.getenv("LLM_BREAKER_HALF_OPEN_MAX", "1")),
+        )
+
+    def get(self, base_url: str) -> CircuitBreaker:
+        """Get the breaker of a backend, creating it on first use."""
+        breaker = self._breakers.get(base_url)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name=base_url,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                half_open_max=self.half_open_max,
+                on_transition=self._record_transition,
+            )
+            self._breakers[base_url] = breaker
+        return breaker
+
+    def unavailable(self) -> List[str]:
+        """URLs of backends whose breaker would currently reject a request."""
+        return [url for url, breaker in self._breakers.items() if not breaker.available]
+
+    def _record_transition(self, name: str, previous: str, state: str) -> None:
+        self.transitions.append({"backend": name, "from": previous, "to": state, "at": time.time()})
+
+    def stats(self) -> Dict[str, Any]:
+        """Return breaker state per backend URL and the recent transitions."""
+        return {
+            "breakers": {url: breaker.stats() for url, breaker in self._breakers.items()},
+            "transitions": list(self.transitions),
+        }
+
+
+backend_breakers = BreakerRegistry.from_env()
+"""Process-wide circuit breakers shared by all LLM processors."""
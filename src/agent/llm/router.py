@@ -0,0 +1,279 @@
+"""
+Routing of completions across several LLM backends.
+
+Each completion is sent to the healthy backend with the fewest outstanding requests, weighted by
+its recently measured latency. Backends that keep failing are ejected from rotation and readmitted
+once a periodic health check succeeds again. Requests of the same session stick to the backend that
+served it before, so the backend can reuse its cached prompt prefix.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.resilience import CircuitOpenError, is_backend_failure
+from src.common.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """
+    Routing state of a single LLM backend.
+
+    Attributes:
+        url: Base URL of the OpenAI-compatible API
+        outstanding: Number of requests currently sent to the backend
+        latency: Exponentially weighted moving average of request latency in seconds
+        healthy: False while the backend is ejected from rotation
+        consecutive_failures: Failures since the last success
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.affinity_hits = 0
+
+    def score(self, default_latency: float) -> float:
+        """Expected cost of sending one more request: outstanding work weighted by latency."""
+        return (self.outstanding + 1) * (self.latency if self.latency is not None else default_latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "affinity_hits": self.affinity_hits,
+        }
+
+
+class BackendRouter:
+    """
+    Least-outstanding-requests balancer over a fixed list of backends.
+
+    Attributes:
+        backends: Backends in configuration order
+        failure_threshold: Consecutive failures after which a backend is ejected
+        latency_decay: Weight of the newest sample in the latency moving average
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        failure_threshold: int = 3,
+        latency_decay: float = 0.3,
+        affinity_size: int = 10000,
+        affinity_ttl: float = 600.0,
+    ):
+        if not urls:
+            raise ValueError("At least one backend URL is required")
+        self.backends = [Backend(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.latency_decay = latency_decay
+        # session id -> URL of the backend holding the session's cached prompt prefix
+        self._affinity = TTLCache(max_size=affinity_size, ttl=affinity_ttl)
+
+    @property
+    def primary_url(self) -> str:
+        return self.backends[0].url
+
+    def choose(self, exclude: Iterable[str] = (), affinity: Optional[str] = None) -> Backend:
+        """
+        Pick the backend with the lowest latency-weighted outstanding request count.
+
+        Ejected backends are skipped unless no healthy backend is left, in which case all
+        backends are considered so requests still have somewhere to go. A session keeps its
+        backend as long as that backend is healthy and not excluded.
+
+        Args:
+            exclude: URLs that must not be chosen (for example the backend of a hedged request)
+            affinity: Session id whose requests should stick to one backend
+
+        Returns:
+            Backend: The selected backend
+        """
+        excluded = set(exclude)
+        if affinity is not None:
+            pinned = self._pinned_backend(affinity)
+            if pinned is not None and pinned.healthy and pinned.url not in excluded:
+                pinned.affinity_hits += 1
+                self._affinity.set(affinity, pinned.url)
+                return pinned
+
+        candidates = [b for b in self.backends if b.url not in excluded] or self.backends
+        healthy = [b for b in candidates if b.healthy] or candidates
+        known = [b.latency for b in healthy if b.latency is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        # Ties go to the backend that has served fewer requests, so new backends get traffic
+        backend = min(healthy, key=lambda backend: (backend.score(default_latency), backend.requests))
+        if affinity is not None:
+            self._affinity.set(affinity, backend.url)
+        return backend
+
+    def _pinned_backend(self, affinity: str) -> Optional[Backend]:
+        url = self._affinity.get(affinity)
+        for backend in self.backends:
+            if backend.url == url:
+                return backend
+        return None
+
+    @asynccontextmanager
+    async def route(self, exclude: Iterable[str] = (), affinity: Optional[str] = None) -> AsyncIterator[Backend]:
+        """
+        Reserve a backend for the duration of one request and record its outcome.
+
+        Args:
+            exclude: URLs that must not be chosen
+            affinity: Session id whose requests should stick to one backend
+
+        Yields:
+            Backend: The backend the request must be sent to
+        """
+        backend = self.choose(exclude, affinity)
+        backend.outstanding += 1
+        backend.requests += 1
+        started = time.monotonic()
+        try:
+            yield backend
+        except Exception as e:
+            # Open circuits and client errors such as 400 say nothing about the backend's health
+            if is_backend_failure(e) and not isinstance(e, CircuitOpenError):
+                self.record_failure(backend)
+            raise
+        else:
+            self.record_success(backend, time.monotonic() - started)
+        finally:
+            backend.outstanding -= 1
+
+    def record_success(self, backend: Backend, latency: Optional[float] = None) -> None:
+        """Update latency and readmit the backend after a successful request or health check."""
+        if latency is not None:
+            if backend.latency is None:
+                backend.latency = latency
+            else:
+                backend.latency += (latency - backend.latency) * self.latency_decay
+        backend.consecutive_failures = 0
+        if not backend.healthy:
+            logger.info(f"Readmitting LLM backend {backend.url}")
+            backend.healthy = True
+
+    def record_failure(self, backend: Backend) -> None:
+        """Count a failure and eject the backend once the threshold is reached."""
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+            logger.warning(f"Ejecting LLM backend {backend.url} after {backend.consecutive_failures} failures")
+            backend.healthy = False
+
+    async def check_health(self, http_client: Optional[LLMHttpClient] = None, timeout: float = 5.0) -> None:
+        """Probe every backend's `/models` endpoint and update its health."""
+        await asyncio.gather(*(self._check_backend(backend, http_client, timeout) for backend in self.backends))
+
+    async def _check_backend(self, backend: Backend, http_client: Optional[LLMHttpClient], timeout: float) -> None:
+        try:
+            if http_client is None:
+                async with aiohttp.ClientSession() as session:
+                    ok = await self._probe(session, backend.url, timeout)
+            else:
+                ok = await self._probe(http_client.session(backend.url), backend.url, timeout)
+        except Exception as e:
+            logger.debug(f"Health check of {backend.url} failed: {str(e)}")
+            ok = False
+
+        if ok:
+            self.record_success(backend)
+        else:
+            self.record_failure(backend)
+
+    @staticmethod
+    async def _probe(session: aiohttp.ClientSession, url: str, timeout: float) -> bool:
+        async with session.get(f"{url}/models", timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return response.status == 200
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return routing statistics keyed by backend URL."""
+        return {backend.url: backend.stats() for backend in self.backends}
+
+
+class RouterRegistry:
+    """
+    Shares one router per backend list, so processors that talk to the same backends
+    see each other's outstanding requests.
+    """
+
+    def __init__(self, failure_threshold: int = 3, health_check_interval: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.health_check_interval = health_check_interval
+        self._routers: Dict[Tuple[str, ...], BackendRouter] = {}
+
+    @classmethod
+    def from_env(cls) -> "RouterRegistry":
+        """Build the registry from LLM_ROUTER_* environment variables."""
+        return cls(
+            failure_threshold=int(os.getenv("LLM_ROUTER_FAILURE_THRESHOLD", "3")),
+            health_check_interval=float(os.getenv("LLM_ROUTER_HEALTH_CHECK_INTERVAL", "10")),
+        )
+
+    def get(self, urls: Sequence[str]) -> BackendRouter:
+        """Get the router for a list of backend URLs, creating it on first use."""
+        key = tuple(urls)
+        router = self._routers.get(key)
+        if router is None:
+            router = BackendRouter(urls, failure_threshold=self.failure_threshold)
+            self._routers[key] = router
+        return router
+
+    def from_env_urls(self, list_var: str, single_var: str, default: str) -> BackendRouter:
+        """
+        Get the router for backends configured in the environment.
+
+        Args:
+            list_var: Variable holding a comma-separated list of backend URLs
+            single_var: Variable holding a single backend URL, used if the list is not set
+            default: URL used if neither variable is set
+
+        Returns:
+            BackendRouter: Shared router for the configured backends
+        """
+        urls = [url.strip() for url in os.getenv(list_var, "").split(",") if url.strip()]
+        return self.get(urls or [os.getenv(single_var, default)])
+
+    @property
+    def routers(self) -> List[BackendRouter]:
+        return list(self._routers.values())
+
+    @property
+    def urls(self) -> List[str]:
+        """URLs of all backends known to any router, each listed once."""
+        return list(dict.fromkeys(backend.url for router in self.routers for backend in router.backends))
+
+    async def run_health_checks(self, http_client: Optional[LLMHttpClient] = None) -> None:
+        """Periodically health-check every backend of every router until cancelled."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.gather(*(router.check_health(http_client) for router in self.routers))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return routing statistics of all backends keyed by URL."""
+        stats = {}
+        for router in self.routers:
+            stats.update(router.stats())
+        return stats
+
+
+backend_routers = RouterRegistry.from_env()
+"""Process-wide routers shared by all LLM processors."""
@@ -0,0 +1,341 @@
+"""
+Helpers for consuming streamed chat completions.
+
+Provides an SSE reader for OpenAI-compatible `/chat/completions` streams and incremental
+parsers that emit structured actions as soon as they are complete in the token stream.
+"""
+
+import html
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_sse_content(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """
+    Iterate over the content deltas of a streamed chat completion.
+
+    Args:
+        response: Response of a `/chat/completions` request sent with `"stream": true`
+
+    Yields:
+        str: Text fragments in the order they were generated
+    """
+    async for raw_line in response.content:
+        line = raw_line.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed SSE chunk: {data[:100]}")
+            continue
+        choices = chunk.get("choices") or [{}]
+        delta = choices[0].get("delta") or {}
+        content = delta.get("content")
+        if content:
+            yield content
+
+
+class XmlActionStreamParser:
+    """
+    Incremental parser for the `<response>` XML format.
+
+    Text is fed as it arrives from the model; every `<action>` element is returned as soon as
+    its closing tag has been seen, without waiting for the rest of the response.
+
+    Attributes:
+        thought (Optional[str]): The thought, once its closing tag has been parsed
+        actions (List[Dict[str, Any]]): Actions emitted so far
+        done (bool): True once `</response>` has been parsed
+        error (Optional[str]): Parse error message, if the stream was not well-formed XML
+    """
+
+    start_tag = "<response>"
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._pending = ""
+        self._started = False
+        self.thought: Optional[str] = None
+        self.actions: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Feed a chunk of model output into the parser.
+
+        Args:
+            chunk: Next text fragment of the response
+
+        Returns:
+            List[Dict[str, Any]]: Events completed by this chunk, each either
+                {"event": "thought", "thought": ...} or {"event": "action", "action": {...}}
+        """
+        if self.done or self.error:
+            return []
+
+        if not self._started:
+            # Skip any preamble the model emits before the XML block
+            self._pending += chunk
+            start = self._pending.find(self.start_tag)
+            if start == -1:
+                # Keep only a tail long enough to contain a split start tag
+                self._pending = self._pending[-len(self.start_tag) :]
+                return []
+            self._started = True
+            chunk, self._pending = self._pending[start:], ""
+
+        try:
+            self._parser.feed(chunk)
+            return self._collect_events()
+        except ET.ParseError as e:
+            self.error = str(e)
+            logger.error(f"Failed to parse streamed XML content: {self.error}")
+            return []
+
+    def _collect_events(self) -> List[Dict[str, Any]]:
+        events = []
+        for _, element in self._parser.read_events():
+            if element.tag == "thought":
+                self.thought = element.text or ""
+                events.append({"event": "thought", "thought": self.thought})
+            elif element.tag == "action":
+                name = element.find("name")
+                argument = element.find("argument")
+                action = {"name": name.text if name is not None else ""}
+                if argument is not None and argument.text:
+                    action["argument"] = argument.text
+                self.actions.append(action)
+                events.append({"event": "action", "action": action})
+            elif element.tag == "response":
+                self.done = True
+                break
+        return events
+
+
+class JsonActionStreamParser:
+    """
+    Incremental tokenizer for the `{"thought": ..., "actions": [...]}` JSON format.
+
+    Tracks string/escape state and container nesting character by character, so every object
+    of the top-level `actions` array is decoded and returned as soon as its closing brace arrives.
+    Any text before the first `{` (such as a markdown code fence) is ignored.
+
+    Attributes:
+        thought (Optional[str]): The thought, once its string value is complete
+        actions (List[Dict[str, Any]]): Actions emitted so far
+        done (bool): True once the top-level object has been closed
+        error (Optional[str]): Decoding error message, if an action object was malformed
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        # Each frame is [container, current_key, expect_key, start_index, is_actions_array]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.thought: Optional[str] = None
+        self.actions: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Feed a chunk of model output into the parser.
+
+        Args:
+            chunk: Next text fragment of the response
+
+        Returns:
+            List[Dict[str, Any]]: Events completed by this chunk, each either
+                {"event": "thought", "thought": ...} or {"event": "action", "action": {...}}
+        """
+        if self.done or self.error:
+            return []
+
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return []
+            self._started = True
+            chunk = chunk[start:]
+
+        self._buffer += chunk
+        events = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    events.extend(self._close_string(i))
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == "{":
+                self._stack.append(["{", None, True, i, False])
+            elif char == "[":
+                parent = self._stack[-1] if self._stack else None
+                is_actions = parent is not None and len(self._stack) == 1 and parent[1] == "actions"
+                self._stack.append(["[", None, False, i, is_actions])
+            elif char == ",":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][2] = True
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                frame = self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    break
+                if char == "}" and self._stack[-1][4]:
+                    events.extend(self._close_action(frame[3], i))
+                    if self.error:
+                        break
+
+        self._pos = len(buffer)
+        return events
+
+    def _close_string(self, end: int) -> List[Dict[str, Any]]:
+        if not self._stack or self._stack[-1][0] != "{":
+            return []
+        frame = self._stack[-1]
+        raw = self._buffer[self._string_start : end + 1]
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw[1:-1]
+        if frame[2]:
+            frame[1] = value
+            frame[2] = False
+        elif len(self._stack) == 1 and frame[1] == "thought":
+            self.thought = value
+            return [{"event": "thought", "thought": self.thought}]
+        return []
+
+    def _close_action(self, start: int, end: int) -> List[Dict[str, Any]]:
+        try:
+            action = json.loads(self._buffer[start : end + 1])
+        except json.JSONDecodeError as e:
+            self.error = str(e)
+            logger.error(f"Failed to parse streamed JSON action: {self.error}")
+            return []
+        self.actions.append(action)
+        return [{"event": "action", "action": action}]
+
+
+_ANSWER_START = {
+    "xml": re.compile(r"<name>\s*response_to_user\s*</name>\s*<argument>"),
+    "json": re.compile(r'"name"\s*:\s*"response_to_user"\s*,\s*"argument"\s*:\s*"'),
+}
+
+
+class AnswerStreamExtractor:
+    """
+    Extracts the text of the `response_to_user` argument while it is being generated.
+
+    The action parsers only emit an action once it is complete; this extractor returns the
+    answer text incrementally, so it can be shown to the user from its first token. Partial
+    entities (XML) and escape sequences (JSON) at the end of a chunk are held back until complete.
+
+    Attributes:
+        done (bool): True once the end of the argument has been seen
+    """
+
+    def __init__(self, response_format: str):
+        self._format = response_format
+        self._start = _ANSWER_START[response_format]
+        self._buffer = ""
+        self._begin: Optional[int] = None
+        self._emitted = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Feed a chunk of model output.
+
+        Args:
+            chunk: Next text fragment of the response
+
+        Returns:
+            str: New answer text completed by this chunk, empty if there is none
+        """
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._begin is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._begin = match.end()
+
+        raw = self._buffer[self._begin :]
+        text = self._decode_xml(raw) if self._format == "xml" else self._decode_json(raw)
+        if text is None:
+            return ""
+        delta = text[self._emitted :]
+        self._emitted = len(text)
+        return delta
+
+    def _decode_xml(self, raw: str) -> str:
+        end = raw.find("</argument>")
+        if end != -1:
+            self.done = True
+            raw = raw[:end]
+        else:
+            # Argument text cannot contain "<", so one at the end starts the closing tag
+            tag = raw.rfind("<")
+            if tag != -1:
+                raw = raw[:tag]
+            entity = raw.rfind("&")
+            if entity != -1 and ";" not in raw[entity:]:
+                raw = raw[:entity]
+        return html.unescape(raw)
+
+    def _decode_json(self, raw: str) -> Optional[str]:
+        index, last_escape = 0, -1
+        while index < len(raw):
+            char = raw[index]
+            if char == "\\":
+                last_escape = index
+                index += 2
+                continue
+            if char == '"':
+                self.done = True
+                raw = raw[:index]
+                break
+            index += 1
+        else:
+            # Hold back an escape sequence that is cut off
+            escape = raw[last_escape:] if last_escape != -1 else ""
+            if escape and (len(escape) < 2 or (escape[1] == "u" and len(escape) < 6)):
+                raw = raw[:last_escape]
+        try:
+            text = json.loads(f'"{raw}"', strict=False)
+        except json.JSONDecodeError:
+            # Invalid escape sequence; the action parser reports the error
+            return None
+        if not self.done and text and "\ud800" <= text[-1] <= "\udbff":
+            # High surrogate whose low half has not arrived yet
+            text = text[:-1]
+        return text
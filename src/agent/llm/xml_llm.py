@@ -1,12 +1,18 @@
 import logging
 import os
-from typing import Any, Dict, List, Optional
-import xml.etree.ElementTree as ET
-from typing import Dict, Any, Optional
-
-import aiohttp
-
-from src.agent.llm.base_llm import BaseLLMProcessor
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.agent.llm.base_llm import PARSE_FAILURES, BaseLLMProcessor
+from src.agent.llm.budget import GenerationBudget
+from src.agent.llm.constrained import DecodingConstraints
+from src.agent.llm.hedging import HedgePolicy
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.parsing import PARSE_ERROR_PREFIX, parse_xml_response
+from src.agent.llm.prompt_cache import PromptCacheConfig
+from src.agent.llm.resilience import RetryPolicy
+from src.agent.llm.router import backend_routers
+from src.agent.llm.streaming import AnswerStreamExtractor, XmlActionStreamParser
 from src.agent.planning.prompts.xml_prompt import XML_PROMPT
 from src.common.interfaces import Message
 
@@ -14,33 +20,44 @@ logger = logging.getLogger(__name__)
 
 
 class XmlProcessor(BaseLLMProcessor):
-    def __init__(self):
-        """Initialize XML format processor."""
-        self.base_url = os.getenv("LLM_API_URL", "http://localhost:1234/v1")
+    def __init__(self, http_client: Optional[LLMHttpClient] = None):
+        """
+        Initialize XML format processor.
+
+        Args:
+            http_client (Optional[LLMHttpClient]): Shared pooled HTTP client for the LLM backend
+        """
+        self.router = backend_routers.from_env_urls("LLM_API_URLS", "LLM_API_URL", "http://localhost:1234/v1")
+        self.model = os.getenv("LLM_MODEL")
+        self.http_client = http_client
+        self.hedging = HedgePolicy.from_env()
+        self.retry_policy = RetryPolicy.from_env()
+        self.prompt_cache = PromptCacheConfig.from_env()
+        self.stop_sequences = ["</response>"]
+        self.stop_block_start = "<response>"
+        self.generation_budget = GenerationBudget.from_env()
+        self.action_type_pattern = re.compile(r"<name>\s*([\w.]+)")
+        self.constraints = DecodingConstraints.from_env("xml")
+        self.temperature = 0.6
         self.system_prompt = XML_PROMPT
-        logger.info(f"Initialized XmlProcessor with base URL: {self.base_url}")
+        logger.info(f"Initialized XmlProcessor with backends: {list(self.router.stats())}")
 
-    async def _create_chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.6) -> str:
+    async def _create_chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.6, session_id: Optional[str] = None
+    ) -> str:
         """Create a chat completion using the LLM API."""
         try:
             logger.info(f"Sending request to LLM API with temperature: {temperature}")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    json={
-                        "messages": messages,
-                        "temperature": temperature,
-                        "stream": False,
-                        "max_tokens": 1024
-                    },
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"API returned non-200 status code: {response.status}")
-                        raise Exception(f"API returned status code {response.status}")
-
-                    result = await response.json()
-                    logger.info("Successfully received response from LLM API")
-                    return result["choices"][0]["message"]["content"]
+            result = await self._post_chat_completion(
+                {
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": False,
+                },
+                session_id=session_id,
+            )
+            logger.info("Successfully received response from LLM API")
+            return self._completion_content(result)
         except Exception as e:
             logger.error(f"Error in LLM processing: {str(e)}", exc_info=True)
             raise Exception(f"Error in LLM processing: {str(e)}")
@@ -59,67 +76,24 @@ class XmlProcessor(BaseLLMProcessor):
 
     def _parse_action_block(self, content: str) -> Dict[str, Any]:
         """Parse the action block to extract function name and parameters from XML."""
-        try:
-            # Define XML code block markers
-            start = "<response>"
-            end = "</response>"
-            
-            if start in content and end in content:
-                # Extract the XML block
-                content = content[content.find(start):content.find(end) + len(end)]
-            else:
-                logger.error("No XML block found in the content")
-                return {
-                    "thought": "I apologize, but I couldn't parse the response format correctly. No XML block found.",
-                    "actions": [],
-                }
-            
-            try:
-                # Parse the XML content
-                root = ET.fromstring(content)
-                thought = root.find("thought").text if root.find("thought") is not None else ""
-                actions = []
-                
-                for action in root.findall("actions/action"):
-                    name = action.find("name").text if action.find("name") is not None else ""
-                    argument = action.find("argument").text if action.find("argument") is not None else None
-                    action_data = {"name": name}
-                    if argument:
-                        action_data["argument"] = argument
-                    actions.append(action_data)
-                
-                return {
-                    "thought": thought,
-                    "actions": actions,
-                }
-            except ET.ParseError as e:
-                logger.error(f"Failed to parse XML content: {str(e)}")
-                return {
-                    "thought": f"I apologize, but I couldn't parse the response format correctly. XML parsing error: {str(e)}",
-                    "actions": [],
-                }
-        except Exception as e:
-            logger.error(f"Failed to parse XML content: {str(e)}")
-            return {
-                "thought": "I apologize, but I couldn't parse the response format correctly. Exception occurred.",
-                "actions": [],
-            }
+        parsed = parse_xml_response(content)
+        if parsed.error:
+            logger.error(f"Failed to parse XML content: {parsed.error}")
+            PARSE_FAILURES.labels(processor=type(self).__name__).inc()
+        return parsed.to_dict()
 
     def _extract_thought(self, content: str) -> Optional[str]:
         """Extract the thought process from the response content."""
-        try:
-            parsed_content = self._parse_action_block(content)
-            return parsed_content.get("thought")
-        except Exception as e:
-            logger.error(f"Error extracting thought: {str(e)}")
-            return None
+        return parse_xml_response(content).thought
 
-    async def process_message(self, message: Message) -> Dict[str, Any]:
+    async def process_message(self, message: Message, chat_history: Optional[list] = None) -> Dict[str, Any]:
         """Process a message and return the LLM's response."""
         try:
             logger.info(f"Processing message: {message.content[:50]}...")
-            messages = self._format_message_history(message)
-            response = await self._create_chat_completion(messages)
+            messages = self._format_message_history(message, chat_history)
+            response = await self._create_chat_completion(
+                messages, temperature=self.temperature, session_id=self._session_id(message)
+            )
             logger.debug("Successfully received completion from LLM")
 
             # Parse the response and extract thought and actions
@@ -130,3 +104,61 @@ class XmlProcessor(BaseLLMProcessor):
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
             return {"thought": f"Error in LLM processing: {str(e)}", "actions": []}
+
+    async def stream_actions(
+        self, message: Message, temperature: float = 0.6, chat_history: Optional[list] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the LLM response and yield the thought and each action as soon as it is complete.
+
+        The completion is requested with `"stream": true` and fed into an incremental XML parser,
+        so callers can start executing a tool call while the model is still generating the rest
+        of the response. The stream is closed as soon as `</response>` has been parsed.
+
+        Args:
+            message (Message): The input message to process
+            temperature (float): Sampling temperature for generation
+            chat_history (Optional[list]): Previous turns of the conversation as chat messages
+
+        Yields:
+            Dict[str, Any]: {"event": "thought", "thought": str}, {"event": "action", "action": dict},
+                or {"event": "answer_delta", "text": str} with new text of a `response_to_user` answer
+        """
+        logger.info(f"Streaming message: {message.content[:50]}...")
+        messages = self._format_message_history(message, chat_history)
+        parser = XmlActionStreamParser()
+        answer = AnswerStreamExtractor("xml")
+        streamed = ""
+        try:
+            async for delta in self._stream_chat_completion(
+                {
+                    "messages": messages,
+                    "temperature": temperature,
+                },
+                session_id=self._session_id(message),
+            ):
+                streamed += delta
+                text = answer.feed(delta)
+                if text:
+                    yield {"event": "answer_delta", "text": text}
+                for event in parser.feed(delta):
+                    yield event
+                if parser.done or parser.error:
+                    break
+            else:
+                # The backend strips the `</response>` stop sequence from the stream
+                if self._inside_stop_block(streamed):
+                    for event in parser.feed(self.stop_sequences[0]):
+                        yield event
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}", exc_info=True)
+            yield {"event": "thought", "thought": f"Error in LLM processing: {str(e)}"}
+            return
+
+        if parser.error or (not parser.done and not parser.actions):
+            PARSE_FAILURES.labels(processor=type(self).__name__).inc()
+            reason = parser.error or "No XML block found."
+            yield {
+                "event": "thought",
+                "thought": f"{PARSE_ERROR_PREFIX} {reason}",
+            }
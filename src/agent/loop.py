@@ -0,0 +1,328 @@
+"""
+Server-side agent loop: think → tools → think until the agent answers the user.
+
+Running the loop inside the agent service saves the two HTTP hops per iteration of the client's
+loop (agent → client with the actions, client → agent with the results). Tools are executed
+through a pluggable `ToolExecutor`, either the client service's `/tool_call` endpoint or an
+in-process tool handler. With processors that stream actions, each tool call starts as soon as
+its action has been generated instead of after the whole completion.
+"""
+
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from src.common import tracing
+from src.common.interfaces import Message
+from src.common.tool_results import ToolExecutionPolicy, format_results_message
+
+logger = logging.getLogger(__name__)
+
+FINAL_ACTION = "response_to_user"
+
+# One completion for a message, e.g. `run_processor` bound to a processor
+ProcessStep = Callable[[Message], Awaitable[Dict[str, Any]]]
+# Thought and action events of one streamed completion for a message
+StreamStep = Callable[[Message], AsyncIterator[Dict[str, Any]]]
+
+
+def normalize_actions(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Actions of a processor result as {"name", "argument"} dicts.
+
+    XML and JSON processors return `actions` directly; code-action and dummy processors return
+    function calls with `function_name` and `function_params`.
+    """
+    if result.get("actions"):
+        return list(result["actions"])
+    calls = result.get("calls") or ([result["function"]] if result.get("function") else [])
+    return [
+        {"name": call["function_name"], "argument": call.get("function_params", {})}
+        for call in calls
+        if call.get("function_name")
+    ]
+
+
+def tool_call_of(action: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an action into the tool call format of the client's `ToolCallHandler`."""
+    argument = action.get("argument", {})
+    return {
+        "type": action["name"],
+        **(argument if isinstance(argument, dict) else {"coin_symbol": argument or ""}),
+    }
+
+
+def answer_of(action: Dict[str, Any]) -> str:
+    """Message of a `response_to_user` action."""
+    argument = action.get("argument", "")
+    if isinstance(argument, dict):
+        return str(argument.get("message", ""))
+    return str(argument)
+
+
+class ToolExecutor(ABC):
+    """Executes the tool calls of the agent loop."""
+
+    @abstractmethod
+    async def execute(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute one tool call.
+
+        Args:
+            tool_call: Tool call with its `type` and arguments
+
+        Returns:
+            Dict[str, Any]: Result of the tool, with an `error` key if it failed
+        """
+        pass
+
+    async def close(self) -> None:
+        """Release resources held by the executor."""
+
+
+class HttpToolExecutor(ToolExecutor):
+    """
+    Executes tools through the client service's `/tool_call` endpoint.
+
+    Attributes:
+        base_url: Base URL of the client service
+        timeout: Total timeout of a tool call in seconds
+    """
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def execute(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        try:
+            async with self._session.post(
+                f"{self.base_url}/tool_call", json=tool_call, headers=tracing.inject({})
+            ) as response:
+                if response.status != 200:
+                    return {"type": tool_call.get("type"), "error": f"Tool call failed with status {response.status}"}
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {"type": tool_call.get("type"), "error": f"Tool call failed: {str(e) or type(e).__name__}"}
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class InProcessToolExecutor(ToolExecutor):
+    """Executes tools with a handler running in the agent process, e.g. `ToolCallHandler.handle_with_deadline`."""
+
+    def __init__(self, handle: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        self.handle = handle
+
+    async def execute(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.handle(tool_call)
+
+
+def tool_executor_from_env() -> ToolExecutor:
+    """
+    Build the tool executor from AGENT_TOOL_EXECUTOR ("http" or "inprocess").
+
+    The in-process executor needs the client's market-data dependencies and API keys in the
+    agent service.
+    """
+    if os.getenv("AGENT_TOOL_EXECUTOR", "http").lower() == "inprocess":
+        from src.client.services import ToolCallHandler
+
+        # Same per-tool deadlines as the client's `/tool_call` endpoint
+        return InProcessToolExecutor(ToolCallHandler().handle_with_deadline)
+    return HttpToolExecutor(
+        os.getenv("CLIENT_SERVICE_URL", "http://client:8000"),
+        timeout=float(os.getenv("AGENT_TOOL_TIMEOUT", "120")),
+    )
+
+
+class AgentLoop:
+    """
+    Runs the think → tools → think loop for a message.
+
+    Attributes:
+        executor: Executes the tool calls
+        max_steps: Maximum number of completions per run
+        pipeline: Whether to start tool calls while the completion is still streaming
+        max_tool_concurrency: Maximum number of tool calls of a step running at the same time
+    """
+
+    def __init__(
+        self, executor: ToolExecutor, max_steps: int = 8, pipeline: bool = True, max_tool_concurrency: int = 4
+    ):
+        self.executor = executor
+        self.max_steps = max_steps
+        self.pipeline = pipeline
+        self.max_tool_concurrency = max_tool_concurrency
+
+    @classmethod
+    def from_env(cls, executor: ToolExecutor) -> "AgentLoop":
+        """Build the loop from AGENT_LOOP_* environment variables and the client's TOOL_MAX_CONCURRENCY."""
+        return cls(
+            executor,
+            max_steps=int(os.getenv("AGENT_LOOP_MAX_STEPS", "8")),
+            pipeline=os.getenv("AGENT_LOOP_PIPELINE", "true").lower() == "true",
+            max_tool_concurrency=ToolExecutionPolicy.from_env().max_concurrency,
+        )
+
+    async def run(
+        self, message: Message, process: ProcessStep, stream: Optional[StreamStep] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the loop and yield a log event for each step as it happens.
+
+        Events are {"event": "step" | "thought" | "action" | "tool_result", "step": int, ...}, plus
+        {"event": "answer_delta", "text": str} while a streamed answer is being generated, ending
+        with {"event": "final", "message": str, "reason": "answered" | "max_steps"} or
+        {"event": "error", "error": str, "error_type": str}.
+
+        Args:
+            message: The user's message
+            process: Runs one completion for a message
+            stream: Streams the thought and actions of one completion; used instead of `process`
+                to pipeline tool calls with generation if set and `pipeline` is enabled
+
+        Yields:
+            Dict[str, Any]: Step log events
+        """
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        # The loop runs in its own task so its spans stay nested while events are consumed
+        task = asyncio.create_task(self._run(message, process, stream, queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            await task
+        finally:
+            # The consumer went away, e.g. the client disconnected from the step log
+            task.cancel()
+
+    async def run_to_completion(
+        self, message: Message, process: ProcessStep, stream: Optional[StreamStep] = None
+    ) -> List[Dict[str, Any]]:
+        """Run the loop and return its step log; the last event is "final" or "error"."""
+        return [event async for event in self.run(message, process, stream)]
+
+    async def _run(
+        self,
+        message: Message,
+        process: ProcessStep,
+        stream: Optional[StreamStep],
+        emit: Callable[[Dict[str, Any]], None],
+    ) -> None:
+        step = 0
+        with tracing.start_span("agent_loop.run", "agent", {"max_steps": self.max_steps}):
+            try:
+                content = message.content
+                thought = ""
+                for step in range(1, self.max_steps + 1):
+                    emit({"event": "step", "step": step})
+                    step_message = message.model_copy(update={"content": content})
+                    # Caps the tool calls of the step, like `ToolCallHandler.handle_all` in the client's loop
+                    limit = asyncio.Semaphore(self.max_tool_concurrency)
+                    with tracing.start_span("agent_loop.step", "agent", {"iteration": step}):
+                        if stream is not None and self.pipeline:
+                            thought, actions, pending = await self._stream_step(step_message, stream, emit, step, limit)
+                        else:
+                            thought, actions, pending = await self._process_step(
+                                step_message, process, emit, step, limit
+                            )
+
+                        if not actions or (len(actions) == 1 and actions[0]["name"] == FINAL_ACTION):
+                            answer = answer_of(actions[0]) if actions else thought
+                            emit({"event": "final", "step": step, "message": answer, "reason": "answered"})
+                            return
+
+                        # `response_to_user` among other actions is executed like a tool, as in the client's loop
+                        results = []
+                        for action, task in zip(actions, pending):
+                            results.append(await task if task else await self._execute(action, emit, step, limit))
+                    content = format_results_message(results, message.content)
+
+                emit(
+                    {
+                        "event": "final",
+                        "step": step,
+                        "message": thought or "I could not complete your request within the step budget.",
+                        "reason": "max_steps",
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Agent loop failed at step {step}: {str(e)}", exc_info=True)
+                emit({"event": "error", "step": step, "error": str(e), "error_type": type(e).__name__})
+
+    async def _process_step(
+        self,
+        message: Message,
+        process: ProcessStep,
+        emit: Callable[[Dict[str, Any]], None],
+        step: int,
+        limit: asyncio.Semaphore,
+    ):
+        result = await process(message)
+        thought = result.get("thought") or ""
+        actions = normalize_actions(result)
+        emit({"event": "thought", "step": step, "thought": thought})
+        for action in actions:
+            emit({"event": "action", "step": step, "action": action})
+        if len(actions) == 1 and actions[0]["name"] == FINAL_ACTION:
+            return thought, actions, [None]
+        # The tools of a step run concurrently, so the step takes as long as its slowest tool
+        return thought, actions, [asyncio.create_task(self._execute(action, emit, step, limit)) for action in actions]
+
+    async def _stream_step(
+        self,
+        message: Message,
+        stream: StreamStep,
+        emit: Callable[[Dict[str, Any]], None],
+        step: int,
+        limit: asyncio.Semaphore,
+    ):
+        thought = ""
+        actions: List[Dict[str, Any]] = []
+        pending: List[Optional[asyncio.Task]] = []
+        try:
+            async for event in stream(message):
+                if event["event"] == "thought":
+                    thought = event["thought"] or ""
+                    emit({"event": "thought", "step": step, "thought": thought})
+                elif event["event"] == "answer_delta":
+                    emit({"event": "answer_delta", "step": step, "text": event["text"]})
+                elif event["event"] == "action":
+                    action = event["action"]
+                    actions.append(action)
+                    emit({"event": "action", "step": step, "action": action})
+                    # Whether `response_to_user` is the only action is known once the stream ends
+                    if action["name"] == FINAL_ACTION:
+                        pending.append(None)
+                    else:
+                        pending.append(asyncio.create_task(self._execute(action, emit, step, limit)))
+        except BaseException:
+            for task in pending:
+                if task:
+                    task.cancel()
+            raise
+        return thought, actions, pending
+
+    async def _execute(
+        self, action: Dict[str, Any], emit: Callable[[Dict[str, Any]], None], step: int, limit: asyncio.Semaphore
+    ):
+        tool_call = tool_call_of(action)
+        try:
+            async with limit:
+                result = await self.executor.execute(tool_call)
+        except Exception as e:
+            logger.error(f"Tool call {tool_call['type']} failed: {str(e)}")
+            result = {"type": tool_call["type"], "error": f"Error handling {tool_call['type']} tool call: {str(e)}"}
+        result.setdefault("type", tool_call["type"])
+        emit({"event": "tool_result", "step": step, "action": action, "result": result})
+        return result
@@ -0,0 +1,181 @@
+"""
+Per-user conversation memory for the agent service.
+
+Keeps the recent turns of each conversation so follow-up requests (including the steps of the
+client's agent loop) see what happened before, while bounding the prompt size: the oldest turns
+are compacted into a short extractive summary once the history exceeds its budget, so latency
+does not grow with conversation length.
+"""
+
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from src.common.cache import TTLCache
+
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def render_result(result: Dict[str, Any]) -> str:
+    """
+    Render a processed result as a compact assistant turn.
+
+    Args:
+        result: Result returned by a processor's `process_message`
+
+    Returns:
+        str: The thought followed by the requested actions, one line each
+    """
+    actions = []
+    for action in result.get("actions") or []:
+        argument = action.get("argument")
+        actions.append(f"Action: {action.get('name', '')}({argument if argument is not None else ''})")
+    # Code-action results carry every call in `calls` and the first one in `function`
+    for call in result.get("calls") or ([result["function"]] if result.get("function") else []):
+        params = ", ".join(f"{name}={value!r}" for name, value in (call.get("function_params") or {}).items())
+        actions.append(f"Action: {call.get('function_name', '')}({params})")
+    if not actions and result.get("message"):
+        # The raw message holds the answer, e.g. of a code-action "Answer:" reply
+        return str(result["message"])
+    thought = [f"Thought: {result['thought']}"] if result.get("thought") else []
+    return "\n".join(thought + actions)
+
+
+class Conversation:
+    """
+    History of one conversation: a compacted summary followed by the most recent turns.
+
+    The summary only changes when turns are compacted, so the prompt prefix stays stable
+    between compactions and backend prompt caches keep working.
+    """
+
+    def __init__(self):
+        self.summary = ""
+        self.turns: Deque[Dict[str, str]] = deque()
+        self.chars = 0
+        self.compactions = 0
+
+    def messages(self) -> List[Dict[str, str]]:
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"{SUMMARY_HEADER}\n{self.summary}"})
+        messages.extend(self.turns)
+        return messages
+
+
+class ConversationMemory:
+    """
+    Bounded per-session conversation store.
+
+    Attributes:
+        enabled: Whether history is recorded and fed to the processors
+        max_turns: Maximum number of messages kept verbatim per conversation
+        max_chars: Character budget of the verbatim messages; older messages are compacted beyond it
+        summary_chars: Maximum length of the compacted summary
+        snippet_chars: Maximum length of one compacted message in the summary
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_turns: int = 20,
+        max_chars: int = 6000,
+        summary_chars: int = 1500,
+        snippet_chars: int = 200,
+        max_conversations: int = 10000,
+        ttl: float = 3600.0,
+    ):
+        self.enabled = enabled
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.summary_chars = summary_chars
+        self.snippet_chars = snippet_chars
+        self._conversations = TTLCache(max_size=max_conversations, ttl=ttl)
+
+    @classmethod
+    def from_env(cls) -> "ConversationMemory":
+        """Build the memory from AGENT_MEMORY_* environment variables."""
+        return cls(
+            enabled=os.getenv("AGENT_MEMORY_ENABLED", "false").lower() == "true",
+            max_turns=int(os.getenv("AGENT_MEMORY_MAX_TURNS", "20")),
+            max_chars=int(os.getenv("AGENT_MEMORY_MAX_CHARS", "6000")),
+            summary_chars=int(os.getenv("AGENT_MEMORY_SUMMARY_CHARS", "1500")),
+            ttl=float(os.getenv("AGENT_MEMORY_TTL", "3600")),
+        )
+
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        """
+        Get the chat history of a conversation.
+
+        Args:
+            session_id: Conversation to look up
+
+        Returns:
+            List[Dict[str, str]]: The summary (if any) and recent turns as chat messages
+        """
+        conversation: Optional[Conversation] = self._conversations.get(session_id)
+        return conversation.messages() if conversation is not None else []
+
+    def append(self, session_id: str, user_content: str, result: Dict[str, Any]) -> None:
+        """
+        Record one exchange and compact the conversation if it exceeds its budget.
+
+        Args:
+            session_id: Conversation the exchange belongs to
+            user_content: Content of the user message
+            result: Processed result returned for it
+        """
+        conversation: Optional[Conversation] = self._conversations.get(session_id)
+        if conversation is None:
+            conversation = Conversation()
+        for turn in (
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": render_result(result)},
+        ):
+            conversation.turns.append(turn)
+            conversation.chars += len(turn["content"])
+        self._compact(conversation)
+        # Storing again refreshes the TTL and LRU position
+        self._conversations.set(session_id, conversation)
+
+    def clear(self, session_id: str) -> None:
+        """Forget a conversation."""
+        self._conversations.pop(session_id)
+
+    def _compact(self, conversation: Conversation) -> None:
+        compacted = []
+        # Always keep the latest exchange verbatim
+        while len(conversation.turns) > 2 and (
+            len(conversation.turns) > self.max_turns or conversation.chars > self.max_chars
+        ):
+            turn = conversation.turns.popleft()
+            conversation.chars -= len(turn["content"])
+            compacted.append(turn)
+        if not compacted:
+            return
+
+        conversation.compactions += 1
+        lines = [conversation.summary] if conversation.summary else []
+        lines.extend(f"- {turn['role']}: {self._snippet(turn['content'])}" for turn in compacted)
+        summary = "\n".join(lines)
+        if len(summary) > self.summary_chars:
+            # Keep the most recent part of the summary, starting at a line boundary
+            summary = summary[-self.summary_chars :]
+            summary = summary[summary.find("\n") + 1 :] if "\n" in summary else summary
+        conversation.summary = summary
+
+    def _snippet(self, content: str) -> str:
+        content = " ".join(content.split())
+        if len(content) <= self.snippet_chars:
+            return content
+        return content[: self.snippet_chars - 3] + "..."
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of stored conversations and the memory limits."""
+        return {
+            "enabled": self.enabled,
+            "conversations": len(self._conversations),
+            "max_turns": self.max_turns,
+            "max_chars": self.max_chars,
+            "summary_chars": self.summary_chars,
+        }
@@ -0,0 +1,86 @@
+"""
+Response cache for the agent service.
+
+Identical prompts sent to the same processor (for example the Telegram "Analyze market" button
+pressed by many users) are answered from memory instead of spending another completion.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from src.agent.llm.base_llm import BaseLLMProcessor
+from src.common.cache import TTLCache
+from src.common.interfaces import Message
+
+NO_CACHE_METADATA_KEY = "no_cache"
+"""Set `Message.metadata["no_cache"]` to a truthy value to bypass the cache for one request."""
+
+
+class LLMResponseCache:
+    """
+    LRU/TTL cache of processed LLM results keyed on the exact completion request.
+
+    The key is a hash of the processor type, the formatted message history (including any
+    conversation memory), the temperature and the model, so any change to the prompt or generation
+    settings results in a different entry.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, enabled: bool = True):
+        self.enabled = enabled
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """Build the cache from AGENT_CACHE_* environment variables."""
+        return cls(
+            max_size=int(os.getenv("AGENT_CACHE_MAX_SIZE", "1024")),
+            ttl=float(os.getenv("AGENT_CACHE_TTL", "300")),
+            enabled=os.getenv("AGENT_CACHE_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def make_key(
+        processor: BaseLLMProcessor, message: Message, chat_history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """
+        Compute the cache key of a request.
+
+        Args:
+            processor: Processor that will handle the message
+            message: The incoming message
+            chat_history: Conversation history sent along with the message
+
+        Returns:
+            str: Hex digest identifying the completion request
+        """
+        key_data = [
+            type(processor).__name__,
+            processor._format_message_history(message, chat_history),
+            processor.temperature,
+            processor.model,
+        ]
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def should_cache(self, message: Message) -> bool:
+        """Check whether the cache is enabled and the message did not opt out."""
+        return self.enabled and not message.metadata.get(NO_CACHE_METADATA_KEY)
+
+    @staticmethod
+    def is_cacheable(result: Dict[str, Any]) -> bool:
+        """Only keep results that carry actions; errors and parse failures are not cached."""
+        return bool(result.get("actions")) or bool(result.get("function"))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, or None on a miss."""
+        return self._cache.get(key)
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result if it is worth caching."""
+        if self.is_cacheable(result):
+            self._cache.set(key, result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and size of the cache."""
+        return {"enabled": self.enabled, **self._cache.stats()}
@@ -3,18 +3,33 @@ FastAPI server that handles LLM processing requests. This module provides endpoi
 for processing messages through different LLM processors and retrieving available LLM types.
 """
 
-from typing import Dict, Optional
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 
 from src.agent.llm.base_llm import BaseLLMProcessor
 from src.agent.llm.dummy_llm import DummyStockProcessor
+from src.agent.llm.http_client import LLMHttpClient
 from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.limiter import backend_limiters
+from src.agent.llm.resilience import backend_breakers
+from src.agent.llm.router import backend_routers
 from src.agent.llm.xml_llm import XmlProcessor
 from src.agent.llm.lmstudio_llm import LMStudioProcessor
+from src.agent.loop import AgentLoop, tool_executor_from_env
+from src.agent.memory import ConversationMemory
+from src.agent.response_cache import LLMResponseCache
+from src.agent.scheduler import INTERACTIVE, PRIORITY_CLASSES, AdmissionScheduler, QueueFullError
+from src.common import tracing
 from src.common.interfaces import Message
-
-app = FastAPI()
+from src.common.metrics import Gauge, Histogram, instrument_app
+from src.common.single_flight import SingleFlight
 
 # Registry mapping LLM types to their processor implementations
 llm_processors: Dict[str, BaseLLMProcessor] = {
@@ -24,6 +39,66 @@ llm_processors: Dict[str, BaseLLMProcessor] = {
     "xmlBasedLLM": XmlProcessor(),
 }
 
+# Cache of processed results for byte-identical requests
+response_cache = LLMResponseCache.from_env()
+
+# Concurrent identical requests share one in-flight completion
+request_coalescer = SingleFlight()
+coalescing_enabled = os.getenv("AGENT_COALESCING_ENABLED", "true").lower() == "true"
+
+# Admission control in front of the LLM backends (priority classes, fair share, bounded queues).
+# By default it admits as many requests as the backend limiters can grow to, so the limiters and
+# the router, not the scheduler, decide how much load each backend takes.
+scheduler = AdmissionScheduler.from_env(default_concurrency=backend_limiters.max_limit * len(backend_routers.urls))
+
+SCHEDULER_REQUESTS = Gauge(
+    "agent_scheduler_requests",
+    "Requests holding a scheduler slot (state=active) or waiting for one, per priority class",
+    ["state", "priority"],
+)
+SCHEDULER_REQUESTS.set_function(lambda: scheduler.stats()["active"], state="active", priority="all")
+for _priority in PRIORITY_CLASSES:
+    SCHEDULER_REQUESTS.set_function(
+        lambda priority=_priority: scheduler.stats()["classes"][priority]["queued"], state="queued", priority=_priority
+    )
+
+# Recent turns of each interactive conversation, fed back to the processors
+conversation_memory = ConversationMemory.from_env()
+
+# End-to-end latency of a message per processor, split by whether it was served from the cache
+PROCESSOR_DURATION = Histogram(
+    "agent_processor_duration_seconds",
+    "Latency of processing a message per LLM processor",
+    ["processor", "cached"],
+)
+
+# Server-side think → tools → think loop behind /run
+agent_loop = AgentLoop.from_env(tool_executor_from_env())
+
+# Maximum number of messages of one batch processed concurrently
+batch_concurrency = int(os.getenv("AGENT_BATCH_CONCURRENCY", "8"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: share one pooled HTTP client between all processors
+    http_client = LLMHttpClient()
+    for processor in llm_processors.values():
+        processor.http_client = http_client
+    health_checks = asyncio.create_task(backend_routers.run_health_checks(http_client))
+    yield
+    # Shutdown
+    health_checks.cancel()
+    await agent_loop.executor.close()
+    for processor in llm_processors.values():
+        processor.http_client = None
+    await http_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+instrument_app(app, "agent")
+tracing.trace_app(app, "agent")
+
 
 def get_llm_processor(llm_type: Optional[str] = None) -> BaseLLMProcessor:
     """
@@ -40,6 +115,93 @@ def get_llm_processor(llm_type: Optional[str] = None) -> BaseLLMProcessor:
     return llm_processors[llm_type]
 
 
+async def run_processor(processor: BaseLLMProcessor, message: Message) -> Dict[str, Any]:
+    """
+    Run a message through a processor, serving identical requests from the response cache.
+
+    Concurrent identical requests are coalesced so that only one completion is generated
+    and every waiter receives its result. The completion itself waits for a slot from the
+    admission scheduler according to the priority in `message.metadata`. Interactive requests
+    are sent with the conversation history of their session and recorded in it afterwards.
+
+    Args:
+        processor: The processor that handles the message
+        message: The Message object to process
+
+    Returns:
+        The processed result from the LLM
+    """
+    priority = scheduler.priority_of(message.metadata)
+    session_id = BaseLLMProcessor._session_id(message)
+    # Background work (news fan-out) neither reads nor pollutes the user's conversation
+    use_memory = conversation_memory.enabled and priority == INTERACTIVE
+    chat_history = conversation_memory.history(session_id) if use_memory else None
+
+    # Batched messages continue the trace of the request they were sent for
+    parent = tracing.resume(message.metadata)
+    attributes = {"processor": type(processor).__name__, "priority": priority}
+    with tracing.start_span("agent.process", "agent", attributes, parent=parent) as span:
+        started = time.perf_counter()
+        key = response_cache.make_key(processor, message, chat_history)
+        use_cache = response_cache.should_cache(message)
+        result = response_cache.get(key) if use_cache else None
+        cached = result is not None
+        span.set_attribute("cached", cached)
+
+        if result is None:
+
+            async def admitted_call() -> Dict[str, Any]:
+                async with scheduler.slot(priority, message.user_id):
+                    return await processor.process_message(message, chat_history)
+
+            if coalescing_enabled:
+                result = await request_coalescer.do(key, admitted_call)
+            else:
+                result = await admitted_call()
+
+            if use_cache:
+                response_cache.set(key, result)
+
+        PROCESSOR_DURATION.labels(processor=type(processor).__name__, cached=str(cached).lower()).observe(
+            time.perf_counter() - started
+        )
+    if use_memory:
+        conversation_memory.append(session_id, message.content, result)
+    return result
+
+
+async def stream_processor(processor: BaseLLMProcessor, message: Message) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the thought and actions of a processor's completion as they are generated.
+
+    Like `run_processor`, the completion waits for an admission scheduler slot and interactive
+    requests are sent with, and recorded in, the conversation history of their session.
+
+    Args:
+        processor: A processor with `stream_actions`
+        message: The Message object to process
+
+    Yields:
+        Dict[str, Any]: {"event": "thought" | "action" | "answer_delta", ...} events
+    """
+    priority = scheduler.priority_of(message.metadata)
+    session_id = BaseLLMProcessor._session_id(message)
+    use_memory = conversation_memory.enabled and priority == INTERACTIVE
+    chat_history = conversation_memory.history(session_id) if use_memory else None
+
+    result: Dict[str, Any] = {"thought": None, "actions": []}
+    async with scheduler.slot(priority, message.user_id):
+        async for event in processor.stream_actions(message, chat_history=chat_history):
+            if event["event"] == "thought":
+                result["thought"] = event["thought"]
+            elif event["event"] == "action":
+                result["actions"].append(event["action"])
+            yield event
+
+    if use_memory:
+        conversation_memory.append(session_id, message.content, result)
+
+
 @app.post("/process")
 async def process_message(message: Message):
     """
@@ -52,17 +214,153 @@ async def process_message(message: Message):
         The processed result from the LLM
 
     Raises:
-        HTTPException: If processing fails
+        HTTPException: 429 if the admission queue is full, 500 if processing fails
     """
     try:
         processor = get_llm_processor(message.llm_type)
-        result = await processor.process_message(message)
+        result = await run_processor(processor, message)
         return result
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/process_batch")
+async def process_batch(messages: List[Message]):
+    """
+    Process a batch of messages with a bounded concurrency window.
+
+    Each message is routed to the processor named by its own `llm_type`. A failing item does not
+    fail the batch; its slot in the response carries an error instead of a result.
+
+    Args:
+        messages: The Message objects to process
+
+    Returns:
+        Dict with a `results` list in request order, each item either {"result": ...} or {"error": ...}
+    """
+    semaphore = asyncio.Semaphore(batch_concurrency)
+
+    async def process_item(message: Message) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                processor = get_llm_processor(message.llm_type)
+                return {"result": await run_processor(processor, message)}
+            except Exception as e:
+                return {"error": str(e)}
+
+    results = await asyncio.gather(*(process_item(message) for message in messages))
+    return {"results": results}
+
+
+@app.post("/run")
+async def run_agent(message: Message, stream: bool = False):
+    """
+    Run the whole think → tools → think loop for a message in the agent service.
+
+    Tools are executed through the configured tool executor (the client's `/tool_call` endpoint
+    by default). Processors that stream actions start each tool call as soon as its action has
+    been generated.
+
+    Args:
+        message: The user's message
+        stream: Return the step log as newline-delimited JSON events while the loop runs
+
+    Returns:
+        The final answer with the number of steps and the step log, or a stream of step events
+
+    Raises:
+        HTTPException: 429 if the admission queue is full, 500 if the loop fails
+    """
+    processor = get_llm_processor(message.llm_type)
+
+    async def process(step_message: Message) -> Dict[str, Any]:
+        return await run_processor(processor, step_message)
+
+    stream_step = None
+    if hasattr(processor, "stream_actions"):
+
+        def stream_step(step_message: Message) -> AsyncIterator[Dict[str, Any]]:
+            return stream_processor(processor, step_message)
+
+    if stream:
+        events = agent_loop.run(message, process, stream_step)
+        return StreamingResponse(
+            (json.dumps(event) + "\n" async for event in events), media_type="application/x-ndjson"
+        )
+
+    log = await agent_loop.run_to_completion(message, process, stream_step)
+    final = log[-1]
+    if final["event"] == "error":
+        status_code = 429 if final["error_type"] == QueueFullError.__name__ else 500
+        raise HTTPException(status_code=status_code, detail=final["error"])
+    return {"message": final["message"], "steps": final["step"], "reason": final["reason"], "log": log}
+
+
 @app.get("/available-llms")
 async def get_available_llms():
     """Get list of available LLM processor types."""
     return {"available_llms": list(llm_processors.keys())}
+
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Get response cache counters and the number of coalesced requests."""
+    return {"cache": response_cache.stats(), "coalescing": request_coalescer.stats()}
+
+
+@app.get("/memory-stats")
+async def get_memory_stats():
+    """Get the number of stored conversations and the memory limits."""
+    return conversation_memory.stats()
+
+
+@app.delete("/memory/{session_id}")
+async def clear_memory(session_id: str):
+    """Forget the conversation history of a session (by default the user id)."""
+    conversation_memory.clear(session_id)
+    return {"status": "cleared"}
+
+
+@app.get("/scheduler-stats")
+async def get_scheduler_stats():
+    """Get active slots, queue depths and queue-wait times per priority class."""
+    return scheduler.stats()
+
+
+@app.get("/limits")
+async def get_limits():
+    """Get the adaptive concurrency limit, in-flight count and measured RTT of each LLM backend."""
+    return backend_limiters.stats()
+
+
+@app.get("/hedging")
+async def get_hedging():
+    """Get hedge rate, win rate and extra backend load of each processor that hedges completions."""
+    return {name: processor.hedging.stats() for name, processor in llm_processors.items() if processor.hedging}
+
+
+@app.get("/generation-budget")
+async def get_generation_budget():
+    """Get the adaptive max_tokens and completion length percentiles per action type of each processor."""
+    return {
+        name: processor.generation_budget.stats()
+        for name, processor in llm_processors.items()
+        if processor.generation_budget
+    }
+
+
+@app.get("/resilience")
+async def get_resilience():
+    """Get retry counters per processor, circuit breaker state per backend and recent breaker transitions."""
+    retries = {
+        name: processor.retry_policy.stats() for name, processor in llm_processors.items() if processor.retry_policy
+    }
+    return {"retries": retries, **backend_breakers.stats()}
+
+
+@app.get("/backends")
+async def get_backends():
+    """Get the health, outstanding requests and measured latency of each routed LLM backend."""
+    return backend_routers.stats()
@@ -0,0 +1,187 @@
+"""
+Priority-aware admission control for LLM work in the agent service.
+
+Interactive requests (users pressing buttons) are admitted before background work (news
+fan-out), users within a priority class are served round-robin, and queues are bounded so
+overload is rejected quickly instead of piling up.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND)
+"""Priority classes, from highest to lowest."""
+
+
+class QueueFullError(Exception):
+    """Raised when a priority class has reached its queue depth limit."""
+
+
+class AdmissionScheduler:
+    """
+    Bounded-concurrency scheduler with strict priority classes and per-user fair share.
+
+    At most `max_concurrency` requests hold a slot at once. Waiting requests are granted slots
+    by priority class first; within a class the users with waiting requests take turns, so a
+    single user (or the news loop) flooding the queue cannot starve the others.
+
+    Attributes:
+        max_concurrency: Number of requests allowed to run at the same time
+        max_queue_depth: Maximum number of waiting requests per priority class
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue_depth: Optional[Dict[str, int]] = None, window: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth or {INTERACTIVE: 100, BACKGROUND: 1000}
+        self._active = 0
+        # Per class: user_id -> FIFO of (future, enqueue time); dict order is the round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[Tuple[asyncio.Future, float]]]"] = {
+            priority: OrderedDict() for priority in PRIORITY_CLASSES
+        }
+        self._depth = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._admitted = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._rejected = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._wait_times: Dict[str, Deque[float]] = {priority: deque(maxlen=window) for priority in PRIORITY_CLASSES}
+
+    @classmethod
+    def from_env(cls, default_concurrency: int = 4) -> "AdmissionScheduler":
+        """
+        Build the scheduler from AGENT_MAX_CONCURRENCY and AGENT_QUEUE_DEPTH_* environment variables.
+
+        Args:
+            default_concurrency: Concurrency used when AGENT_MAX_CONCURRENCY is not set
+        """
+        return cls(
+            max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", str(default_concurrency))),
+            max_queue_depth={
+                INTERACTIVE: int(os.getenv("AGENT_QUEUE_DEPTH_INTERACTIVE", "100")),
+                BACKGROUND: int(os.getenv("AGENT_QUEUE_DEPTH_BACKGROUND", "1000")),
+            },
+        )
+
+    @staticmethod
+    def priority_of(metadata: Dict[str, Any]) -> str:
+        """Read the priority class from message metadata, defaulting to interactive."""
+        priority = metadata.get("priority", INTERACTIVE)
+        return priority if priority in PRIORITY_CLASSES else INTERACTIVE
+
+    @asynccontextmanager
+    async def slot(self, priority: str, user_id: str) -> AsyncIterator[None]:
+        """
+        Hold an execution slot for the duration of the block.
+
+        Args:
+            priority: Priority class of the request
+            user_id: User the request belongs to, used for fair share within the class
+
+        Raises:
+            QueueFullError: If the request would have to wait and its class queue is full
+        """
+        await self._acquire(priority, user_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: str, user_id: str) -> None:
+        if self._active < self.max_concurrency and not any(self._depth.values()):
+            self._active += 1
+            self._record_admission(priority, 0.0)
+            return
+
+        if self._depth[priority] >= self.max_queue_depth[priority]:
+            self._rejected[priority] += 1
+            raise QueueFullError(f"The {priority} queue is full ({self._depth[priority]} waiting requests)")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(user_id, deque()).append((future, time.monotonic()))
+        self._depth[priority] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted right before cancellation; hand it on
+                self._release()
+            else:
+                self._remove_waiter(priority, user_id, future)
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            priority, future, enqueued_at = waiter
+            self._active += 1
+            self._record_admission(priority, time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _next_waiter(self) -> Optional[Tuple[str, asyncio.Future, float]]:
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            while queue:
+                user_id, waiters = next(iter(queue.items()))
+                future, enqueued_at = waiters.popleft()
+                self._depth[priority] -= 1
+                if waiters:
+                    # Round-robin: the user goes to the back of the line
+                    queue.move_to_end(user_id)
+                else:
+                    del queue[user_id]
+                if not future.done():
+                    return priority, future, enqueued_at
+        return None
+
+    def _remove_waiter(self, priority: str, user_id: str, future: asyncio.Future) -> None:
+        waiters = self._queues[priority].get(user_id)
+        if not waiters:
+            return
+        for entry in waiters:
+            if entry[0] is future:
+                waiters.remove(entry)
+                self._depth[priority] -= 1
+                break
+        if not waiters:
+            del self._queues[priority][user_id]
+
+    def _record_admission(self, priority: str, wait_time: float) -> None:
+        self._admitted[priority] += 1
+        self._wait_times[priority].append(wait_time)
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slot usage, queue depths and queue-wait percentiles per priority class."""
+        classes = {}
+        for priority in PRIORITY_CLASSES:
+            waits = list(self._wait_times[priority])
+            classes[priority] = {
+                "queued": self._depth[priority],
+                "max_queue_depth": self.max_queue_depth[priority],
+                "admitted": self._admitted[priority],
+                "rejected": self._rejected[priority],
+                "wait_p50": self._percentile(waits, 50),
+                "wait_p95": self._percentile(waits, 95),
+                "wait_p99": self._percentile(waits, 99),
+                "wait_max": max(waits, default=0.0),
+            }
+        return {"active": self._active, "max_concurrency": self.max_concurrency, "classes": classes}
@@ -1,12 +1,15 @@
+import argparse
 import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Set
+from typing import Any, Dict, Optional, Set
 
 import pandas as pd
 
+from src.agent.llm.constrained import DecodingConstraints
 from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.parsing import PARSE_ERROR_PREFIX
 from src.benchmark.data_loader import BenchmarkDataLoader
 from src.common.interfaces import Message
 
@@ -14,10 +17,17 @@ logger = logging.getLogger(__name__)
 
 
 class BenchmarkRunner:
-    def __init__(self):
-        """Initialize the benchmark runner with data loader and LLM processor."""
+    def __init__(self, constrained: bool = False, llm_url: Optional[str] = None):
+        """Initialize the benchmark runner with data loader and LLM processor.
+
+        Args:
+            constrained (bool): Send the response JSON schema with each completion (constrained decoding)
+            llm_url (str, optional): Backend to benchmark, e.g. a local stub. If None, uses LLM_API_URL.
+        """
         self.data_loader = BenchmarkDataLoader()
         self.llm = JsonProcessor()
+        if llm_url:
+            self.llm.base_url = llm_url
 
         # Load company mappings
         mapping_path = Path(__file__).parent / "companies_mapping.csv"
@@ -26,6 +36,29 @@ class BenchmarkRunner:
 
         # Create mapping string for prompt
         self.mapping_text = self._create_mapping_text()
+        self.llm.constraints = DecodingConstraints.for_json(self._response_schema()) if constrained else None
+
+    def _response_schema(self) -> Dict[str, Any]:
+        """Create the JSON schema of the expected response, restricted to the known company tags.
+
+        Returns:
+            Dict[str, Any]: JSON schema of the response object
+        """
+        action = {
+            "type": "object",
+            "properties": {
+                "action": {"const": "identify_symbols"},
+                "symbols": {"type": "array", "items": {"enum": sorted(self.company_tags)}},
+            },
+            "required": ["action", "symbols"],
+            "additionalProperties": False,
+        }
+        return {
+            "type": "object",
+            "properties": {"thought": {"type": "string"}, "actions": {"type": "array", "items": action}},
+            "required": ["thought", "actions"],
+            "additionalProperties": False,
+        }
 
     def _create_mapping_text(self) -> str:
         """Create a formatted string of company mappings for the prompt.
@@ -35,7 +68,7 @@ class BenchmarkRunner:
         """
         mapping_lines = []
         for _, row in self.company_data.iterrows():
-            mapping_lines.append(f"{row['name']}: {row['tag']}")
+            mapping_lines.append(f"{row['tag']}: {row['description']}")
         return "\n".join(mapping_lines)
 
     def _create_prompt(self, news_item: Dict) -> str:
@@ -119,14 +152,17 @@ Provide your response in the following JSON format:
             Dict: Benchmark results
         """
         results = []
+        parse_failures = 0
         sample_data = self.data_loader.data.sample(n=num_samples)
 
         for _, news_item in sample_data.iterrows():
             try:
                 # Create and process prompt
                 prompt = self._create_prompt(news_item)
-                message = Message(content=prompt)
+                message = Message(content=prompt, user_id="benchmark")
                 response = await self.llm.process_message(message)
+                if response.get("thought", "").startswith(PARSE_ERROR_PREFIX):
+                    parse_failures += 1
 
                 # Extract predicted symbols
                 predicted_symbols = set()
@@ -164,6 +200,8 @@ Provide your response in the following JSON format:
             "recall": sum(r["recall"] for r in results) / len(results),
             "f1": sum(r["f1"] for r in results) / len(results),
             "total_samples": len(results),
+            "parse_failures": parse_failures,
+            "parse_failure_rate": parse_failures / len(results),
         }
 
         return {"individual_results": results, "aggregate_metrics": aggregate_metrics}
@@ -171,8 +209,14 @@ Provide your response in the following JSON format:
 
 async def main():
     """Run the benchmark and print results."""
-    benchmark = BenchmarkRunner()
-    results = await benchmark.run_benchmark(num_samples=10)
+    parser = argparse.ArgumentParser(description="Benchmark symbol identification on the news dataset")
+    parser.add_argument("--samples", type=int, default=10, help="Number of news items to test")
+    parser.add_argument("--constrained", action="store_true", help="Use schema-constrained decoding")
+    parser.add_argument("--llm-url", help="Backend to benchmark, e.g. a local stub (default: LLM_API_URL)")
+    args = parser.parse_args()
+
+    benchmark = BenchmarkRunner(constrained=args.constrained, llm_url=args.llm_url)
+    results = await benchmark.run_benchmark(num_samples=args.samples)
 
     # Print results to console
     print("\nBenchmark Results:")
@@ -182,6 +226,7 @@ async def main():
     print(f"Recall: {results['aggregate_metrics']['recall']:.3f}")
     print(f"F1 Score: {results['aggregate_metrics']['f1']:.3f}")
     print(f"Total Samples: {results['aggregate_metrics']['total_samples']}")
+    print(f"Parse Failure Rate: {results['aggregate_metrics']['parse_failure_rate']:.1%}")
 
     print("\nDetailed Results:")
     for result in results["individual_results"]:
@@ -208,7 +253,8 @@ async def main():
         f.write(f"| Precision | {results['aggregate_metrics']['precision']:.3f} |\n")
         f.write(f"| Recall | {results['aggregate_metrics']['recall']:.3f} |\n")
         f.write(f"| F1 Score | {results['aggregate_metrics']['f1']:.3f} |\n")
-        f.write(f"| Total Samples | {results['aggregate_metrics']['total_samples']} |\n\n")
+        f.write(f"| Total Samples | {results['aggregate_metrics']['total_samples']} |\n")
+        f.write(f"| Parse Failure Rate | {results['aggregate_metrics']['parse_failure_rate']:.1%} |\n\n")
 
         # Write detailed results
         f.write("## Detailed Results\n\n")
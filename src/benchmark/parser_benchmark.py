@@ -0,0 +1,208 @@
+"""
+Microbenchmark of the LLM response parsers.
+
+Builds a deterministic fuzzed corpus of well-formed and malformed model outputs for every response
+format (XML, JSON, code actions) and measures parses per second and the parse-failure rate.
+
+Usage:
+    python -m src.benchmark.parser_benchmark --samples 500 --seed 0 --min-time 1.0
+"""
+
+import argparse
+import inspect
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from src.agent.llm.parsing import ParsedResponse, parse_code_action, parse_json_response, parse_xml_response
+from src.agent.planning.prompts.mock_functions import MOCK_FUNCTIONS
+
+TOOLS = ["get_coin_price", "get_coin_history", "get_stock_price", "get_stock_history", "get_coin_news"]
+NO_ARGUMENT_TOOLS = ["get_news", "get_market_news"]
+SYMBOLS = ["BTC", "ETH", "SOL", "AAPL", "TSLA", "NVDA", "MSFT"]
+THOUGHTS = [
+    "The user wants the current price of {symbol}.",
+    "I should check recent news before recommending {symbol}.",
+    "Comparing {symbol} with the overall market needs price history and news.",
+    "The data is collected; I can answer the user about {symbol} now.",
+]
+
+SIGNATURES = {func.__name__: list(inspect.signature(func).parameters) for func in MOCK_FUNCTIONS}
+
+
+def _random_actions(rng: random.Random) -> List[Dict[str, str]]:
+    actions = []
+    for _ in range(rng.randint(1, 4)):
+        if rng.random() < 0.25:
+            actions.append({"name": rng.choice(NO_ARGUMENT_TOOLS)})
+        else:
+            actions.append({"name": rng.choice(TOOLS), "argument": rng.choice(SYMBOLS)})
+    if rng.random() < 0.3:
+        actions = [{"name": "response_to_user", "argument": f"{rng.choice(SYMBOLS)} looks stable today."}]
+    return actions
+
+
+def _thought(rng: random.Random) -> str:
+    thought = rng.choice(THOUGHTS).format(symbol=rng.choice(SYMBOLS))
+    if rng.random() < 0.1:
+        thought = " ".join([thought] * rng.randint(10, 50))
+    return thought
+
+
+def xml_sample(rng: random.Random) -> str:
+    actions = "".join(
+        "\n        <action>\n            <name>{}</name>{}\n        </action>".format(
+            action["name"], f"\n            <argument>{action['argument']}</argument>" if "argument" in action else ""
+        )
+        for action in _random_actions(rng)
+    )
+    return f"<response>\n    <thought>{_thought(rng)}</thought>\n    <actions>{actions}\n    </actions>\n</response>"
+
+
+def json_sample(rng: random.Random) -> str:
+    body = json.dumps({"thought": _thought(rng), "actions": _random_actions(rng)}, indent=rng.choice([None, 2, 4]))
+    return f"```json\n{body}\n```" if rng.random() < 0.5 else body
+
+
+def code_sample(rng: random.Random) -> str:
+    calls = []
+    for _ in range(rng.randint(1, 3)):
+        symbol = rng.choice(SYMBOLS)
+        calls.append(
+            rng.choice(
+                [
+                    f'get_stock_price("{symbol}")',
+                    f'analyze_news("{symbol}", days={rng.randint(1, 30)})',
+                    f'get_market_analysis(symbol="{symbol}")',
+                    f'get_investment_recommendation({{"{symbol}": {rng.randint(1, 100)}}})',
+                ]
+            )
+        )
+    return "Thought: {}\nAction:\n{}\nEnd Action".format(_thought(rng), "\n".join(calls))
+
+
+def mutate(sample: str, rng: random.Random) -> str:
+    """Apply one of the failure modes seen in real model output."""
+    mutation = rng.randrange(8)
+    if mutation == 0:
+        # Generation cut off (max_tokens reached)
+        return sample[: rng.randint(0, max(0, len(sample) - 1))]
+    if mutation == 1:
+        return "Sure! Here is my answer:\n" + sample + "\nLet me know if you need anything else."
+    if mutation == 2:
+        # Random characters dropped
+        chars = list(sample)
+        for _ in range(rng.randint(1, 5)):
+            if chars:
+                del chars[rng.randrange(len(chars))]
+        return "".join(chars)
+    if mutation == 3:
+        return sample.replace('"', "'")
+    if mutation == 4:
+        return sample + "\n" + sample
+    if mutation == 5:
+        return sample.replace("BTC", "BTC & <ETH>")
+    if mutation == 6:
+        return "I cannot help with that request."
+    return sample.upper()
+
+
+GENERATORS: Dict[str, Callable[[random.Random], str]] = {
+    "xml": xml_sample,
+    "json": json_sample,
+    "code": code_sample,
+}
+
+PARSERS: Dict[str, Callable[[str], ParsedResponse]] = {
+    "xml": parse_xml_response,
+    "json": parse_json_response,
+    "code": lambda content: parse_code_action(content, SIGNATURES),
+}
+
+
+def is_failure(response_format: str, parsed: ParsedResponse) -> bool:
+    """A parse fails if it reports an error or, for code actions, finds no call."""
+    if response_format == "code":
+        return not parsed.calls
+    return parsed.error is not None
+
+
+def build_corpus(samples: int = 500, seed: int = 0, malformed_ratio: float = 0.4) -> Dict[str, List[str]]:
+    """
+    Build the fuzzed corpus.
+
+    Args:
+        samples: Number of outputs per format
+        seed: Random seed, so runs are comparable
+        malformed_ratio: Share of outputs passed through a mutation
+
+    Returns:
+        Dict[str, List[str]]: Model outputs keyed by response format
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    for response_format, generate in GENERATORS.items():
+        outputs = []
+        for _ in range(samples):
+            sample = generate(rng)
+            outputs.append(mutate(sample, rng) if rng.random() < malformed_ratio else sample)
+        corpus[response_format] = outputs
+    return corpus
+
+
+def benchmark_parser(response_format: str, outputs: List[str], min_time: float = 1.0) -> Dict[str, float]:
+    """
+    Measure one parser on a list of outputs.
+
+    Args:
+        response_format: Key of the parser in PARSERS
+        outputs: Model outputs to parse
+        min_time: Minimum measuring time in seconds; the corpus is parsed repeatedly until reached
+
+    Returns:
+        Dict[str, float]: Parses per second, microseconds per parse and failure rate
+    """
+    parse = PARSERS[response_format]
+    failures = sum(is_failure(response_format, parse(output)) for output in outputs)
+
+    parses = 0
+    started = time.perf_counter()
+    while True:
+        for output in outputs:
+            parse(output)
+        parses += len(outputs)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+
+    return {
+        "samples": len(outputs),
+        "parses_per_sec": parses / elapsed,
+        "us_per_parse": elapsed / parses * 1e6,
+        "failure_rate": failures / len(outputs) if outputs else 0.0,
+    }
+
+
+def run(samples: int = 500, seed: int = 0, min_time: float = 1.0) -> Dict[str, Dict[str, float]]:
+    """Benchmark every parser on the fuzzed corpus."""
+    corpus = build_corpus(samples=samples, seed=seed)
+    return {name: benchmark_parser(name, outputs, min_time) for name, outputs in corpus.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM response parsers")
+    parser.add_argument("--samples", type=int, default=500, help="Outputs per format")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to measure each parser")
+    args = parser.parse_args()
+
+    results = run(samples=args.samples, seed=args.seed, min_time=args.min_time)
+
+    print(f"{'format':<8}{'parses/sec':>14}{'us/parse':>12}{'failure rate':>15}")
+    for name, stats in results.items():
+        print(f"{name:<8}{stats['parses_per_sec']:>14,.0f}{stats['us_per_parse']:>12.1f}{stats['failure_rate']:>15.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,33 @@
 import asyncio
+import json
 import logging
 import os
 from contextlib import asynccontextmanager
-from typing import Any, Dict, List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from rank_bm25 import BM25Okapi
 from tortoise import Tortoise
 
-from src.client.services import (
-    AgentServiceConnector,
-    TelegramServiceConnector,
-    ToolCallHandler,
-)
+from src.client.service.http_client import close_shared_http_client
+from src.client.services import AgentServiceConnector, TelegramServiceConnector, ToolCallHandler
+from src.common import tracing
 from src.common.interfaces import Message
+from src.common.metrics import Histogram, instrument_app
 from src.common.models import User
+from src.common.tool_results import format_results_message
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AGENT_LOOP_ITERATIONS = Histogram(
+    "agent_loop_iterations",
+    "Agent calls needed to answer a user message",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10),
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -29,9 +37,12 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     await Tortoise.close_connections()
+    await close_shared_http_client()
 
 
 app = FastAPI(lifespan=lifespan)
+instrument_app(app, "client")
+tracing.trace_app(app, "client")
 
 # Tortoise ORM config
 TORTOISE_ORM = {
@@ -56,6 +67,11 @@ TORTOISE_ORM = {
 }
 
 
+def _db_span(operation: str):
+    """Span of a Postgres query, so traces show time spent in the database."""
+    return tracing.start_span(f"db.{operation}", "db", {"peer": "postgres"})
+
+
 class ClientService:
     """Main service class handling client-side operations including message processing and news monitoring.
 
@@ -72,6 +88,8 @@ class ClientService:
         self.logger = logging.getLogger(__name__)
         self.last_news_state = None
         self.news_strategy = os.getenv("NEWS_STRATEGY", "original")
+        self.news_batch_size = int(os.getenv("NEWS_BATCH_SIZE", "32"))
+        self.agent_loop_mode = os.getenv("AGENT_LOOP_MODE", "client")
 
         # Initialize Tortoise-ORM
         asyncio.create_task(self.init_db())
@@ -85,17 +103,6 @@ class ClientService:
             self.logger.error(f"Failed to initialize database connection: {str(e)}")
             raise
 
-    def _format_results_message(self, results: list, original_message: str) -> str:
-        """Format results into a human-readable message for the agent."""
-        results_text = "\n".join(f"- For action '{result.get('type', 'unknown')}': {result}" for result in results)
-
-        return (
-            f"I've gathered the information you requested. Here are the results:\n\n"
-            f"{results_text}\n\n"
-            f"Given this information, please provide a response to the user's original message: "
-            f"'{original_message}'"
-        )
-
     async def process_message(self, message: Message) -> Dict[str, Any]:
         """Process incoming user messages and route them to appropriate handlers.
 
@@ -111,7 +118,8 @@ class ClientService:
         self.logger.info(f"Processing message: {message}")
         try:
             # Fetch user data for context
-            user, _ = await User.get_or_create(telegram_id=message.user_id)
+            with _db_span("get_or_create_user"):
+                user, _ = await User.get_or_create(telegram_id=message.user_id)
 
             # Check if message is portfolio-related
             if "update portfolio" in message.content.lower():
@@ -133,6 +141,49 @@ class ClientService:
             self.logger.error(f"Error processing message: {str(e)}")
             raise
 
+    async def process_message_stream(self, message: Message) -> AsyncIterator[Dict[str, Any]]:
+        """Process a message like `process_message`, yielding progress events while the agent works.
+
+        Agent requests run through the agent service's streaming `/run` endpoint, so thoughts, tool
+        calls and the answer text arrive as they are generated. Portfolio requests yield their answer
+        directly.
+
+        Args:
+            message: Message object containing user input and metadata
+
+        Yields:
+            Agent loop events; the last one is {"event": "final", "message": ...} or {"event": "error", ...}
+        """
+        self.logger.info(f"Streaming message: {message}")
+        try:
+            with _db_span("get_or_create_user"):
+                user, _ = await User.get_or_create(telegram_id=message.user_id)
+
+            if "update portfolio" in message.content.lower():
+                yield {"event": "final", **await self.update_portfolio(message)}
+                return
+            if "portfolio" in message.content.lower():
+                yield {"event": "final", **await self.check_portfolio(message)}
+                return
+
+            current_context = {
+                "content": message.content,
+                "user_id": message.user_id,
+                "llm_type": message.llm_type,
+                "metadata": message.metadata,
+                "portfolio": user.portfolio,
+            }
+            self._add_portfolio_context(current_context)
+
+            async for event in self.agent_connector.stream_request("run", current_context):
+                if event.get("event") == "final":
+                    AGENT_LOOP_ITERATIONS.observe(event.get("step", 1))
+                yield event
+
+        except Exception as e:
+            self.logger.error(f"Error streaming message: {str(e)}", exc_info=True)
+            yield {"event": "error", "error": "An error occurred while processing your message"}
+
     async def check_portfolio(self, message: Message) -> Dict[str, Any]:
         """Retrieve user's portfolio preferences from database.
 
@@ -146,7 +197,8 @@ class ClientService:
 
         try:
             # Fetch user preferences using Tortoise-ORM
-            user, created = await User.get_or_create(telegram_id=message.user_id)
+            with _db_span("get_or_create_user"):
+                user, created = await User.get_or_create(telegram_id=message.user_id)
 
             if created:
                 self.logger.info(f"Created new user entry for user_id: {message.user_id}")
@@ -169,13 +221,15 @@ class ClientService:
 
         try:
             # Update user preferences using Tortoise-ORM
-            user, created = await User.get_or_create(telegram_id=message.user_id)
+            with _db_span("get_or_create_user"):
+                user, created = await User.get_or_create(telegram_id=message.user_id)
 
             if created:
                 self.logger.info(f"Created new user entry for user_id: {message.user_id}")
 
             user.portfolio = [item.strip() for item in message.content.split("[")[1].split("]")[0].split(",")]
-            await user.save()
+            with _db_span("save_user"):
+                await user.save()
 
             self.logger.info(f"Updated portfolio for user_id: {message.user_id}")
 
@@ -189,60 +243,101 @@ class ClientService:
             }
 
     async def call_llm_agent(self, current_context: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle the LLM agent interaction flow."""
-        while True:
-            # Enhance the prompt with portfolio context if available
-            if current_context.get("portfolio"):
-                portfolio_context = (
-                    f"\nContext: The user's current portfolio contains: {', '.join(current_context['portfolio'])}. "
-                    "Please consider their existing investments when providing recommendations."
-                )
-                if isinstance(current_context["content"], str):
-                    current_context["content"] += portfolio_context
-
-            # Get next action from agent
-            response = await self.agent_connector.send_request("process", current_context)
-            self.logger.info(f"Received response from agent: {response}")
-
-            if not isinstance(response, dict):
-                return {"error": "Invalid response format from agent"}
-
-            thought = response.get("thought", "")
-            actions = response.get("actions", [])
-
-            # If no actions or response_to_user, return the thought to user
-            if not actions or (len(actions) == 1 and actions[0]["name"] == "response_to_user"):
-                if actions and actions[0]["name"] == "response_to_user":
-                    return {"message": actions[0].get("argument", "")}
-                return {"message": thought}
-
-            # Execute the actions and collect results
-            results = []
-            for action in actions:
-                tool_call = {
-                    "type": action["name"],
-                    **(
-                        action.get("argument", {})
-                        if isinstance(action.get("argument"), dict)
-                        else {"coin_symbol": action.get("argument", "")}
-                    ),
-                }
-                result = await self.tool_handler.handle(tool_call)
-                results.append(result)
-
-            # Create human-readable message with results
-            results_message = self._format_results_message(
-                results=results,
-                original_message=current_context["content"],
+        """Handle the LLM agent interaction flow.
+
+        With `AGENT_LOOP_MODE=server` the whole loop runs in the agent service's `/run` endpoint,
+        which calls back the `/tool_call` endpoint for tools; otherwise each step is a `/process`
+        request and tools run here.
+        """
+        self._add_portfolio_context(current_context)
+
+        if self.agent_loop_mode == "server":
+            return await self._run_server_side(current_context)
+
+        iterations = 0
+        try:
+            while True:
+                iterations += 1
+                with tracing.start_span("agent_loop.step", "agent", {"iteration": iterations}):
+                    response, current_context = await self._agent_step(current_context)
+                if response is not None:
+                    return response
+        finally:
+            AGENT_LOOP_ITERATIONS.observe(iterations)
+
+    @staticmethod
+    def _add_portfolio_context(current_context: Dict[str, Any]) -> None:
+        """Enhance the prompt with portfolio context if available."""
+        if current_context.get("portfolio"):
+            portfolio_context = (
+                f"\nContext: The user's current portfolio contains: {', '.join(current_context['portfolio'])}. "
+                "Please consider their existing investments when providing recommendations."
             )
+            if isinstance(current_context["content"], str):
+                current_context["content"] += portfolio_context
 
-            # Update context with results for next iteration
-            current_context = {
-                "content": results_message,
-                "user_id": current_context["user_id"],
-                "llm_type": current_context["llm_type"],
-                "metadata": current_context["metadata"],
+    async def _run_server_side(self, current_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the agent loop in the agent service and return its final answer."""
+        response = await self.agent_connector.send_request("run", current_context)
+        self.logger.info(f"Received response from agent loop: {response}")
+
+        if not isinstance(response, dict) or "message" not in response:
+            return {"error": "Invalid response format from agent"}
+        AGENT_LOOP_ITERATIONS.observe(response.get("steps", 1))
+        return {"message": response["message"]}
+
+    async def _agent_step(
+        self, current_context: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Run one step of the agent loop: get the next actions from the agent and execute them.
+
+        Returns:
+            The response for the user and None once the agent has answered, otherwise None and
+            the context of the next step
+        """
+        # Get next action from agent
+        response = await self.agent_connector.send_request("process", current_context)
+        self.logger.info(f"Received response from agent: {response}")
+
+        if not isinstance(response, dict):
+            return {"error": "Invalid response format from agent"}, None
+
+        thought = response.get("thought", "")
+        actions = response.get("actions", [])
+
+        # If no actions or response_to_user, return the thought to user
+        if not actions or (len(actions) == 1 and actions[0]["name"] == "response_to_user"):
+            if actions and actions[0]["name"] == "response_to_user":
+                return {"message": actions[0].get("argument", "")}, None
+            return {"message": thought}, None
+
+        # Execute the actions concurrently; tools missing their deadline leave partial results
+        tool_calls = [
+            {
+                "type": action["name"],
+                **(
+                    action.get("argument", {})
+                    if isinstance(action.get("argument"), dict)
+                    else {"coin_symbol": action.get("argument", "")}
+                ),
             }
+            for action in actions
+        ]
+        results = await self.tool_handler.handle_all(tool_calls)
+
+        # Create human-readable message with results
+        results_message = format_results_message(
+            results=results,
+            original_message=current_context["content"],
+        )
+
+        # Update context with results for next iteration
+        return None, {
+            "content": results_message,
+            "user_id": current_context["user_id"],
+            "llm_type": current_context["llm_type"],
+            "metadata": current_context["metadata"],
+        }
 
     async def check_news(self):
         await asyncio.sleep(6000)  # Disabled for live features demo
@@ -267,7 +362,9 @@ class ClientService:
 
     async def _process_news_original(self, current_news: dict):
         """Original implementation of news processing."""
-        users = await User.all()
+        with _db_span("list_users"):
+            users = await User.all()
+        requests = []
         for user in users:
             portfolio_context = (
                 f"Given that the user's portfolio contains: {', '.join(user.portfolio)}, "
@@ -279,33 +376,65 @@ class ClientService:
                 f"Please only provide \"response_to_user\" action with \"message\" with results of your analysis:"
             )
 
-            self.logger.info(f"Sending personalized news analysis prompt to agent for user {user.telegram_id}")
-            result = await self.agent_connector.send_request(
-                "process",
-                {
-                    "content": portfolio_context,
-                    "user_id": str(user.telegram_id),
-                    "llm_type": "xmlBasedLLM",
-                    "portfolio": user.portfolio,
-                },
+            self.logger.info(f"Queueing personalized news analysis prompt for user {user.telegram_id}")
+            requests.append(
+                (
+                    user,
+                    {
+                        "content": portfolio_context,
+                        "user_id": str(user.telegram_id),
+                        "llm_type": "xmlBasedLLM",
+                        "metadata": {"priority": "background"},
+                        "portfolio": user.portfolio,
+                    },
+                )
             )
 
+        await self._send_news_analyses(requests)
+
+    async def _send_news_analyses(self, requests: List[Tuple[User, Dict[str, Any]]]):
+        """Send news analysis prompts to the agent in batches and forward the answers to Telegram.
+
+        A failure for one user or batch is logged and does not prevent the other users from being notified.
+
+        Args:
+            requests: Pairs of user and the agent request payload prepared for them
+        """
+        for start in range(0, len(requests), self.news_batch_size):
+            chunk = requests[start : start + self.news_batch_size]
             try:
-                result = next(
-                    action["argument"]
-                    for action in result.get("actions", [])
-                    if action.get("name") == "response_to_user"
+                results = await self.agent_connector.process_batch([payload for _, payload in chunk])
+            except Exception as e:
+                self.logger.error(f"News analysis batch of {len(chunk)} users failed: {str(e)}")
+                continue
+
+            for (user, _), item in zip(chunk, results):
+                if "error" in item:
+                    self.logger.error(f"News analysis failed for user {user.telegram_id}: {item['error']}")
+                    continue
+
+                message = next(
+                    (
+                        action["argument"]
+                        for action in item["result"].get("actions", [])
+                        if action.get("name") == "response_to_user"
+                    ),
+                    None,
                 )
-            except StopIteration:
-                raise ValueError("No 'response_to_user' action found in the response")
-
-            await self.telegram_connector.send_request(
-                "send_message",
-                {
-                    "chat_id": user.telegram_id,
-                    "message": result,
-                },
-            )
+                if message is None:
+                    self.logger.error(f"No 'response_to_user' action found for user {user.telegram_id}")
+                    continue
+
+                try:
+                    await self.telegram_connector.send_request(
+                        "send_message",
+                        {
+                            "chat_id": user.telegram_id,
+                            "message": message,
+                        },
+                    )
+                except Exception as e:
+                    self.logger.error(f"Failed to send news analysis to user {user.telegram_id}: {str(e)}")
 
     def _calculate_relevance_scores(self, news_content: str, users: List[User]) -> List[Tuple[User, float]]:
         """Calculate BM25 relevance scores between news and user portfolios."""
@@ -337,7 +466,8 @@ class ClientService:
             current_news: Dictionary containing latest news articles
         """
         # Get all users
-        users = await User.all()
+        with _db_span("list_users"):
+            users = await User.all()
 
         # Extract text content from news for matching
         news_content = self._extract_news_content(current_news)
@@ -347,6 +477,7 @@ class ClientService:
 
         # Process only users with relevance score above threshold
         threshold = 0.1  # Adjust this threshold based on your needs
+        requests = []
         for user, score in relevant_users:
             if score < threshold:
                 continue
@@ -361,36 +492,24 @@ class ClientService:
             )
 
             self.logger.info(
-                f"Sending BM25-filtered news analysis for user {user.telegram_id} " f"with relevance score {score:.2f}"
+                f"Queueing BM25-filtered news analysis for user {user.telegram_id} " f"with relevance score {score:.2f}"
             )
 
-            result = await self.agent_connector.send_request(
-                "process",
-                {
-                    "content": analysis_prompt,
-                    "user_id": str(user.telegram_id),
-                    "llm_type": "xmlBasedLLM",
-                    "portfolio": user.portfolio,
-                },
-            )
-
-            try:
-                message = next(
-                    action["argument"]
-                    for action in result.get("actions", [])
-                    if action.get("name") == "response_to_user"
+            requests.append(
+                (
+                    user,
+                    {
+                        "content": analysis_prompt,
+                        "user_id": str(user.telegram_id),
+                        "llm_type": "xmlBasedLLM",
+                        "metadata": {"priority": "background"},
+                        "portfolio": user.portfolio,
+                    },
                 )
-            except StopIteration:
-                raise ValueError("No 'response_to_user' action found in the response")
-
-            await self.telegram_connector.send_request(
-                "send_message",
-                {
-                    "chat_id": user.telegram_id,
-                    "message": message,
-                },
             )
 
+        await self._send_news_analyses(requests)
+
     def _extract_news_content(self, news: dict) -> str:
         """Extract text content from news dictionary for relevance matching.
 
@@ -444,11 +563,18 @@ asyncio.create_task(client_service.check_news())
 
 
 @app.post("/process_message")
-async def process_message(message: Message):
+async def process_message(message: Message, stream: bool = False):
+    """Process a user message; with `stream=true` the agent's progress is returned as NDJSON events."""
     logger.info(f"Received message processing request: {message}")
     try:
         message.llm_type = "xmlBasedLLM"
 
+        if stream:
+            events = client_service.process_message_stream(message)
+            return StreamingResponse(
+                (json.dumps(event) + "\n" async for event in events), media_type="application/x-ndjson"
+            )
+
         response = await client_service.process_message(message)
         logger.info(f"Successfully processed message: {response}")
 
@@ -470,11 +596,17 @@ async def process_message(message: Message):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Get tool result cache counters, including stale hits and coalesced misses."""
+    return client_service.tool_handler.cache.stats()
+
+
 @app.post("/tool_call")
 async def handle_tool_call(tool_call: Dict[str, Any]):
     logger.info(f"Received tool call request: {tool_call}")
     try:
-        result = await client_service.tool_handler.handle(tool_call)
+        result = await client_service.tool_handler.handle_with_deadline(tool_call)
         logger.info(f"Successfully handled tool call: {result}")
         return result
     except Exception as e:
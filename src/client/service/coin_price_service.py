@@ -1,10 +1,16 @@
+import asyncio
 import logging
 import os
+from typing import Optional
 
+import httpx
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
+from src.client.service.http_client import shared_http_client
+from src.common import tracing
+from src.common.metrics import EXTERNAL_API_CALLS
+
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
@@ -19,24 +25,27 @@ class CoinPriceService:
     using the CoinAPI REST API.
     """
 
-    def __init__(self, base_url="https://rest.coinapi.io/v1", api_key=None):
+    def __init__(self, base_url=None, api_key=None, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize the CoinPriceService.
 
         Args:
-            base_url (str): The base URL for the CoinAPI REST API. Defaults to 'https://rest.coinapi.io/v1'.
+            base_url (str, optional): The base URL for the CoinAPI REST API. If not provided, uses the
+                COINAPI_BASE_URL environment variable or 'https://rest.coinapi.io/v1'.
             api_key (str, optional): The API key for CoinAPI. If not provided, will attempt to load from environment variable.
+            http_client (httpx.AsyncClient, optional): Client for the requests. Defaults to the shared pooled client.
 
         Raises:
             ValueError: If no API key is provided or found in environment variables.
         """
-        self.base_url = base_url
+        self.base_url = base_url or os.getenv("COINAPI_BASE_URL", "https://rest.coinapi.io/v1")
         self.api_key = api_key or os.getenv("COINAPI_KEY")
         if not self.api_key:
             raise ValueError("API key is required")
+        self.http_client = http_client
         logger.info("CoinPriceService initialized")
 
-    def get_coin_price_history(self, coin_symbol: str, vs_currency: str = "USD", days: int = 30) -> pd.DataFrame:
+    async def get_coin_price_history(self, coin_symbol: str, vs_currency: str = "USD", days: int = 30) -> pd.DataFrame:
         """
         Fetch historical price data for a specified cryptocurrency.
 
@@ -66,8 +75,10 @@ class CoinPriceService:
             "limit": 100,
         }
 
+        outcome = "error"
         try:
-            response = requests.get(url, headers=headers, params=params)
+            with tracing.start_span("coinapi.exchangerate_history", "api", {"peer": "coinapi", "symbol": coin_symbol}):
+                response = await (self.http_client or shared_http_client()).get(url, headers=headers, params=params)
             if response.status_code != 200:
                 logger.error(f"Error fetching data: {response.status_code}")
                 raise Exception(f"Error fetching data: {response.status_code}")
@@ -81,14 +92,17 @@ class CoinPriceService:
             df.set_index("time_period_start", inplace=True)
             df.rename(columns={"rate_close": "price"}, inplace=True)
 
+            outcome = "success"
             return df
         except Exception as e:
             logger.error(f"Error fetching price history for {coin_symbol}: {str(e)}")
             raise
+        finally:
+            EXTERNAL_API_CALLS.labels(api="coinapi", outcome=outcome).inc()
 
 
 if __name__ == "__main__":
     coin_service = CoinPriceService()
 
-    df = coin_service.get_coin_price_history("BTC", days=30)
+    df = asyncio.run(coin_service.get_coin_price_history("BTC", days=30))
     print(df)
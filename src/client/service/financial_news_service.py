@@ -1,11 +1,19 @@
+import asyncio
 import logging
 import os
+from typing import Optional
 
+import httpx
 from dotenv import load_dotenv
-from newsapi import NewsApiClient
+
+from src.client.service.http_client import shared_http_client
+from src.common import tracing
+from src.common.metrics import EXTERNAL_API_CALLS
 
 logger = logging.getLogger(__name__)
 
+NEWSAPI_BASE_URL = "https://newsapi.org/v2"
+
 
 class FinancialNewsService:
     """
@@ -15,10 +23,13 @@ class FinancialNewsService:
     stocks, cryptocurrencies, and other financial topics.
     """
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize the FinancialNewsService.
 
+        Args:
+            http_client (httpx.AsyncClient, optional): Client for the requests. Defaults to the shared pooled client.
+
         Raises:
             ValueError: If NEWSAPI_KEY environment variable is not set.
         """
@@ -27,10 +38,13 @@ class FinancialNewsService:
         if not api_key:
             logger.error("NEWSAPI_KEY environment variable is not set")
             raise ValueError("NEWSAPI_KEY environment variable is not set")
-        self.api = NewsApiClient(api_key=api_key)
+        self.api_key = api_key
+        # Overridable to point the service at a local mock
+        self.base_url = (os.getenv("NEWSAPI_BASE_URL") or NEWSAPI_BASE_URL).rstrip("/")
+        self.http_client = http_client
         logger.info("FinancialNewsService initialized successfully")
 
-    def get_financial_news(
+    async def get_financial_news(
         self,
         keywords="stock OR crypto",
         language="en",
@@ -52,12 +66,20 @@ class FinancialNewsService:
                  'description', 'content', and other metadata. Returns empty list if there's an error.
         """
         logger.info(f"Fetching financial news with keywords: {keywords}")
+        outcome = "error"
         try:
-            response = self.api.get_everything(q=keywords, language=language, sort_by=sort_by, page_size=page_size)
+            with tracing.start_span("newsapi.everything", "api", {"peer": "newsapi"}):
+                http_response = await (self.http_client or shared_http_client()).get(
+                    f"{self.base_url}/everything",
+                    headers={"X-Api-Key": self.api_key},
+                    params={"q": keywords, "language": language, "sortBy": sort_by, "pageSize": page_size},
+                )
+            response = http_response.json()
 
             if response and isinstance(response, dict):
                 if response.get("status") == "ok" and "articles" in response:
                     logger.info(f"Successfully fetched {len(response['articles'])} news articles")
+                    outcome = "success"
                     return response["articles"]
                 else:
                     logger.error(f"Error in API response: {response}")
@@ -67,6 +89,8 @@ class FinancialNewsService:
         except Exception as e:
             logger.error(f"An error occurred while fetching news: {str(e)}")
             return []
+        finally:
+            EXTERNAL_API_CALLS.labels(api="newsapi", outcome=outcome).inc()
 
     def print_news(self, articles):
         """
@@ -97,7 +121,7 @@ if __name__ == "__main__":
     news_client = FinancialNewsService()
 
     # Fetch news about stock or crypto
-    financial_news = news_client.get_financial_news(page_size=100)
+    financial_news = asyncio.run(news_client.get_financial_news(page_size=100))
 
     # Print the news articles
     news_client.print_news(financial_news)
@@ -0,0 +1,82 @@
+"""
+Pooled async HTTP client shared by the market-data and news services.
+
+The services are called from async tool handlers, so their requests must not block the event
+loop. One `httpx.AsyncClient` is shared by all of them, reusing keep-alive connections to the
+external APIs across tool calls.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MarketDataHttpConfig:
+    """
+    Connection pool and timeout settings of the shared client.
+
+    Attributes:
+        max_connections: Maximum number of simultaneous connections
+        max_keepalive_connections: Maximum number of idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        timeout: Timeout of a request in seconds
+        connect_timeout: Timeout of establishing a connection in seconds
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 20.0
+    connect_timeout: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "MarketDataHttpConfig":
+        """Build the configuration from MARKET_DATA_HTTP_* environment variables."""
+        return cls(
+            max_connections=int(os.getenv("MARKET_DATA_HTTP_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(os.getenv("MARKET_DATA_HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv("MARKET_DATA_HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            timeout=float(os.getenv("MARKET_DATA_HTTP_TIMEOUT", cls.timeout)),
+            connect_timeout=float(os.getenv("MARKET_DATA_HTTP_CONNECT_TIMEOUT", cls.connect_timeout)),
+        )
+
+    def build_client(self) -> httpx.AsyncClient:
+        """Create an async client with these settings."""
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def shared_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide client, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: Client with a keep-alive connection pool
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = MarketDataHttpConfig.from_env().build_client()
+    return _shared_client
+
+
+async def close_shared_http_client() -> None:
+    """Close the process-wide client and its connections, e.g. on service shutdown."""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -1,10 +1,16 @@
+import asyncio
 import logging
 import os
+from typing import Optional
 
+import httpx
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
+from src.client.service.http_client import shared_http_client
+from src.common import tracing
+from src.common.metrics import EXTERNAL_API_CALLS
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,10 +22,13 @@ class StockPriceService:
     using the Alpha Vantage REST API.
     """
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize the StockPriceService.
 
+        Args:
+            http_client (httpx.AsyncClient, optional): Client for the requests. Defaults to the shared pooled client.
+
         Raises:
             ValueError: If ALPHA_VANTAGE_KEY environment variable is not set.
         """
@@ -29,9 +38,12 @@ class StockPriceService:
             logger.error("ALPHA_VANTAGE_KEY environment variable is not set")
             raise ValueError("ALPHA_VANTAGE_KEY environment variable is not set")
         self.api_key = api_key
+        # Overridable to point the service at a local mock
+        self.base_url = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co")
+        self.http_client = http_client
         logger.info("StockPriceService initialized successfully")
 
-    def get_stock_price_history(
+    async def get_stock_price_history(
         self, symbol: str, interval: str = "daily", outputsize: str = "compact"
     ) -> pd.DataFrame:
         """
@@ -48,7 +60,7 @@ class StockPriceService:
                         Returns empty DataFrame if there's an error.
         """
         logger.info(f"Fetching stock price history for {symbol} with interval: {interval}")
-        url = "https://www.alphavantage.co/query"
+        url = f"{self.base_url}/query"
         params = {
             "function": "TIME_SERIES_" + interval.upper(),
             "symbol": symbol,
@@ -57,8 +69,10 @@ class StockPriceService:
             "datatype": "json",
         }
 
+        outcome = "error"
         try:
-            response = requests.get(url, params=params)
+            with tracing.start_span("alpha_vantage.time_series", "api", {"peer": "alpha_vantage", "symbol": symbol}):
+                response = await (self.http_client or shared_http_client()).get(url, params=params)
             data = response.json()
 
             if "Time Series (Daily)" in data or "Time Series (Intraday)" in data:
@@ -69,6 +83,7 @@ class StockPriceService:
                 df.index = pd.to_datetime(df.index)
                 df = df.astype(float)
                 logger.info(f"Successfully fetched stock price data for {symbol}")
+                outcome = "success"
                 return df
             else:
                 logger.error(f"Error fetching stock price data: {data.get('Note', 'Unknown error')}")
@@ -76,6 +91,8 @@ class StockPriceService:
         except Exception as e:
             logger.error(f"An error occurred while fetching stock price data: {e}")
             return pd.DataFrame()
+        finally:
+            EXTERNAL_API_CALLS.labels(api="alpha_vantage", outcome=outcome).inc()
 
 
 # Usage Example
@@ -85,6 +102,6 @@ if __name__ == "__main__":
     stock_service = StockPriceService()
 
     stock_symbol = "NVDA"
-    stock_prices = stock_service.get_stock_price_history(stock_symbol)
+    stock_prices = asyncio.run(stock_service.get_stock_price_history(stock_symbol))
 
     print(stock_prices)
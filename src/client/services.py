@@ -1,17 +1,30 @@
+import asyncio
+import json
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 
 from src.client.service.coin_price_service import CoinPriceService
 from src.client.service.financial_news_service import FinancialNewsService
 from src.client.service.stock_price_service import StockPriceService
+from src.client.tool_cache import ToolResultCache
+from src.common import tracing
 from src.common.interfaces import ServiceConnector
+from src.common.metrics import Histogram
+from src.common.tool_results import ToolExecutionPolicy
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TOOL_CALL_DURATION = Histogram(
+    "tool_call_duration_seconds",
+    "Latency of agent tool calls by tool type and outcome",
+    ["tool", "outcome"],
+)
+
 
 class AgentServiceConnector(ServiceConnector):
     """Connector class for communicating with the agent service.
@@ -47,16 +60,22 @@ class AgentServiceConnector(ServiceConnector):
         """
         self.logger.info(f"Sending request to {endpoint} with data: {data}")
         try:
-            async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
-                self.logger.debug(f"Making POST request to {self.base_url}/{endpoint}")
-                response = await client.post(f"{self.base_url}/{endpoint}", json=data)
-
-                # Check if the response was successful
-                response.raise_for_status()
-
-                response_data = response.json()
-                self.logger.info(f"Received response from agent: {response_data}")
-                return response_data
+            with tracing.start_span(f"agent.{endpoint}", "http", {"peer": "agent"}):
+                # Messages also carry the trace context in their metadata, one per message of a batch
+                if isinstance(data, dict):
+                    data = {**data, "metadata": tracing.inject(dict(data.get("metadata") or {}))}
+                elif isinstance(data, list):
+                    data = [{**item, "metadata": tracing.inject(dict(item.get("metadata") or {}))} for item in data]
+                async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
+                    self.logger.debug(f"Making POST request to {self.base_url}/{endpoint}")
+                    response = await client.post(f"{self.base_url}/{endpoint}", json=data, headers=tracing.inject({}))
+
+                    # Check if the response was successful
+                    response.raise_for_status()
+
+                    response_data = response.json()
+                    self.logger.info(f"Received response from agent: {response_data}")
+                    return response_data
 
         except httpx.TimeoutException as e:
             error_msg = f"Timeout while connecting to agent service: {str(e)}"
@@ -78,6 +97,59 @@ class AgentServiceConnector(ServiceConnector):
             self.logger.error(error_msg, exc_info=True)
             raise RuntimeError(error_msg) from e
 
+    async def stream_request(self, endpoint: str, data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Send request to a streaming agent endpoint and yield its newline-delimited JSON events.
+
+        Args:
+            endpoint: API endpoint to call, e.g. "run"
+            data: Request payload
+
+        Yields:
+            Events in the order the agent sends them
+
+        Raises:
+            TimeoutError: If request times out
+            RuntimeError: If request fails
+        """
+        self.logger.info(f"Streaming request to {endpoint} with data: {data}")
+        with tracing.start_span(f"agent.{endpoint}", "http", {"peer": "agent", "stream": True}):
+            data = {**data, "metadata": tracing.inject(dict(data.get("metadata") or {}))}
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
+                    async with client.stream(
+                        "POST",
+                        f"{self.base_url}/{endpoint}",
+                        params={"stream": "true"},
+                        json=data,
+                        headers=tracing.inject({}),
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if line.strip():
+                                yield json.loads(line)
+
+            except httpx.TimeoutException as e:
+                error_msg = f"Timeout while streaming from agent service: {str(e)}"
+                self.logger.error(error_msg)
+                raise TimeoutError(error_msg) from e
+
+            except httpx.HTTPError as e:
+                error_msg = f"Error streaming from agent service: {str(e)}"
+                self.logger.error(error_msg)
+                raise RuntimeError(error_msg) from e
+
+    async def process_batch(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process several messages with a single request to the agent's batch endpoint.
+
+        Args:
+            messages: Message payloads, in the same format as for the `process` endpoint
+
+        Returns:
+            Per-message results in request order, each either {"result": ...} or {"error": ...}
+        """
+        response = await self.send_request("process_batch", messages)
+        return response.get("results", [])
+
 
 class ToolCallHandler:
     """Handles various tool calls from the agent service.
@@ -89,21 +161,71 @@ class ToolCallHandler:
     - User response handling
     """
 
-    def __init__(self):
+    def __init__(self, policy: Optional[ToolExecutionPolicy] = None, cache: Optional[ToolResultCache] = None):
         self.coin_price_service = CoinPriceService()
         self.news_service = FinancialNewsService()
         self.stock_price_service = StockPriceService()
+        self.policy = policy or ToolExecutionPolicy.from_env()
+        self.cache = cache or ToolResultCache.from_env()
         self.logger = logging.getLogger(__name__)
 
+    async def handle_all(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute the tool calls of one agent step concurrently.
+
+        At most `policy.max_concurrency` calls run at a time. A call that misses its deadline is
+        cancelled and yields a result marked with `timed_out`, so the step can proceed with the
+        results of the other calls.
+
+        Args:
+            tool_calls: Tool calls with their `type` and arguments
+
+        Returns:
+            Results in the order of the tool calls
+        """
+        semaphore = asyncio.Semaphore(self.policy.max_concurrency)
+
+        async def run(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.handle_with_deadline(tool_call)
+
+        return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+
+    async def handle_with_deadline(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a tool call, giving up once the deadline of its tool type has passed.
+
+        Args:
+            tool_call: Dictionary containing tool call details
+
+        Returns:
+            Result of tool call execution, or an error result with `timed_out` set
+        """
+        tool_type = tool_call.get("type")
+        timeout = self.policy.timeout_for(tool_type)
+        try:
+            return await asyncio.wait_for(self.handle(tool_call), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Tool call {tool_type} timed out after {timeout:g}s")
+            TOOL_CALL_DURATION.labels(tool=tool_type, outcome="timeout").observe(timeout)
+            return {
+                "type": tool_type,
+                "error": f"{tool_type} did not respond within {timeout:g}s; its data is unavailable",
+                "timed_out": True,
+            }
+
     async def handle(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """Route tool calls to appropriate handlers based on type.
 
+        Market-data and news results are served from the tool result cache while it holds them.
+
         Args:
             tool_call: Dictionary containing tool call details
 
         Returns:
             Result of tool call execution
         """
+        return await self.cache.fetch(tool_call, self._dispatch)
+
+    async def _dispatch(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         tool_type = tool_call.get("type")
         self.logger.info(f"Handling tool call of type: {tool_type}")
         self.logger.debug(f"Tool call data: {tool_call}")
@@ -121,15 +243,20 @@ class ToolCallHandler:
 
         handler = handlers.get(tool_type)
         if handler:
-            try:
-                result = await handler(tool_call)
-                self.logger.info(f"Successfully handled {tool_type} tool call")
-                self.logger.debug(f"Tool call result: {result}")
-                result["type"] = tool_type  # Include the tool type in the response
-                return result
-            except Exception as e:
-                self.logger.error(f"Error handling {tool_type} tool call: {str(e)}")
-                return {"type": tool_type, "error": f"Error handling {tool_type} tool call: {str(e)}"}
+            started = time.perf_counter()
+            with tracing.start_span(f"tool.{tool_type}", "tool", {"tool": tool_type}) as span:
+                try:
+                    result = await handler(tool_call)
+                    self.logger.info(f"Successfully handled {tool_type} tool call")
+                    self.logger.debug(f"Tool call result: {result}")
+                    result["type"] = tool_type  # Include the tool type in the response
+                except Exception as e:
+                    self.logger.error(f"Error handling {tool_type} tool call: {str(e)}")
+                    result = {"type": tool_type, "error": f"Error handling {tool_type} tool call: {str(e)}"}
+                outcome = "error" if "error" in result else "success"
+                span.set_attribute("outcome", outcome)
+            TOOL_CALL_DURATION.labels(tool=tool_type, outcome=outcome).observe(time.perf_counter() - started)
+            return result
 
         self.logger.warning(f"Unknown tool type received: {tool_type}")
         return {"type": tool_type, "error": f"Unknown tool type: {tool_type}"}
@@ -143,7 +270,7 @@ class ToolCallHandler:
             return {"error": "No coin_symbol provided"}
 
         try:
-            df = self.coin_price_service.get_coin_price_history(
+            df = await self.coin_price_service.get_coin_price_history(
                 coin_symbol=coin_symbol, vs_currency=vs_currency, days=1
             )
             current_price = df.iloc[-1]["price"] if not df.empty else None
@@ -168,7 +295,7 @@ class ToolCallHandler:
             return {"error": "No coin_symbol provided"}
 
         try:
-            df = self.coin_price_service.get_coin_price_history(
+            df = await self.coin_price_service.get_coin_price_history(
                 coin_symbol=coin_symbol, vs_currency=vs_currency, days=days
             )
 
@@ -195,7 +322,7 @@ class ToolCallHandler:
             return {"error": "No stock_symbol provided"}
 
         try:
-            df = self.stock_price_service.get_stock_price_history(
+            df = await self.stock_price_service.get_stock_price_history(
                 symbol=stock_symbol, interval="daily", outputsize="compact"
             )
             current_price = df.iloc[-1]["Close"] if not df.empty else None
@@ -219,7 +346,7 @@ class ToolCallHandler:
             return {"error": "No stock_symbol provided"}
 
         try:
-            df = self.stock_price_service.get_stock_price_history(
+            df = await self.stock_price_service.get_stock_price_history(
                 symbol=stock_symbol, interval=interval, outputsize=outputsize
             )
 
@@ -241,7 +368,7 @@ class ToolCallHandler:
     async def _handle_news(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """Get general financial news."""
         try:
-            articles = self.news_service.get_financial_news(keywords="stock OR crypto", page_size=5)
+            articles = await self.news_service.get_financial_news(keywords="stock OR crypto", page_size=5)
 
             return {"type": "get_news", "articles": self.news_service.print_news(articles=articles)}
         except Exception as e:
@@ -250,7 +377,7 @@ class ToolCallHandler:
     async def _handle_market_news(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """Get stock market specific news."""
         try:
-            articles = self.news_service.get_financial_news(
+            articles = await self.news_service.get_financial_news(
                 keywords="stock market OR trading OR investment", page_size=5
             )
 
@@ -268,7 +395,7 @@ class ToolCallHandler:
 
         try:
             keywords = f"cryptocurrency OR crypto OR {coin_symbol}"
-            articles = self.news_service.get_financial_news(keywords=keywords, page_size=5)
+            articles = await self.news_service.get_financial_news(keywords=keywords, page_size=5)
 
             return {
                 "type": "get_coin_news",
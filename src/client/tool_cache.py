@@ -0,0 +1,222 @@
+"""
+Result cache for the client's market-data and news tools.
+
+Prices, histories and news change far slower than agents ask for them: many users asking about
+BTC within a minute all get the same quote. Results are cached per tool type with their own
+freshness (quotes short, news medium, histories long), served stale for a while after that
+window while one background call refreshes them, and concurrent misses for the same key share
+one external call.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from src.common.cache import TTLCache
+from src.common.metrics import Counter
+from src.common.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_LOOKUPS = Counter(
+    "tool_cache_lookups_total",
+    "Tool result cache lookups by tool type and result (hit, stale, miss)",
+    ["tool", "result"],
+)
+
+# Seconds a result is fresh, by tool type; tools missing here are never cached
+DEFAULT_TOOL_TTLS = {
+    "get_coin_price": 60.0,
+    "get_stock_price": 60.0,
+    "get_news": 300.0,
+    "get_market_news": 300.0,
+    "get_coin_news": 300.0,
+    "get_coin_history": 900.0,
+    "get_stock_history": 900.0,
+}
+
+# Arguments that identify a call, with the defaults the handlers apply when they are missing
+_KEY_ARGUMENTS = {
+    "get_coin_price": {"coin_symbol": None, "currency": "usd"},
+    "get_coin_history": {"coin_symbol": None, "currency": "usd", "days": 30},
+    "get_stock_price": {"coin_symbol": None},
+    "get_stock_history": {"stock_symbol": None, "interval": "daily", "outputsize": "compact"},
+    "get_news": {},
+    "get_market_news": {},
+    "get_coin_news": {"coin_symbol": ""},
+}
+
+# Field that is empty when the external API returned no data, e.g. after a swallowed error
+_DATA_FIELDS = {
+    "get_coin_price": "price",
+    "get_coin_history": "current_price",
+    "get_stock_price": "price",
+    "get_stock_history": "current_price",
+    "get_news": "articles",
+    "get_market_news": "articles",
+    "get_coin_news": "articles",
+}
+
+ToolFetch = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class ToolResultCache:
+    """
+    LRU cache of tool results with per-tool TTLs and stale-while-revalidate.
+
+    A result is fresh for the TTL of its tool type. For `stale_ttl` seconds after that it is
+    still returned, while a single background call refreshes it; after that it is a miss.
+
+    Attributes:
+        enabled: Whether results are cached at all
+        ttls: Freshness of results by tool type in seconds
+        stale_ttl: Seconds a result may be served stale after its TTL
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = 120.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._cache = TTLCache(max_size=max_size, clock=clock)
+        self._flight = SingleFlight()
+        self._refreshes: Set[asyncio.Task] = set()
+        self.stale_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """
+        Build the cache from TOOL_CACHE_* environment variables.
+
+        TOOL_CACHE_TTLS overrides TTLs by tool type, e.g. "get_coin_price=30,get_news=600";
+        a TTL of 0 disables caching for that tool.
+        """
+        ttls = dict(DEFAULT_TOOL_TTLS)
+        for item in os.getenv("TOOL_CACHE_TTLS", "").split(","):
+            tool_type, _, ttl = item.partition("=")
+            if tool_type.strip() and ttl.strip():
+                ttls[tool_type.strip()] = float(ttl)
+        return cls(
+            max_size=int(os.getenv("TOOL_CACHE_MAX_SIZE", "2048")),
+            ttls=ttls,
+            stale_ttl=float(os.getenv("TOOL_CACHE_STALE_TTL", "120")),
+            enabled=os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def make_key(tool_call: Dict[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+        """
+        Compute the cache key of a tool call.
+
+        Symbols and other strings are compared case-insensitively and missing arguments take the
+        handler's defaults, so "BTC" and "btc " with or without `currency="usd"` share an entry.
+
+        Args:
+            tool_call: Tool call with its `type` and arguments
+
+        Returns:
+            Key of the call, or None if the tool type is not cacheable
+        """
+        tool_type = tool_call.get("type")
+        arguments = _KEY_ARGUMENTS.get(tool_type)
+        if arguments is None:
+            return None
+        return (tool_type,) + tuple(
+            _normalize(tool_call.get(name) if tool_call.get(name) is not None else default)
+            for name, default in arguments.items()
+        )
+
+    @staticmethod
+    def is_cacheable(result: Dict[str, Any]) -> bool:
+        """Only keep results that carry data; errors and empty responses are not cached."""
+        if "error" in result:
+            return False
+        field = _DATA_FIELDS.get(result.get("type"))
+        return field is None or result.get(field) not in (None, "", [])
+
+    async def fetch(self, tool_call: Dict[str, Any], fetch: ToolFetch) -> Dict[str, Any]:
+        """
+        Return the result of a tool call from the cache, or fetch and cache it.
+
+        Args:
+            tool_call: Tool call with its `type` and arguments
+            fetch: Executes the tool call against the external API
+
+        Returns:
+            Dict[str, Any]: Result of the tool call; a copy when served from the cache
+        """
+        tool_type = tool_call.get("type")
+        key = self.make_key(tool_call)
+        ttl = self.ttls.get(tool_type, 0.0)
+        if not self.enabled or key is None or ttl <= 0:
+            return await fetch(tool_call)
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            fresh_until, result = entry
+            if fresh_until > self._clock():
+                TOOL_CACHE_LOOKUPS.labels(tool=tool_type, result="hit").inc()
+                return dict(result)
+            TOOL_CACHE_LOOKUPS.labels(tool=tool_type, result="stale").inc()
+            self.stale_hits += 1
+            self._refresh(key, tool_call, fetch, ttl)
+            return dict(result)
+
+        TOOL_CACHE_LOOKUPS.labels(tool=tool_type, result="miss").inc()
+        return dict(await self._flight.do(key, lambda: self._fetch_and_store(key, tool_call, fetch, ttl)))
+
+    def _refresh(self, key: Hashable, tool_call: Dict[str, Any], fetch: ToolFetch, ttl: float) -> None:
+        if key in self._flight:
+            # Already being refreshed, or fetched by a caller that missed
+            return
+        task = asyncio.create_task(self._flight.do(key, lambda: self._fetch_and_store(key, tool_call, fetch, ttl)))
+        # Keep a reference so the refresh is not garbage collected before it finishes
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh of a tool result failed: {task.exception()}")
+
+    async def _fetch_and_store(
+        self, key: Hashable, tool_call: Dict[str, Any], fetch: ToolFetch, ttl: float
+    ) -> Dict[str, Any]:
+        result = await fetch(tool_call)
+        if self.is_cacheable(result):
+            fresh_until = self._clock() + ttl
+            self._cache.set(key, (fresh_until, dict(result)), ttl=ttl + self.stale_ttl)
+        return result
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters, including stale hits and coalesced misses."""
+        stats = self._cache.stats()
+        stats.pop("ttl", None)
+        return {
+            **stats,
+            "enabled": self.enabled,
+            "stale_hits": self.stale_hits,
+            "stale_ttl": self.stale_ttl,
+            "coalescing": self._flight.stats(),
+        }
@@ -0,0 +1,65 @@
+"""
+Single-flight coalescing of concurrent identical async calls.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Ensures only one execution of a call is in flight per key.
+
+    Callers that arrive while a call with the same key is running await the same task
+    and receive its result (or exception) instead of starting a duplicate call.
+
+    Attributes:
+        calls: Number of calls actually executed
+        collapsed: Number of callers that joined an in-flight call
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing."""
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Execute `func` unless an identical call is already running, then share its result.
+
+        Args:
+            key: Identity of the call
+            func: Zero-argument coroutine factory executed for the first caller
+
+        Returns:
+            The result of the shared call
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            # Run the call as its own task so a cancelled caller does not cancel it for everyone
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return executed, collapsed and in-flight call counters."""
+        return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": self.in_flight}
@@ -0,0 +1,89 @@
+"""
+Tool calls of an agent step, shared by both agent loops (the client's and the agent service's).
+
+Both loops execute a step's tool calls under the same concurrency and deadline limits and send
+the results back in the same format, so the agent behaves the same whichever loop runs it.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+# Appended to the tool results of a step when some tools missed their deadline
+PARTIAL_RESULTS_NOTE = (
+    "Note: some tools did not respond in time, so these results are partial. Answer with the data "
+    "available and tell the user which information is missing."
+)
+
+
+# Deadlines of the slower tools; other tools use the default timeout
+DEFAULT_TOOL_TIMEOUTS = {
+    "get_coin_history": 30.0,
+    "get_stock_history": 30.0,
+    "get_news": 20.0,
+    "get_market_news": 20.0,
+    "get_coin_news": 20.0,
+}
+
+
+class ToolExecutionPolicy:
+    """Concurrency and deadline limits for the tool calls of one agent step.
+
+    Attributes:
+        max_concurrency: Maximum number of tool calls of a step running at the same time
+        default_timeout: Deadline of a tool call in seconds
+        timeouts: Deadlines by tool type, overriding the default
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        default_timeout: float = 15.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.timeouts = dict(DEFAULT_TOOL_TIMEOUTS if timeouts is None else timeouts)
+
+    @classmethod
+    def from_env(cls) -> "ToolExecutionPolicy":
+        """Build the policy from TOOL_* environment variables.
+
+        TOOL_TIMEOUTS overrides deadlines by tool type, e.g. "get_news=10,get_coin_history=20".
+        """
+        timeouts = dict(DEFAULT_TOOL_TIMEOUTS)
+        for item in os.getenv("TOOL_TIMEOUTS", "").split(","):
+            tool_type, _, timeout = item.partition("=")
+            if tool_type.strip() and timeout.strip():
+                timeouts[tool_type.strip()] = float(timeout)
+        return cls(
+            max_concurrency=int(os.getenv("TOOL_MAX_CONCURRENCY", "4")),
+            default_timeout=float(os.getenv("TOOL_TIMEOUT", "15")),
+            timeouts=timeouts,
+        )
+
+    def timeout_for(self, tool_type: Optional[str]) -> float:
+        """Deadline of a tool call of the given type in seconds."""
+        return self.timeouts.get(tool_type, self.default_timeout)
+
+
+def format_results_message(results: List[Dict[str, Any]], original_message: str) -> str:
+    """
+    Format tool results into a human-readable message for the agent.
+
+    Args:
+        results: Results of the step's tool calls; timed out ones carry `timed_out`
+        original_message: The user's message the agent is answering
+
+    Returns:
+        str: Message asking the agent to answer the original message with the results
+    """
+    results_text = "\n".join(f"- For action '{result.get('type', 'unknown')}': {result}" for result in results)
+    if any(result.get("timed_out") for result in results):
+        results_text += f"\n\n{PARTIAL_RESULTS_NOTE}"
+
+    return (
+        f"I've gathered the information you requested. Here are the results:\n\n"
+        f"{results_text}\n\n"
+        f"Given this information, please provide a response to the user's original message: "
+        f"'{original_message}'"
+    )
@@ -0,0 +1,469 @@
+"""
+Lightweight distributed tracing across the Telegram, client and agent services.
+
+Spans are tracked in a context variable, so nested `start_span` blocks (including across
+`await`) form a tree without passing spans around. The trace context crosses service
+boundaries as a W3C `traceparent` value, both as an HTTP header and in `Message.metadata`.
+Finished spans are kept in a ring buffer served on `GET /traces` and, if `TRACING_EXPORT_PATH`
+is set, appended to a file as OTLP JSON lines (one `ExportTraceServiceRequest` per batch of
+spans), which the OpenTelemetry Collector's `otlpjsonfile` receiver can ingest. The file is
+written by a background thread, so finishing a span never blocks the event loop on disk I/O.
+
+Usage:
+    python -m src.common.tracing traces/*.jsonl --trace <trace id>
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from fastapi import FastAPI, Request
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Categories of spans that wait on another system; OTLP marks them as client spans
+CLIENT_CATEGORIES = ("http", "llm", "api", "db")
+
+_OTLP_KINDS = {"server": 2, **{category: 3 for category in CLIENT_CATEGORIES}}
+
+# Queued by `Tracer.flush` to make the writer thread write its pending batch right away
+_FLUSH = object()
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifiers of a span, as propagated between services."""
+
+    trace_id: str
+    span_id: str
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C `traceparent` value, returning None if it is missing or invalid."""
+    match = _TRACEPARENT_PATTERN.match((value or "").strip().lower())
+    if not match or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return SpanContext(match.group(1), match.group(2))
+
+
+@dataclass
+class Span:
+    """
+    A timed operation within a trace.
+
+    Attributes:
+        name: Operation name, e.g. "llm.chat_completion"
+        category: Kind of work ("server", "agent", "llm", "tool", "api", "db", "http" or "internal"),
+            used to break traces down by where the time went
+        service: Service that recorded the span
+        trace_id: Trace the span belongs to
+        span_id: Identifier of the span
+        parent_id: Identifier of the parent span, None for the root of a trace
+        attributes: Additional key-value data
+    """
+
+    name: str
+    category: str
+    service: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, up to now if the span has not ended."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert the span to its OTLP JSON representation."""
+        attributes = {**self.attributes, "span.category": self.category}
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _OTLP_KINDS.get(self.category, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_request(spans: Iterable[Span]) -> Dict[str, Any]:
+    """Group spans by service into an OTLP `ExportTraceServiceRequest`."""
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        by_service.setdefault(span.service, []).append(span.to_otlp())
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+            }
+            for service, otlp_spans in by_service.items()
+        ]
+    }
+
+
+class Tracer:
+    """
+    Records finished spans of the current process.
+
+    Spans to export are queued and written by a background thread in batches, once a batch is
+    full or `flush_interval` seconds after its first span.
+
+    Attributes:
+        service: Service name attached to recorded spans
+        enabled: Whether spans are recorded and exported
+        export_path: File the spans are appended to as OTLP JSON lines, if any
+        batch_size: Maximum number of spans written as one line
+        flush_interval: Maximum seconds a span waits in the queue before it is written
+        dropped: Spans not exported because the export queue was full
+    """
+
+    def __init__(
+        self,
+        service: str = "llm-agent",
+        enabled: bool = True,
+        export_path: Optional[str] = None,
+        buffer: int = 2048,
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+    ):
+        self.service = service
+        self.enabled = enabled
+        self.export_path = export_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.finished: Deque[Span] = deque(maxlen=buffer)
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Build the tracer from TRACING_* environment variables."""
+        return cls(
+            service=os.getenv("TRACING_SERVICE_NAME", "llm-agent"),
+            enabled=os.getenv("TRACING_ENABLED", "true").lower() == "true",
+            export_path=os.getenv("TRACING_EXPORT_PATH") or None,
+            buffer=int(os.getenv("TRACING_BUFFER_SIZE", "2048")),
+            batch_size=int(os.getenv("TRACING_EXPORT_BATCH_SIZE", "512")),
+            flush_interval=float(os.getenv("TRACING_EXPORT_INTERVAL", "1")),
+        )
+
+    def export(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        self.finished.append(span)
+        if self.export_path:
+            self._start_writer()
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until all spans exported so far are written to the export file."""
+        if self._writer is not None:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_batches, name="span-exporter", daemon=True)
+                self._writer.start()
+                # Write the last batch when the process exits
+                atexit.register(self.flush)
+
+    def _write_batches(self) -> None:
+        batch: List[Span] = []
+        deadline = 0.0
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                # The interval of the pending batch has passed
+                item = None
+            if isinstance(item, Span):
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if batch and (not isinstance(item, Span) or len(batch) >= self.batch_size):
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+            if item is _FLUSH:
+                self._queue.task_done()
+
+    def _write(self, spans: List[Span]) -> None:
+        line = json.dumps(otlp_request(spans))
+        try:
+            with open(self.export_path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to export {len(spans)} spans to {self.export_path}: {str(e)}")
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """Recently finished spans, optionally of a single trace."""
+        return [span for span in list(self.finished) if trace_id is None or span.trace_id == trace_id]
+
+
+tracer = Tracer.from_env()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost active span of the current task, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    category: str = "internal",
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[SpanContext] = None,
+) -> Iterator[Span]:
+    """
+    Time a block as a span, child of `parent` or else of the current span.
+
+    Exceptions escaping the block mark the span as failed and are re-raised.
+
+    Args:
+        name: Operation name
+        category: Kind of work, see `Span.category`
+        attributes: Initial span attributes
+        parent: Remote parent, e.g. extracted from a `traceparent` header
+
+    Yields:
+        Span: The started span, for adding attributes
+    """
+    if parent is None:
+        current = _current_span.get()
+        parent = current.context if current else None
+    span = Span(
+        name=name,
+        category=category,
+        service=tracer.service,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        attributes=dict(attributes or {}),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Async generators closed from another context (e.g. by the garbage collector)
+            pass
+        tracer.export(span)
+
+
+def inject(carrier: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the current span's `traceparent` to HTTP headers or message metadata."""
+    span = _current_span.get()
+    if span is not None:
+        carrier[TRACEPARENT] = span.context.traceparent()
+    return carrier
+
+
+def extract(carrier: Optional[Mapping[str, Any]]) -> Optional[SpanContext]:
+    """Read the remote parent from HTTP headers or message metadata."""
+    if not carrier:
+        return None
+    return parse_traceparent(carrier.get(TRACEPARENT))
+
+
+def resume(carrier: Optional[Mapping[str, Any]]) -> Optional[SpanContext]:
+    """
+    Parent for work done on behalf of a carrier, e.g. a message of a batch.
+
+    Returns the carrier's span context, unless the current span already belongs to that trace
+    (the carrier's context would then skip the spans recorded in between).
+    """
+    remote = extract(carrier)
+    current = _current_span.get()
+    if remote is None or (current is not None and current.trace_id == remote.trace_id):
+        return None
+    return remote
+
+
+def trace_app(app: FastAPI, service: str) -> None:
+    """
+    Record a server span for each request and expose recent spans on `GET /traces`.
+
+    The span continues the trace of an incoming `traceparent` header, and the response carries
+    the `traceparent` of the server span so callers can look the trace up.
+
+    Args:
+        app: FastAPI application to trace
+        service: Service name attached to the spans of this process
+    """
+    tracer.service = service
+
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        route = next((r for r in app.router.routes if r.matches(request.scope)[0] == Match.FULL), None)
+        endpoint = getattr(route, "path", "unmatched")
+        if endpoint in ("/metrics", "/traces"):
+            return await call_next(request)
+        with start_span(
+            f"{request.method} {endpoint}",
+            "server",
+            {"http.method": request.method, "http.route": endpoint},
+            parent=extract(request.headers),
+        ) as span:
+            response = await call_next(request)
+            span.set_attribute("http.status_code", response.status_code)
+            response.headers[TRACEPARENT] = span.context.traceparent()
+            return response
+
+    @app.get("/traces", include_in_schema=False)
+    async def traces(trace_id: Optional[str] = None):
+        return otlp_request(tracer.spans(trace_id))
+
+
+def load_spans(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Read spans exported by `Tracer` as flat dicts with service, category and timing."""
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                for resource in json.loads(line)["resourceSpans"]:
+                    service = resource["resource"]["attributes"][0]["value"]["stringValue"]
+                    for scope in resource["scopeSpans"]:
+                        for span in scope["spans"]:
+                            attributes = {a["key"]: next(iter(a["value"].values())) for a in span["attributes"]}
+                            spans.append(
+                                {
+                                    "trace_id": span["traceId"],
+                                    "span_id": span["spanId"],
+                                    "parent_id": span.get("parentSpanId"),
+                                    "name": span["name"],
+                                    "service": service,
+                                    "category": attributes.get("span.category", "internal"),
+                                    "peer": attributes.get("peer"),
+                                    "start_ns": int(span["startTimeUnixNano"]),
+                                    "end_ns": int(span["endTimeUnixNano"]),
+                                }
+                            )
+    return spans
+
+
+def breakdown(spans: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Wall-clock seconds of a trace spent waiting on each external dependency.
+
+    Overlapping spans of the same dependency (e.g. parallel tool calls) are counted once, so the
+    values answer "how long was the request blocked on the LLM / CoinAPI / Postgres".
+
+    Args:
+        spans: Spans of one trace, as returned by `load_spans`
+
+    Returns:
+        Dict[str, float]: "total" plus seconds per "llm", "db", "api:<peer>" and "http:<peer>"
+    """
+    if not spans:
+        return {"total": 0.0}
+    intervals: Dict[str, List[List[int]]] = {}
+    for span in spans:
+        if span["category"] in CLIENT_CATEGORIES:
+            key = f"{span['category']}:{span['peer']}" if span["peer"] else span["category"]
+            intervals.setdefault(key, []).append([span["start_ns"], span["end_ns"]])
+
+    result = {"total": (max(s["end_ns"] for s in spans) - min(s["start_ns"] for s in spans)) / 1e9}
+    for key, ranges in intervals.items():
+        ranges.sort()
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            if start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        result[key] = sum(end - start for start, end in merged) / 1e9
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break traces down by where the time went")
+    parser.add_argument("files", nargs="+", help="OTLP JSON lines files written with TRACING_EXPORT_PATH")
+    parser.add_argument("--trace", help="Trace id to show; defaults to the slowest traces")
+    parser.add_argument("--top", type=int, default=10, help="Number of traces to show")
+    args = parser.parse_args()
+
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for span in load_spans(args.files):
+        traces.setdefault(span["trace_id"], []).append(span)
+    if args.trace:
+        traces = {args.trace: traces.get(args.trace, [])}
+
+    reports = sorted(((trace_id, breakdown(spans)) for trace_id, spans in traces.items()), key=lambda r: -r[1]["total"])
+    for trace_id, report in reports[: args.top]:
+        root = min(traces[trace_id], key=lambda s: s["start_ns"])
+        parts = ", ".join(f"{key} {seconds:.2f}s" for key, seconds in sorted(report.items()) if key != "total")
+        print(
+            f"{trace_id} {root['name']} ({root['service']}): {report['total']:.2f}s total; {parts or 'no dependencies'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
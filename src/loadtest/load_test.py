@@ -0,0 +1,255 @@
+"""
+End-to-end load test of the Telegram → client → agent pipeline.
+
+Sends `/process_message` requests to the client service with Poisson arrivals at a fixed rate and
+a weighted mix of the Telegram bot's scenarios, optionally forwarding each answer through the
+Telegram service's `/send_message`. Run it with the services pointed at the mock LLM and market
+data servers for offline, repeatable numbers. Reports throughput, latency percentiles and error
+rates per scenario and saves them as JSON for comparison between runs.
+
+Usage:
+    python -m src.loadtest.load_test --rate 5 --duration 60 --mix analyze=2,recommend=1,portfolio=1,update=1
+    python -m src.loadtest.load_test --rate 5 --duration 60 --compare src/loadtest/results/<previous>.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+# Messages sent by the Telegram bot's menu actions (see src/telegram_server/message_handler.py)
+SCENARIOS: Dict[str, str] = {
+    "portfolio": "Portfolio",
+    "analyze": "Analyze current market conditions and provide insight into trends",
+    "recommend": (
+        "Provide investment recommendations according to the current state of the market trends. "
+        "Make sure that you provide the symbols of the stocks (crypto) you recommend."
+    ),
+    "update": "update portfolio [AAPL, TSLA, BTC]",
+}
+
+DEFAULT_MIX = {"portfolio": 1.0, "analyze": 2.0, "recommend": 1.0, "update": 1.0}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse a scenario mix like "analyze=2,recommend=1"."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values, None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples: List[Tuple[str, float, bool]], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate request samples per scenario.
+
+    Args:
+        samples: (scenario, latency in seconds, succeeded) per request
+        elapsed: Duration of the run in seconds
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per-scenario and "total" statistics
+    """
+    groups: Dict[str, List[Tuple[float, bool]]] = {}
+    for scenario, latency, ok in samples:
+        groups.setdefault(scenario, []).append((latency, ok))
+        groups.setdefault("total", []).append((latency, ok))
+
+    report = {}
+    for scenario, results in groups.items():
+        latencies = [latency for latency, ok in results if ok]
+        errors = sum(not ok for _, ok in results)
+        report[scenario] = {
+            "requests": len(results),
+            "errors": errors,
+            "error_rate": errors / len(results),
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+    return report
+
+
+class LoadTest:
+    """
+    Open-loop load generator for the client service.
+
+    Attributes:
+        client_url: Base URL of the client service
+        telegram_url: Base URL of the Telegram service; when set, each answer is also sent
+            through its `/send_message` endpoint and measured as the "send_message" scenario
+        rate: Mean request arrival rate per second
+        duration: Seconds during which requests are started
+        mix: Relative weight of each scenario
+        users: Number of distinct simulated users
+    """
+
+    def __init__(
+        self,
+        client_url: str = "http://localhost:8000",
+        telegram_url: Optional[str] = None,
+        rate: float = 5.0,
+        duration: float = 60.0,
+        mix: Optional[Dict[str, float]] = None,
+        users: int = 50,
+        timeout: float = 120.0,
+        seed: int = 0,
+    ):
+        self.client_url = client_url.rstrip("/")
+        self.telegram_url = telegram_url.rstrip("/") if telegram_url else None
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.users = users
+        self.timeout = timeout
+        self._rng = random.Random(seed)
+        self.samples: List[Tuple[str, float, bool]] = []
+
+    async def _timed(self, session: aiohttp.ClientSession, scenario: str, url: str, payload: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            async with session.post(url, json=payload) as response:
+                body = await response.json(content_type=None)
+                ok = response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            body, ok = None, False
+        self.samples.append((scenario, time.perf_counter() - started, ok))
+        return body if ok else None
+
+    async def _user_request(self, session: aiohttp.ClientSession, scenario: str, user_id: int) -> None:
+        body = await self._timed(
+            session,
+            scenario,
+            f"{self.client_url}/process_message",
+            {"user_id": str(user_id), "content": SCENARIOS[scenario], "llm_type": ""},
+        )
+        if self.telegram_url and isinstance(body, dict):
+            await self._timed(
+                session,
+                "send_message",
+                f"{self.telegram_url}/send_message",
+                {"chat_id": user_id, "message": str(body.get("message", ""))},
+            )
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run the load test.
+
+        Returns:
+            Dict[str, Any]: Configuration, duration and per-scenario statistics of the run
+        """
+        self.samples = []
+        names, weights = list(self.mix), list(self.mix.values())
+        tasks = []
+        started = time.perf_counter()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            next_arrival = 0.0
+            while next_arrival < self.duration:
+                delay = next_arrival - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scenario = self._rng.choices(names, weights)[0]
+                user_id = 100000 + self._rng.randrange(self.users)
+                tasks.append(asyncio.create_task(self._user_request(session, scenario, user_id)))
+                next_arrival += self._rng.expovariate(self.rate)
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "client_url": self.client_url,
+                "telegram_url": self.telegram_url,
+                "rate": self.rate,
+                "duration": self.duration,
+                "mix": self.mix,
+                "users": self.users,
+            },
+            "elapsed": elapsed,
+            "scenarios": summarize(self.samples, elapsed),
+        }
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def format_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Format a run as a table, with p95 and error rate changes relative to a baseline run."""
+    header = f"{'scenario':<14}{'requests':>9}{'req/s':>8}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'errors':>8}"
+    if baseline:
+        header += f"{'Δp95 ms':>10}{'Δerrors':>9}"
+    lines = [header]
+    for name, stats in sorted(results["scenarios"].items(), key=lambda item: item[0] == "total"):
+        line = (
+            f"{name:<14}{stats['requests']:>9}{stats['throughput']:>8.2f}{_ms(stats['p50']):>8}"
+            f"{_ms(stats['p95']):>8}{_ms(stats['p99']):>8}{stats['error_rate']:>8.1%}"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            delta = (
+                _ms(stats["p95"] - previous["p95"]) if stats["p95"] is not None and previous["p95"] is not None else "-"
+            )
+            line += f"{delta:>10}{stats['error_rate'] - previous['error_rate']:>+9.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the client service end to end")
+    parser.add_argument("--client-url", default="http://localhost:8000")
+    parser.add_argument("--telegram-url", help="Also forward answers through the Telegram service's /send_message")
+    parser.add_argument("--rate", type=float, default=5.0, help="Mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to generate load")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. analyze=2,recommend=1,portfolio=1")
+    parser.add_argument("--users", type=int, default=50, help="Number of distinct simulated users")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for arrivals and the scenario mix")
+    parser.add_argument("--output-dir", default=str(Path(__file__).parent / "results"))
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    load_test = LoadTest(
+        client_url=args.client_url,
+        telegram_url=args.telegram_url,
+        rate=args.rate,
+        duration=args.duration,
+        mix=args.mix,
+        users=args.users,
+        seed=args.seed,
+    )
+    results = asyncio.run(load_test.run())
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print(format_report(results, baseline))
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output_path.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
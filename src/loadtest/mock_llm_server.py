@@ -0,0 +1,346 @@
+"""
+OpenAI-compatible mock LLM server for offline load and performance testing.
+
+Serves `/v1/chat/completions` (including SSE streaming) and `/v1/models` with templated responses
+in the XML, JSON and code-action formats of the agent's processors. The format is detected from
+the system prompt (or the constrained decoding fields), so the agent service and the whole client
+loop can run against it unchanged: the first request of a conversation gets a tool call for the
+symbol mentioned by the user, and a follow-up carrying tool results gets a final answer.
+
+Latency is simulated per request as queueing for one of `max_concurrency` slots, then the
+time-to-first-token, then decoding at `tokens_per_sec`. Stop sequences and `max_tokens` are
+honoured like a real backend, and injected errors and format drift are drawn from a seeded RNG.
+
+Usage:
+    python -m src.loadtest.mock_llm_server --profile gpu --port 5001
+    LLM_API_URL=http://localhost:5001/v1 python -m src.agent.run
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+COINS = {"BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "BNB", "TON"}
+COIN_NAMES = {"bitcoin": "BTC", "ethereum": "ETH", "solana": "SOL", "dogecoin": "DOGE"}
+_TICKER_RE = re.compile(r"\b[A-Z]{2,5}\b")
+# Follow-up requests of the client loop carry the tool results
+_RESULTS_RE = re.compile(r"here are the results|observation:|function results", re.IGNORECASE)
+_DRIFT = '\n\nHope this helps! Raw data: {"note": "not financial advice"}'
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Simulated backend behaviour.
+
+    Attributes:
+        ttft: Time to first token in seconds
+        tokens_per_sec: Decode speed; 0 disables decode delay
+        jitter: Relative random variation of ttft and decode time
+        error_rate: Share of requests answered with `error_status`
+        error_status: HTTP status of injected errors
+        max_concurrency: Number of requests generated at once; others queue. 0 means unlimited
+        drift_rate: Share of unconstrained responses followed by extra chatter, as models do
+            when they ignore "stop responding after the block"
+    """
+
+    ttft: float = 0.2
+    tokens_per_sec: float = 50.0
+    jitter: float = 0.1
+    error_rate: float = 0.0
+    error_status: int = 503
+    max_concurrency: int = 0
+    drift_rate: float = 0.0
+
+
+PROFILES: Dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(ttft=0.0, tokens_per_sec=0.0, jitter=0.0),
+    "gpu": LatencyProfile(ttft=0.15, tokens_per_sec=80.0, max_concurrency=8),
+    "cpu": LatencyProfile(ttft=1.0, tokens_per_sec=12.0, max_concurrency=2),
+    "flaky": LatencyProfile(ttft=0.2, tokens_per_sec=50.0, error_rate=0.1, drift_rate=0.2),
+}
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split text into pseudo-tokens of about four characters."""
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def detect_format(payload: Dict[str, Any]) -> str:
+    """Detect the response format a request expects: "xml", "json" or "code"."""
+    if "grammar" in payload:
+        return "xml"
+    if "response_format" in payload:
+        return "json"
+    messages = payload.get("messages") or []
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    if "End Action" in system:
+        return "code"
+    if "<response>" in system:
+        return "xml"
+    return "json"
+
+
+def _symbol(text: str) -> str:
+    lowered = text.lower()
+    for name, symbol in COIN_NAMES.items():
+        if name in lowered:
+            return symbol
+    for ticker in _TICKER_RE.findall(text):
+        if ticker not in {"I", "AI", "OK", "JSON", "XML", "USD"}:
+            return ticker
+    return "BTC"
+
+
+def plan(messages: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Pick the thought and actions of a response from the conversation.
+
+    Args:
+        messages: Chat messages of the request
+
+    Returns:
+        Tuple[str, List[Dict[str, str]]]: Thought and actions in the processors' action format
+    """
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    symbol = _symbol(user)
+    if _RESULTS_RE.search(user):
+        answer = f"Based on the collected data, {symbol} looks stable today. This is not financial advice."
+        return "", [{"name": "response_to_user", "argument": answer}]
+
+    lowered = user.lower()
+    kind = "coin" if symbol in COINS else "stock"
+    if "news" in lowered:
+        actions = [{"name": "get_coin_news", "argument": symbol}] if kind == "coin" else [{"name": "get_market_news"}]
+    elif any(word in lowered for word in ("history", "trend", "week", "month")):
+        actions = [{"name": f"get_{kind}_history", "argument": symbol}]
+    else:
+        actions = [{"name": f"get_{kind}_price", "argument": symbol}]
+    return f"The user asks about {symbol}; I need {actions[0]['name']} first.", actions
+
+
+def render(response_format: str, thought: str, actions: List[Dict[str, str]]) -> str:
+    """Render a response in the given format."""
+    if response_format == "xml":
+        body = "".join(
+            "        <action>\n            <name>{}</name>\n{}        </action>\n".format(
+                action["name"],
+                f"            <argument>{action['argument']}</argument>\n" if "argument" in action else "",
+            )
+            for action in actions
+        )
+        return f"<response>\n    <thought>{thought}</thought>\n    <actions>\n{body}    </actions>\n</response>"
+    if response_format == "json":
+        return "```json\n{}\n```".format(json.dumps({"thought": thought, "actions": actions}, indent=2))
+
+    final = actions[0]["name"] == "response_to_user"
+    if final:
+        return f"Thought: {thought or 'I have the data.'}\nAnswer: {actions[0]['argument']}"
+    calls = "\n".join(
+        f"{action['name']}({json.dumps(action['argument']) if 'argument' in action else ''})" for action in actions
+    )
+    return f"Thought: {thought}\nAction:\n{calls}\nEnd Action"
+
+
+def apply_limits(text: str, stop: Optional[Any], max_tokens: Optional[int]) -> Tuple[List[str], str]:
+    """
+    Cut generated text at the first stop sequence or at `max_tokens`, like a real backend.
+
+    Returns:
+        Tuple[List[str], str]: Generated tokens and the finish reason ("stop" or "length")
+    """
+    stops = [stop] if isinstance(stop, str) else stop or []
+    positions = [text.find(s) for s in stops if s and s in text]
+    if positions:
+        text = text[: min(positions)]
+    tokens = split_tokens(text)
+    if max_tokens is not None and len(tokens) > max_tokens:
+        return tokens[:max_tokens], "length"
+    return tokens, "stop"
+
+
+class MockLLMServer:
+    """
+    OpenAI-compatible stand-in for an LLM backend.
+
+    Attributes:
+        profile: Simulated latency, errors and concurrency
+        response_format: Force a response format instead of detecting it ("xml", "json", "code")
+    """
+
+    def __init__(
+        self,
+        profile: Optional[LatencyProfile] = None,
+        response_format: Optional[str] = None,
+        seed: int = 0,
+        model: str = "mock-llm",
+    ):
+        self.profile = profile or LatencyProfile()
+        self.response_format = response_format
+        self.model = model
+        self._rng = random.Random(seed)
+        self._slots = asyncio.Semaphore(self.profile.max_concurrency) if self.profile.max_concurrency > 0 else None
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.peak_active = 0
+        self.completion_tokens = 0
+
+    def _jittered(self, seconds: float) -> float:
+        if not self.profile.jitter:
+            return seconds
+        return max(0.0, seconds * (1 + self._rng.uniform(-self.profile.jitter, self.profile.jitter)))
+
+    def _decode_delay(self, tokens: int) -> float:
+        if self.profile.tokens_per_sec <= 0:
+            return 0.0
+        return self._jittered(tokens / self.profile.tokens_per_sec)
+
+    def _generate(self, payload: Dict[str, Any]) -> Tuple[List[str], str, int]:
+        messages = payload.get("messages") or []
+        response_format = self.response_format or detect_format(payload)
+        text = render(response_format, *plan(messages))
+        constrained = "grammar" in payload or "response_format" in payload
+        if not constrained and self._rng.random() < self.profile.drift_rate:
+            text += _DRIFT
+        tokens, finish_reason = apply_limits(text, payload.get("stop"), payload.get("max_tokens"))
+        prompt_tokens = sum(len(split_tokens(str(m.get("content", "")))) for m in messages)
+        return tokens, finish_reason, prompt_tokens
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.requests += 1
+        if self._rng.random() < self.profile.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"error": {"message": "Injected error"}}, status=self.profile.error_status, headers={"Retry-After": "0"}
+            )
+
+        if self._slots is None:
+            return await self._serve(request, payload)
+        async with self._slots:
+            return await self._serve(request, payload)
+
+    async def _serve(self, request: web.Request, payload: Dict[str, Any]) -> web.StreamResponse:
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            tokens, finish_reason, prompt_tokens = self._generate(payload)
+            await asyncio.sleep(self._jittered(self.profile.ttft))
+            if payload.get("stream"):
+                return await self._stream(request, tokens, finish_reason)
+
+            await asyncio.sleep(self._decode_delay(len(tokens)))
+            self.completion_tokens += len(tokens)
+            return web.json_response(
+                {
+                    "id": f"chatcmpl-mock-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model", self.model),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(tokens),
+                        "total_tokens": prompt_tokens + len(tokens),
+                    },
+                }
+            )
+        finally:
+            self.active -= 1
+
+    async def _stream(self, request: web.Request, tokens: List[str], finish_reason: str) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        delay = self._decode_delay(1)
+        try:
+            for token in tokens:
+                chunk = {"choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.completion_tokens += 1
+                if delay:
+                    await asyncio.sleep(delay)
+            chunk = {"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode())
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The client closed the stream early, so generation stops like on a real backend
+            logger.debug("Client closed the stream")
+            raise
+        return response
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": self.model, "object": "model"}]})
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, error and token counters and the simulated profile."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "active": self.active,
+            "peak_active": self.peak_active,
+            "completion_tokens": self.completion_tokens,
+            "profile": asdict(self.profile),
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.completions)
+        app.router.add_get("/v1/models", self.models)
+        app.router.add_get("/stats", self.stats_handler)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="gpu", help="Base latency profile")
+    parser.add_argument("--format", choices=["xml", "json", "code"], help="Force a response format")
+    parser.add_argument("--ttft", type=float, help="Time to first token in seconds")
+    parser.add_argument("--tokens-per-sec", type=float, help="Decode speed")
+    parser.add_argument("--error-rate", type=float, help="Share of requests that fail")
+    parser.add_argument("--max-concurrency", type=int, help="Requests generated at once, 0 for unlimited")
+    parser.add_argument("--drift-rate", type=float, help="Share of unconstrained responses with extra chatter")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for jitter, errors and drift")
+    args = parser.parse_args()
+
+    overrides = {
+        field: value
+        for field, value in (
+            ("ttft", args.ttft),
+            ("tokens_per_sec", args.tokens_per_sec),
+            ("error_rate", args.error_rate),
+            ("max_concurrency", args.max_concurrency),
+            ("drift_rate", args.drift_rate),
+        )
+        if value is not None
+    }
+    profile = replace(PROFILES[args.profile], **overrides)
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Starting mock LLM server with profile {profile}")
+    web.run_app(
+        MockLLMServer(profile, response_format=args.format, seed=args.seed).app(), host=args.host, port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Mock market-data backends for offline load testing.
+
+Serves the subset of the CoinAPI, Alpha Vantage, NewsAPI and Telegram Bot APIs used by the client
+and Telegram services, with deterministic data and configurable latency and error rate. Point the
+services at it with:
+
+    COINAPI_BASE_URL=http://localhost:5002/v1
+    ALPHA_VANTAGE_BASE_URL=http://localhost:5002
+    NEWSAPI_BASE_URL=http://localhost:5002/v2
+    TELEGRAM_BASE_URL=http://localhost:5002/bot
+
+Usage:
+    python -m src.loadtest.mock_market_server --port 5002 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+HEADLINES = [
+    "{topic} rallies as investors weigh rate outlook",
+    "Analysts split on {topic} after volatile week",
+    "{topic} volume climbs to monthly high",
+    "Regulators comment on {topic} market structure",
+    "Institutional demand for {topic} keeps growing",
+]
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.rstrip("Z")).replace(tzinfo=timezone.utc)
+
+
+class MockMarketServer:
+    """
+    Deterministic stand-in for the market-data and Telegram APIs.
+
+    Attributes:
+        latency: Response delay in seconds
+        error_rate: Share of requests answered with HTTP 500
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.sent_messages = 0
+
+    @staticmethod
+    def price_series(symbol: str, days: int) -> List[float]:
+        """Daily closing prices of a symbol, identical across runs."""
+        rng = random.Random(zlib.crc32(symbol.encode("utf-8")))
+        price = rng.uniform(10, 1000)
+        series = []
+        for _ in range(days):
+            price *= 1 + rng.gauss(0, 0.02)
+            series.append(round(price, 4))
+        return series
+
+    @web.middleware
+    async def simulate(self, request: web.Request, handler) -> web.StreamResponse:
+        api = request.path.split("/")[1] if request.path.count("/") > 1 else request.path.strip("/")
+        self.requests[api] = self.requests.get(api, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.path != "/stats" and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "Injected error"}, status=500)
+        return await handler(request)
+
+    async def coin_history(self, request: web.Request) -> web.Response:
+        end = _parse_time(request.query["time_end"]) if "time_end" in request.query else datetime.now(timezone.utc)
+        start = _parse_time(request.query["time_start"]) if "time_start" in request.query else end - timedelta(30)
+        days = max(1, min(int(request.query.get("limit", 100)), (end - start).days))
+        prices = self.price_series(request.match_info["symbol"].upper(), days)
+        rows = []
+        for offset, close in enumerate(prices):
+            day = (end - timedelta(days=days - offset)).replace(hour=0, minute=0, second=0, microsecond=0)
+            rows.append(
+                {
+                    "time_period_start": day.isoformat().replace("+00:00", ".0000000Z"),
+                    "time_period_end": (day + timedelta(days=1)).isoformat().replace("+00:00", ".0000000Z"),
+                    "rate_open": close,
+                    "rate_high": close,
+                    "rate_low": close,
+                    "rate_close": close,
+                }
+            )
+        return web.json_response(rows)
+
+    async def stock_query(self, request: web.Request) -> web.Response:
+        symbol = request.query.get("symbol", "SPY").upper()
+        days = 100 if request.query.get("outputsize", "compact") == "compact" else 1000
+        today = datetime.now(timezone.utc).date()
+        series = {}
+        for offset, close in enumerate(reversed(self.price_series(symbol, days))):
+            series[(today - timedelta(days=offset)).isoformat()] = {
+                "1. open": f"{close * 0.995:.4f}",
+                "2. high": f"{close * 1.01:.4f}",
+                "3. low": f"{close * 0.99:.4f}",
+                "4. close": f"{close:.4f}",
+                "5. volume": str(1000000 + offset),
+            }
+        return web.json_response({"Meta Data": {"2. Symbol": symbol}, "Time Series (Daily)": series})
+
+    async def news_everything(self, request: web.Request) -> web.Response:
+        topic = request.query.get("q", "markets").split(" OR ")[-1]
+        page_size = int(request.query.get("pageSize", 20))
+        published = datetime.now(timezone.utc).replace(microsecond=0)
+        articles = [
+            {
+                "source": {"id": None, "name": "Mock Wire"},
+                "author": "Mock Reporter",
+                "title": HEADLINES[index % len(HEADLINES)].format(topic=topic),
+                "description": f"Coverage of {topic} from the mock newswire.",
+                "url": f"https://example.com/news/{zlib.crc32(topic.encode('utf-8'))}/{index}",
+                "urlToImage": None,
+                "publishedAt": (published - timedelta(hours=index)).isoformat().replace("+00:00", "Z"),
+                "content": f"Markets reacted to the latest developments around {topic}.",
+            }
+            for index in range(page_size)
+        ]
+        return web.json_response({"status": "ok", "totalResults": len(articles), "articles": articles})
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data: Dict[str, Any] = {}
+        if request.can_read_body:
+            data = await request.json() if request.content_type == "application/json" else dict(await request.post())
+        if method == "getMe":
+            result: Any = {"id": 1, "is_bot": True, "first_name": "Mock", "username": "mock_bot"}
+        elif method == "sendMessage":
+            self.sent_messages += 1
+            result = {
+                "message_id": self.sent_messages,
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+                "text": data.get("text", ""),
+            }
+        elif method == "getUpdates":
+            # Long polling without updates
+            await asyncio.sleep(min(float(data.get("timeout", 0) or 0), 1.0))
+            result = []
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def stats_handler(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"requests": self.requests, "errors": self.errors, "sent_messages": self.sent_messages}
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.simulate])
+        app.router.add_get("/v1/exchangerate/{symbol}/{currency}/history", self.coin_history)
+        app.router.add_get("/query", self.stock_query)
+        app.router.add_get("/v2/everything", self.news_everything)
+        app.router.add_post("/bot{token}/{method}", self.telegram)
+        app.router.add_get("/bot{token}/{method}", self.telegram)
+        app.router.add_get("/stats", self.stats_handler)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock market-data and Telegram Bot API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5002)
+    parser.add_argument("--latency", type=float, default=0.05, help="Response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for injected errors")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockMarketServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import json
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 
 import httpx
 
+from src.common import tracing
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,14 +50,56 @@ class ClientServiceConnector:
             Exception: For any other errors during the request
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
-                logger.info(f"Sending request to {endpoint} with data: {data}")
-                response = await client.post(f"{self.base_url}/{endpoint}", json=data)
-                response.raise_for_status()
-                return response.json()
+            with tracing.start_span(f"client.{endpoint}", "http", {"peer": "client"}):
+                # The trace continues in the client service through the header and the message metadata
+                data = {**data, "metadata": tracing.inject(dict(data.get("metadata") or {}))}
+                async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
+                    logger.info(f"Sending request to {endpoint} with data: {data}")
+                    response = await client.post(f"{self.base_url}/{endpoint}", json=data, headers=tracing.inject({}))
+                    response.raise_for_status()
+                    return response.json()
         except httpx.TimeoutException as e:
             logger.error(f"Timeout error while connecting to client API: {str(e)}")
             raise
         except Exception as e:
             logger.error(f"Error sending request to client API: {str(e)}")
             raise
+
+    async def stream_request(self, endpoint: str, data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Send an HTTP POST request to a streaming client API endpoint and yield its events.
+
+        The endpoint is called with `stream=true` and answers with newline-delimited JSON.
+
+        Args:
+            endpoint (str): The API endpoint to send the request to
+            data (Dict[str, Any]): The request payload to send
+
+        Yields:
+            Dict[str, Any]: Events in the order the client service sends them
+
+        Raises:
+            httpx.TimeoutException: If the request times out
+            Exception: For any other errors during the request
+        """
+        try:
+            with tracing.start_span(f"client.{endpoint}", "http", {"peer": "client", "stream": True}):
+                data = {**data, "metadata": tracing.inject(dict(data.get("metadata") or {}))}
+                async with httpx.AsyncClient(timeout=self.timeout_settings) as client:
+                    logger.info(f"Streaming request to {endpoint} with data: {data}")
+                    async with client.stream(
+                        "POST",
+                        f"{self.base_url}/{endpoint}",
+                        params={"stream": "true"},
+                        json=data,
+                        headers=tracing.inject({}),
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if line.strip():
+                                yield json.loads(line)
+        except httpx.TimeoutException as e:
+            logger.error(f"Timeout error while streaming from client API: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming from client API: {str(e)}")
+            raise
@@ -1,4 +1,6 @@
 import logging
+import os
+from typing import Optional
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -12,8 +14,10 @@ from telegram.ext import (
     MessageHandler as TelegramMessageHandler,
 )
 
+from src.common import tracing
 from src.common.interfaces import ServiceConnector
 from src.telegram_server.button_texts import ButtonText
+from src.telegram_server.streaming import StreamProgress, ThrottledMessageEditor
 
 # Define states for the conversation
 MENU, PORTFOLIO, ANALYZE, RECOMMEND, UPDATE_PORTFOLIO = range(5)
@@ -39,6 +43,9 @@ class MessageHandler:
         self.confirm_markup = InlineKeyboardMarkup(
             [[InlineKeyboardButton("Yes", callback_data="yes"), InlineKeyboardButton("No", callback_data="no")]]
         )
+        # Stream the agent's progress into the reply, editing it at most once per interval
+        self.streaming = os.getenv("TELEGRAM_STREAMING", "true").lower() == "true"
+        self.edit_interval = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.0"))
         self.logger = logging.getLogger(__name__)
         self.logger.info("MessageHandler initialized")
 
@@ -121,37 +128,72 @@ class MessageHandler:
         return UPDATE_PORTFOLIO
 
     async def analyze(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.callback_query.message.reply_text("Analyzing market conditions...", reply_markup=self.empty_markup)
-        response = await self.connector.send_request(
-            "process_message",
-            {
-                "user_id": str(update.effective_user.id),
-                "content": "Analyze current market conditions and provide insight into trends",
-                "llm_type": "",
-            },
-        )
-        await update.callback_query.message.reply_text(
-            response.get("message", "Failed to analyze market conditions"),
-            reply_markup=self.return_to_menu_markup,
+        await self._reply_with_agent(
+            update,
+            "Analyzing market conditions...",
+            "Analyze current market conditions and provide insight into trends",
+            "Failed to analyze market conditions",
+            placeholder_markup=self.empty_markup,
         )
         return MENU
 
     async def recommend(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.callback_query.message.reply_text("Generating investment recommendations...")
-        response = await self.connector.send_request(
-            "process_message",
-            {
-                "user_id": str(update.effective_user.id),
-                "content": "Provide investment recommendations according to the current state of the market trends. As a result give a broad overview of the market based on the latest news and in the end add a list with the recomendation what should be bought and what should be avoided and other recomendations you found useful. While giving recomendation return the brief news summary and make sure that you provide the symbols of the stocks (crypto) you recommend. Recommend only reflecting by the news and not by your own knowledge.",
-                "llm_type": "",
-            },
-        )
-        await update.callback_query.message.reply_text(
-            response.get("message", "Failed to generate recommendations"),
-            reply_markup=self.return_to_menu_markup,
+        await self._reply_with_agent(
+            update,
+            "Generating investment recommendations...",
+            "Provide investment recommendations according to the current state of the market trends. As a result give a broad overview of the market based on the latest news and in the end add a list with the recomendation what should be bought and what should be avoided and other recomendations you found useful. While giving recomendation return the brief news summary and make sure that you provide the symbols of the stocks (crypto) you recommend. Recommend only reflecting by the news and not by your own knowledge.",
+            "Failed to generate recommendations",
         )
         return MENU
 
+    async def _reply_with_agent(
+        self,
+        update: Update,
+        placeholder: str,
+        content: str,
+        failure_text: str,
+        placeholder_markup: Optional[InlineKeyboardMarkup] = None,
+    ):
+        """Answer a button with the agent's response to `content`.
+
+        With streaming enabled, the placeholder message is edited as the agent thinks, runs tools
+        and writes its answer; otherwise the response is sent as a new message once it is complete.
+
+        Args:
+            update: Telegram update object
+            placeholder: Text shown until the agent responds
+            content: Message for the agent
+            failure_text: Text shown if the agent fails
+            placeholder_markup: Keyboard of the placeholder message
+        """
+        data = {"user_id": str(update.effective_user.id), "content": content, "llm_type": ""}
+        placeholder_message = await update.callback_query.message.reply_text(
+            placeholder, reply_markup=placeholder_markup
+        )
+        if not self.streaming:
+            response = await self.connector.send_request("process_message", data)
+            await update.callback_query.message.reply_text(
+                response.get("message", failure_text),
+                reply_markup=self.return_to_menu_markup,
+            )
+            return
+
+        editor = ThrottledMessageEditor(placeholder_message, self.edit_interval)
+        progress = StreamProgress(placeholder)
+        final_text = failure_text
+        try:
+            async for event in self.connector.stream_request("process_message", data):
+                if event.get("event") == "final":
+                    final_text = event.get("message") or failure_text
+                elif event.get("event") == "error":
+                    self.logger.error(f"Agent failed: {event.get('error')}")
+                else:
+                    progress.apply(event)
+                    await editor.update(progress.render())
+        except Exception as e:
+            self.logger.error(f"Error streaming agent response: {str(e)}")
+        await editor.finish(final_text, reply_markup=self.return_to_menu_markup)
+
     async def update_portfolio(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.callback_query.message.reply_text(
             "Please write your updated stock preferences in the following format: 'AAPL, TSLA, AMZN, etc.'"
@@ -163,24 +205,31 @@ class MessageHandler:
         user_input = update.message.text
         self.logger.info(f"Received portfolio update: {user_input}")
 
-        response = await self.connector.send_request(
-            "process_message",
-            {
-                "user_id": str(update.effective_user.id),
-                "content": f"Update portfolio: [{user_input}]",
-                "llm_type": "",
-            },
-        )
+        with tracing.start_span("telegram.update_portfolio", attributes={"user_id": str(update.effective_user.id)}):
+            response = await self.connector.send_request(
+                "process_message",
+                {
+                    "user_id": str(update.effective_user.id),
+                    "content": f"Update portfolio: [{user_input}]",
+                    "llm_type": "",
+                },
+            )
 
-        await update.message.reply_text(
-            response.get("message", "Failed to update portfolio"),
-            reply_markup=self.return_to_menu_markup,
-        )
+            await update.message.reply_text(
+                response.get("message", "Failed to update portfolio"),
+                reply_markup=self.return_to_menu_markup,
+            )
         return MENU
 
     async def button_click(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         self.logger.info(f"Button clicked: {query.data}")
+        # Each click starts a trace that follows the request through the client and agent services
+        with tracing.start_span("telegram.button_click", attributes={"button": str(query.data)}):
+            return await self._handle_button(update, context)
+
+    async def _handle_button(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
         await query.answer()
         await query.message.edit_reply_markup(reply_markup=self.empty_markup)
         if query.data == ButtonText.PORTFOLIO:
@@ -0,0 +1,188 @@
+"""
+Progressive display of streamed agent output in a Telegram message.
+
+Telegram rate-limits message edits (roughly one per second per chat), so the editor coalesces
+updates: at most one edit per interval, always showing the latest text, with the last pending
+text flushed at the end of the interval even if no further updates arrive.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from telegram import InlineKeyboardMarkup, Message
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Maximum length of a Telegram text message
+MESSAGE_LIMIT = 4096
+
+FINAL_ACTION = "response_to_user"
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Split text into parts that fit in a Telegram message, preferring line breaks.
+
+    Args:
+        text: Text to split
+        limit: Maximum length of a part
+
+    Returns:
+        List[str]: Non-empty parts in order
+    """
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    return parts + [text] if text or not parts else parts
+
+
+class StreamProgress:
+    """
+    Text shown while the agent works, built from the agent loop's events.
+
+    Shows the current thought and the tools being run; once the answer starts streaming, shows
+    the answer text instead.
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        self.thought = ""
+        self.tools: List[Dict[str, Any]] = []
+        self.answer = ""
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """Update the progress with an agent loop event."""
+        kind = event.get("event")
+        if kind == "step":
+            # A new completion: a partial answer of the previous one was not final
+            self.answer = ""
+        elif kind == "thought":
+            self.thought = event.get("thought") or ""
+        elif kind == "answer_delta":
+            self.answer += event.get("text", "")
+        elif kind == "action" and event["action"].get("name") != FINAL_ACTION:
+            self.tools.append({"action": event["action"], "status": "running"})
+        elif kind == "tool_result":
+            for tool in self.tools:
+                if tool["action"] == event.get("action") and tool["status"] == "running":
+                    tool["status"] = "failed" if "error" in event.get("result", {}) else "done"
+                    break
+
+    def render(self) -> str:
+        """Text for the progress message."""
+        if self.answer:
+            return self.answer
+        lines = [self.title]
+        if self.thought:
+            lines += ["", self.thought]
+        if self.tools:
+            lines.append("")
+        icons = {"running": "⏳", "done": "✅", "failed": "⚠️"}
+        for tool in self.tools:
+            argument = tool["action"].get("argument")
+            label = tool["action"]["name"] + (f" {argument}" if isinstance(argument, str) and argument else "")
+            lines.append(f"{icons[tool['status']]} {label}")
+        return "\n".join(lines)
+
+
+def _seconds(retry_after: Any) -> float:
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class ThrottledMessageEditor:
+    """
+    Progressively edits one Telegram message without exceeding the edit rate limit.
+
+    Attributes:
+        message: The message being edited, e.g. a "Generating..." placeholder
+        min_interval: Minimum time between two edits in seconds
+    """
+
+    def __init__(self, message: Message, min_interval: float = 1.0):
+        self.message = message
+        self.min_interval = min_interval
+        self._shown = message.text or ""
+        self._pending: Optional[str] = None
+        self._next_edit = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def update(self, text: str) -> None:
+        """
+        Show `text` in the message.
+
+        Edits right away if the interval since the last edit has passed, otherwise at its end;
+        texts superseded in the meantime are never shown.
+
+        Args:
+            text: Full text to show, truncated to the message length limit
+        """
+        self._pending = text[:MESSAGE_LIMIT]
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        delay = self._next_edit - time.monotonic()
+        if delay <= 0:
+            await self._flush()
+        else:
+            self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        """
+        Replace the progress with the final text; text over the length limit continues in replies.
+
+        Args:
+            text: Final text
+            reply_markup: Keyboard attached to the last part
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        self._pending = None
+        await asyncio.sleep(max(0.0, self._next_edit - time.monotonic()))
+
+        parts = split_message(text)
+        first, rest = parts[0], parts[1:]
+        try:
+            await self._edit(first, reply_markup=None if rest else reply_markup)
+        except BadRequest as e:
+            logger.warning(f"Failed to edit message with the final text: {str(e)}")
+            rest = parts
+        for index, part in enumerate(rest):
+            await self.message.reply_text(part, reply_markup=reply_markup if index == len(rest) - 1 else None)
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._flush()
+
+    async def _flush(self) -> None:
+        text, self._pending = self._pending, None
+        if text is None or text == self._shown:
+            return
+        try:
+            await self._edit(text)
+        except BadRequest as e:
+            # Progress edits are best effort; the final text is still sent by `finish`
+            logger.warning(f"Failed to edit progress message: {str(e)}")
+
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        for _ in range(2):
+            self._next_edit = time.monotonic() + self.min_interval
+            try:
+                await self.message.edit_text(text, reply_markup=reply_markup)
+                self._shown = text
+                return
+            except RetryAfter as e:
+                logger.warning(f"Telegram asked to retry the edit after {e.retry_after}")
+                self._next_edit = time.monotonic() + _seconds(e.retry_after)
+                await asyncio.sleep(_seconds(e.retry_after))
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    self._shown = text
+                    return
+                raise
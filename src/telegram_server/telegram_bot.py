@@ -9,6 +9,8 @@ from pydantic import BaseModel
 from telegram import Bot
 from telegram.ext import Application
 
+from src.common.metrics import instrument_app
+from src.common.tracing import trace_app
 from src.telegram_server.connectors import ClientServiceConnector
 from src.telegram_server.message_handler import MessageHandler
 
@@ -36,6 +38,8 @@ class IvanTelegramBot:
 
         # Core components initialization
         self.token = os.getenv("TELEGRAM_BOT_TOKEN")
+        # Overridable to point the bot at a local mock of the Bot API
+        self.base_url = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
         self.connector = ClientServiceConnector(base_url=os.getenv("CLIENT_SERVICE_URL", "http://client:8000"))
         self.message_handler = MessageHandler(self.connector)
 
@@ -47,7 +51,9 @@ class IvanTelegramBot:
         logging.info("IvanTelegramBot initialized")
 
     def setup_http_endpoints(self):
-        """Configure FastAPI endpoints for external message sending."""
+        """Configure FastAPI endpoints for external message sending, metrics and traces."""
+        instrument_app(self.app, "telegram")
+        trace_app(self.app, "telegram")
 
         @self.app.post("/send_message")
         async def send_message(request: MessageRequest):
@@ -68,7 +74,7 @@ class IvanTelegramBot:
             message: Text message to send
         """
         if self.bot is None:
-            self.bot = Bot(token=self.token)
+            self.bot = Bot(token=self.token, base_url=self.base_url)
         await self.bot.send_message(chat_id=chat_id, text=message)
 
     async def post_init(self, application: Application):
@@ -106,7 +112,7 @@ class IvanTelegramBot:
         http_thread.start()
 
         # Configure and start Telegram bot
-        app = Application.builder().token(self.token).post_init(self.post_init).build()
+        app = Application.builder().token(self.token).base_url(self.base_url).post_init(self.post_init).build()
         self.setup_handlers(app)
         app.run_polling()
 
@@ -0,0 +1,100 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.budget import GenerationBudget
+from src.agent.llm.lmstudio_llm import LMStudioProcessor
+from src.agent.llm.xml_llm import XmlProcessor
+from src.common.interfaces import Message
+
+
+def test_default_budget_until_enough_samples():
+    budget = GenerationBudget(default_tokens=1024, min_samples=3)
+    budget.record("get_news", 40)
+    budget.record("get_news", 40)
+
+    assert budget.max_tokens() == 1024
+    budget.record("get_news", 40)
+    assert budget.max_tokens() == 128
+    assert GenerationBudget(adaptive=False, min_samples=0).max_tokens() == 1024
+
+
+def test_budget_covers_longest_action_type():
+    budget = GenerationBudget(min_samples=10, min_tokens=16, headroom=1.5)
+    for _ in range(50):
+        budget.record("get_coin_price", 60)
+    for _ in range(2):
+        budget.record("response_to_user", 400)
+
+    assert budget.max_tokens() == 600
+    assert budget.stats()["percentiles"] == {"get_coin_price": 60, "response_to_user": 400}
+
+
+def test_truncation_grows_budget_up_to_limit():
+    budget = GenerationBudget(min_samples=1, min_tokens=16, headroom=1.0, max_tokens_limit=1000)
+    budget.record("get_news", 100)
+    assert budget.max_tokens() == 100
+
+    budget.record("none", 100, truncated=True)
+    assert budget.max_tokens() == 200
+    budget.record("none", 800, truncated=True)
+    assert budget.max_tokens() == 1000
+    assert budget.stats()["truncated"] == 2
+
+
+@pytest.mark.asyncio
+async def test_processor_sends_stop_and_budget_and_restores_closing_tag():
+    payloads = []
+
+    async def completions(request):
+        payloads.append(await request.json())
+        content = "<response><thought>t</thought><actions><action><name>get_news</name></action></actions>"
+        return web.json_response(
+            {
+                "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+                "usage": {"completion_tokens": 30},
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    async with TestServer(app) as server:
+        processor = XmlProcessor()
+        processor.base_url = str(server.make_url("/v1"))
+        processor.generation_budget = GenerationBudget(min_samples=1)
+
+        first = await processor.process_message(Message(content="news", user_id="u1"))
+        await processor.process_message(Message(content="news", user_id="u1"))
+
+    assert first == {"thought": "t", "actions": [{"name": "get_news"}]}
+    assert payloads[0]["stop"] == ["</response>"]
+    assert payloads[0]["max_tokens"] == 1024
+    assert payloads[1]["max_tokens"] == 128
+    assert processor.generation_budget.stats()["percentiles"] == {"get_news": 30}
+
+
+def test_code_action_type_and_restored_end_action():
+    processor = LMStudioProcessor()
+    result = {
+        "choices": [{"message": {"content": 'Thought: x\nAction:\nget_stock_price("AAPL")\n'}, "finish_reason": "stop"}]
+    }
+
+    content = processor._completion_content(result)
+
+    assert content.endswith("End Action")
+    assert processor._action_type(content) == "get_stock_price"
+    assert processor._action_type("Thought: done\nAnswer: buy") == "none"
+
+
+def test_stop_sequence_is_not_added_to_natural_endings():
+    processor = LMStudioProcessor()
+    answer = {"choices": [{"message": {"content": "Thought: done\nAnswer: buy"}, "finish_reason": "stop"}]}
+
+    assert processor._completion_content(answer) == "Thought: done\nAnswer: buy"
+
+    xml = XmlProcessor()
+    closed = "<response><thought>t</thought></response>\nBye"
+    plain = "I cannot answer that."
+    for content in (closed, plain):
+        result = {"choices": [{"message": {"content": content}, "finish_reason": "stop"}]}
+        assert xml._completion_content(result) == content
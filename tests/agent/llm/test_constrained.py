@@ -0,0 +1,98 @@
+import json
+import re
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.constrained import AGENT_TOOLS, DecodingConstraints, action_schema, xml_grammar
+from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.xml_llm import XmlProcessor
+from src.benchmark.benchmark_runner import BenchmarkRunner
+from src.common.interfaces import Message
+
+
+def test_action_schema_follows_tool_list():
+    schema = action_schema()
+    variants = schema["properties"]["actions"]["items"]["anyOf"]
+
+    assert list(schema["properties"]) == ["thought", "actions"]
+    assert [variant["properties"]["name"]["const"] for variant in variants] == list(AGENT_TOOLS)
+    by_name = {variant["properties"]["name"]["const"]: variant for variant in variants}
+    assert by_name["get_coin_price"]["required"] == ["name", "argument"]
+    assert by_name["get_news"]["required"] == ["name"]
+
+
+def test_xml_grammar_defines_every_rule():
+    grammar = xml_grammar({"get_coin_price": True, "get_news": False})
+
+    defined = set(re.findall(r"^([a-z0-9-]+) ::=", grammar, re.MULTILINE))
+    bodies = re.sub(r'"(?:\\.|[^"\\])*"|\[[^\]]*\]', "", grammar)
+    referenced = set(re.findall(r"(?<![\w-])([a-z][a-z0-9-]*)(?![\w-]* ::=)", bodies))
+    assert referenced <= defined
+    assert '"<name>get_coin_price</name>" ws "<argument>" text "</argument>"' in grammar
+    assert 'tool-get-news ::= "<name>get_news</name>"\n' in grammar
+
+
+def test_constraints_from_env(monkeypatch):
+    monkeypatch.delenv("LLM_CONSTRAINED_DECODING", raising=False)
+    assert DecodingConstraints.from_env("json") is None
+
+    monkeypatch.setenv("LLM_CONSTRAINED_DECODING", "true")
+    assert "response_format" in DecodingConstraints.from_env("json").fields
+    assert "grammar" in DecodingConstraints.from_env("xml").fields
+    assert XmlProcessor().constraints.fields == DecodingConstraints.for_xml().fields
+
+
+class ConstrainedStub:
+    """Local OpenAI-compatible stub that only returns well-formed output when constrained."""
+
+    def __init__(self):
+        self.payloads = []
+
+    async def completions(self, request):
+        payload = await request.json()
+        self.payloads.append(payload)
+        if "response_format" in payload:
+            schema = payload["response_format"]["json_schema"]["schema"]
+            symbols = schema["properties"]["actions"]["items"]["properties"]["symbols"]["items"]["enum"][:2]
+            content = json.dumps(
+                {"thought": "Related", "actions": [{"action": "identify_symbols", "symbols": symbols}]}
+            )
+        else:
+            content = 'Sure! {"thought": "Related", "actions": [{"action": "identify_symbols", "symbols": ['
+        return web.json_response({"choices": [{"message": {"content": content}}]})
+
+
+@pytest_asyncio.fixture
+async def stub():
+    stub = ConstrainedStub()
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", stub.completions)
+    server = TestServer(app)
+    await server.start_server()
+    stub.url = str(server.make_url("/v1"))
+    yield stub
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_processor_sends_schema(stub):
+    processor = JsonProcessor()
+    processor.base_url = stub.url
+    processor.constraints = DecodingConstraints.for_json()
+
+    await processor.process_message(Message(content="hi", user_id="u1"))
+
+    assert stub.payloads[-1]["response_format"]["json_schema"]["schema"] == action_schema()
+
+
+@pytest.mark.asyncio
+async def test_benchmark_measures_parse_failures(stub):
+    unconstrained = await BenchmarkRunner(llm_url=stub.url).run_benchmark(num_samples=3)
+    constrained = await BenchmarkRunner(constrained=True, llm_url=stub.url).run_benchmark(num_samples=3)
+
+    assert unconstrained["aggregate_metrics"]["parse_failure_rate"] == 1.0
+    assert constrained["aggregate_metrics"]["parse_failure_rate"] == 0.0
+    assert all(result["predicted_symbols"] for result in constrained["individual_results"])
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.hedging import HedgePolicy
+from src.agent.llm.router import BackendRouter
+from src.agent.llm.xml_llm import XmlProcessor
+
+
+def warmed_policy(latency=0.01, **kwargs):
+    policy = HedgePolicy(min_delay=0.0, min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.record_latency(latency)
+    return policy
+
+
+def test_no_hedging_until_enough_samples():
+    policy = HedgePolicy(min_samples=3)
+    policy.record_latency(1.0)
+
+    assert policy.delay() is None
+    policy.record_latency(1.0)
+    policy.record_latency(1.0)
+    assert policy.delay() == 1.0
+    assert HedgePolicy(enabled=False, min_samples=0).delay() is None
+
+
+def test_disabled_hedging_builds_no_policy(monkeypatch):
+    monkeypatch.delenv("LLM_HEDGE_ENABLED", raising=False)
+    assert HedgePolicy.from_env() is None
+    assert XmlProcessor().hedging is None
+
+    monkeypatch.setenv("LLM_HEDGE_ENABLED", "true")
+    assert HedgePolicy.from_env().enabled
+
+
+@pytest.mark.asyncio
+async def test_fast_completion_is_not_hedged():
+    policy = warmed_policy(latency=1.0)
+    calls = []
+
+    async def attempt(tried):
+        calls.append(list(tried))
+        tried.append("http://a")
+        return "ok"
+
+    assert await policy.run(attempt) == "ok"
+    assert calls == [[]]
+    assert policy.stats()["hedged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_completion_is_hedged_and_loser_cancelled():
+    policy = warmed_policy()
+    cancelled = []
+
+    async def attempt(tried):
+        backend = "http://stuck" if not tried else "http://fast"
+        tried.append(backend)
+        try:
+            await asyncio.sleep(10 if backend == "http://stuck" else 0)
+        except asyncio.CancelledError:
+            cancelled.append(backend)
+            raise
+        return backend
+
+    assert await policy.run(attempt) == "http://fast"
+    assert cancelled == ["http://stuck"]
+
+    stats = policy.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["win_rate"] == 1.0
+    assert 0 < stats["extra_load"] < 1
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_falls_back_to_other_attempt():
+    policy = warmed_policy()
+
+    async def attempt(tried):
+        first = not tried
+        tried.append("x")
+        if first:
+            await asyncio.sleep(0.05)
+            return "primary"
+        raise Exception("API returned status code 500")
+
+    assert await policy.run(attempt) == "primary"
+    assert policy.stats()["hedge_wins"] == 0
+
+
+@pytest.mark.asyncio
+async def test_all_attempts_failing_raises_first_error():
+    policy = warmed_policy()
+
+    async def attempt(tried):
+        tried.append("x")
+        await asyncio.sleep(0.05)
+        raise Exception(f"attempt {len(tried)}")
+
+    with pytest.raises(Exception, match="attempt"):
+        await policy.run(attempt)
+
+
+@pytest.mark.asyncio
+async def test_processor_hedges_stuck_backend():
+    async def stuck(request):
+        await asyncio.sleep(10)
+        return web.json_response({})
+
+    async def fast(request):
+        return web.json_response({"choices": [{"message": {"content": "fast"}}]})
+
+    servers = []
+    for handler in (stuck, fast):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", handler)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+
+    try:
+        processor = XmlProcessor()
+        processor.router = BackendRouter([str(server.make_url("/v1")) for server in servers])
+        processor.hedging = warmed_policy()
+
+        content = await asyncio.wait_for(processor._create_chat_completion([{"role": "user", "content": "hi"}]), 5)
+
+        assert content == "fast"
+        assert processor.hedging.stats()["hedge_wins"] == 1
+        assert all(backend.outstanding == 0 for backend in processor.router.backends)
+    finally:
+        for server in servers:
+            await server.close()
@@ -0,0 +1,44 @@
+import pytest
+
+from src.agent.llm.http_client import HttpPoolConfig, LLMHttpClient
+
+
+def test_pool_config_from_env(monkeypatch):
+    monkeypatch.setenv("LLM_HTTP_POOL_LIMIT", "10")
+    monkeypatch.setenv("LLM_HTTP_KEEPALIVE_TIMEOUT", "5")
+
+    config = HttpPoolConfig.from_env()
+
+    assert config.limit == 10
+    assert config.keepalive_timeout == 5.0
+    assert config.limit_per_host == HttpPoolConfig.limit_per_host
+
+
+@pytest.mark.asyncio
+async def test_session_reused_per_backend():
+    client = LLMHttpClient(HttpPoolConfig(limit=4, limit_per_host=2))
+
+    first = client.session("http://backend-a/v1")
+    second = client.session("http://backend-a/v1")
+    other = client.session("http://backend-b/v1")
+
+    assert first is second
+    assert first is not other
+    assert first.connector.limit == 4
+    assert first.connector.limit_per_host == 2
+
+    await client.close()
+    assert first.closed and other.closed
+
+
+@pytest.mark.asyncio
+async def test_closed_session_is_recreated():
+    client = LLMHttpClient()
+    first = client.session("http://backend-a/v1")
+    await first.close()
+
+    second = client.session("http://backend-a/v1")
+
+    assert second is not first
+    assert not second.closed
+    await client.close()
@@ -0,0 +1,95 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.streaming import AnswerStreamExtractor, JsonActionStreamParser
+from src.common.interfaces import Message
+
+JSON_RESPONSE = """```json
+{
+  "thought": "Check {BTC} and \\"market\\" news.",
+  "actions": [
+    { "name": "get_coin_price", "argument": "BTC" },
+    { "name": "response_to_user", "argument": {"message": "done [1]}"} },
+    { "name": "get_market_news" }
+  ]
+}
+```
+Extra text"""
+
+
+def chunked(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 31, len(JSON_RESPONSE)])
+def test_parser_emits_actions_for_any_chunking(size):
+    parser = JsonActionStreamParser()
+    events = []
+    for chunk in chunked(JSON_RESPONSE, size):
+        events.extend(parser.feed(chunk))
+
+    assert events == [
+        {"event": "thought", "thought": 'Check {BTC} and "market" news.'},
+        {"event": "action", "action": {"name": "get_coin_price", "argument": "BTC"}},
+        {"event": "action", "action": {"name": "response_to_user", "argument": {"message": "done [1]}"}}},
+        {"event": "action", "action": {"name": "get_market_news"}},
+    ]
+    assert parser.done
+    assert parser.error is None
+
+
+def test_parser_emits_action_before_object_is_complete():
+    parser = JsonActionStreamParser()
+
+    events = parser.feed('{"thought": "t", "actions": [{"name": "get_news"}, {"name": "get_co')
+
+    assert events[-1] == {"event": "action", "action": {"name": "get_news"}}
+    assert not parser.done
+
+
+def test_parser_ignores_nested_arrays_outside_actions():
+    parser = JsonActionStreamParser()
+
+    events = parser.feed('{"meta": [{"name": "not_an_action"}], "actions": [{"name": "get_news"}]}')
+
+    assert [event["action"] for event in events] == [{"name": "get_news"}]
+
+
+@pytest.mark.asyncio
+async def test_stream_actions_yields_events():
+    async def fake_stream(self, payload, session_id=None):
+        for chunk in chunked(JSON_RESPONSE, 4):
+            yield chunk
+
+    with patch.object(JsonProcessor, "_stream_chat_completion", fake_stream):
+        processor = JsonProcessor()
+        events = [event async for event in processor.stream_actions(Message(content="hi", user_id="u1"))]
+
+    assert [event["event"] for event in events] == ["thought", "action", "action", "action"]
+
+
+@pytest.mark.asyncio
+async def test_stream_actions_reports_unparseable_output():
+    async def fake_stream(self, payload, session_id=None):
+        yield json.dumps("no json here")[1:-1]
+
+    with patch.object(JsonProcessor, "_stream_chat_completion", fake_stream):
+        processor = JsonProcessor()
+        events = [event async for event in processor.stream_actions(Message(content="hi", user_id="u1"))]
+
+    assert len(events) == 1
+    assert "couldn't parse" in events[0]["thought"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5])
+def test_answer_extractor_streams_decoded_answer(size):
+    response = '{"thought": "t", "actions": [{"name": "response_to_user", "argument": "Say \\"hi\\"\\n\\u00e9 \\ud83d\\ude80"}]}'
+    extractor = AnswerStreamExtractor("json")
+
+    answer = "".join(extractor.feed(chunk) for chunk in chunked(response, size))
+
+    assert answer == 'Say "hi"\né 🚀'
+    assert extractor.done
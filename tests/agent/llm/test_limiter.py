@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from src.agent.llm.limiter import AdaptiveConcurrencyLimiter, LimiterRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_concurrency():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_latency_is_stable():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=16, clock=clock)
+
+    async with limiter.acquire():
+        clock.now += 1.0
+    for _ in range(30):
+        limiter._on_success(1.0, in_flight=limiter.effective_limit)
+
+    assert limiter.effective_limit > 4
+    assert limiter.stats()["last_rtt"] == 1.0
+
+
+def test_limit_is_not_raised_when_it_is_not_the_bottleneck():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    for _ in range(30):
+        limiter._on_success(1.0, in_flight=1)
+
+    assert limiter.effective_limit == 8
+
+
+def test_limit_shrinks_when_latency_degrades():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=64)
+    for _ in range(20):
+        limiter._on_success(1.0, in_flight=20)
+    grown = limiter.limit
+
+    for _ in range(20):
+        limiter._on_success(10.0, in_flight=int(limiter.limit))
+
+    assert limiter.limit < grown
+
+
+@pytest.mark.asyncio
+async def test_failures_back_the_limit_off():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff=0.5)
+
+    with pytest.raises(RuntimeError):
+        async with limiter.acquire():
+            raise RuntimeError("503")
+
+    assert limiter.effective_limit == 5
+    assert limiter.stats()["drops"] == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_keeps_one_limiter_per_backend():
+    registry = LimiterRegistry(initial_limit=3)
+
+    async with registry.acquire("http://a/v1"):
+        assert registry.stats()["http://a/v1"]["in_flight"] == 1
+
+    assert registry.get("http://a/v1") is registry.get("http://a/v1")
+    assert registry.get("http://a/v1") is not registry.get("http://b/v1")
+    assert registry.stats()["http://a/v1"]["limit"] == 3
+
+
+@pytest.mark.asyncio
+async def test_disabled_registry_passes_through():
+    registry = LimiterRegistry(enabled=False)
+
+    async with registry.acquire("http://a/v1"):
+        pass
+
+    assert registry.stats() == {}
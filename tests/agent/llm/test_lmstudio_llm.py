@@ -0,0 +1,30 @@
+import pytest
+
+from src.agent.llm.base_llm import PARSE_FAILURES
+from src.agent.llm.lmstudio_llm import LMStudioProcessor
+from src.common.interfaces import Message
+
+
+@pytest.mark.parametrize(
+    "content, failed",
+    [
+        ('Thought: Check the price.\nAction:\nget_coin_price("BTC")\nEnd Action', False),
+        ("Thought: I know enough.\nAnswer: BTC is trading at 50000 USD.", False),
+        ("Thought: Check the price.\nAction:\nprice of BTC please\nEnd Action", True),
+        ("BTC is trading at 50000 USD.", True),
+    ],
+)
+@pytest.mark.asyncio
+async def test_only_unusable_replies_count_as_parse_failures(monkeypatch, content, failed):
+    processor = LMStudioProcessor()
+
+    async def completion(messages, **kwargs):
+        return content
+
+    monkeypatch.setattr(processor, "_create_chat_completion", completion)
+    failures = PARSE_FAILURES.labels(processor="LMStudioProcessor")
+    before = failures.value
+
+    await processor.process_message(Message(content="What is the BTC price?", user_id="u1"))
+
+    assert failures.value - before == (1 if failed else 0)
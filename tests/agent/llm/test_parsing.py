@@ -0,0 +1,119 @@
+import pytest
+
+from src.agent.llm.parsing import (
+    PARSE_ERROR_PREFIX,
+    ParsedResponse,
+    parse_code_action,
+    parse_json_response,
+    parse_xml_response,
+)
+from src.benchmark.parser_benchmark import GENERATORS, benchmark_parser, build_corpus
+
+SIGNATURES = {"analyze_news": ["symbol", "days"], "get_stock_price": ["symbol"]}
+
+
+def test_parsed_response_uses_slots():
+    parsed = ParsedResponse(thought="t")
+
+    assert not hasattr(parsed, "__dict__")
+    with pytest.raises(AttributeError):
+        parsed.extra = 1
+
+
+def test_xml_response():
+    parsed = parse_xml_response(
+        "Here you go <response><thought>Check</thought><actions>"
+        "<action><name>get_coin_price</name><argument>BTC</argument></action>"
+        "<action><name>get_news</name><argument></argument></action>"
+        "</actions></response> trailing"
+    )
+
+    assert parsed.error is None
+    assert parsed.to_dict() == {
+        "thought": "Check",
+        "actions": [{"name": "get_coin_price", "argument": "BTC"}, {"name": "get_news"}],
+    }
+
+
+@pytest.mark.parametrize(
+    "content, reason",
+    [
+        ("no block", "No XML block found."),
+        ("<response><thought>a & b</thought></response>", "XML parsing error"),
+    ],
+)
+def test_xml_failures_keep_apology_thought(content, reason):
+    parsed = parse_xml_response(content)
+
+    assert parsed.thought.startswith(PARSE_ERROR_PREFIX)
+    assert reason in parsed.error
+    assert parsed.actions == []
+
+
+def test_json_response_with_and_without_fence():
+    body = '{"thought": "t", "actions": [{"name": "get_news"}]}'
+
+    for content in (body, f"```json\n{body}\n```", f"text before {body} text after", f"```json\n{body}"):
+        assert parse_json_response(content).to_dict() == {"thought": "t", "actions": [{"name": "get_news"}]}
+
+
+@pytest.mark.parametrize("content", ["no json", '{"thought": "t", broken}', "[1, 2]"])
+def test_json_failures(content):
+    parsed = parse_json_response(content)
+
+    assert parsed.error
+    assert parsed.thought.startswith(PARSE_ERROR_PREFIX)
+
+
+def test_json_failure_keeps_the_original_message():
+    assert parse_json_response("no json").thought == (
+        "I apologize, but I couldn't parse the response format correctly. _parse_action_block else"
+    )
+
+
+def test_code_action_extracts_all_calls():
+    parsed = parse_code_action(
+        """Thought: Compare both
+Action:
+get_stock_price("AAPL")
+analyze_news("TSLA", days=3)
+report.send(get_stock_price(symbol), limit=2.5)
+End Action""",
+        SIGNATURES,
+    )
+
+    assert parsed.thought == "Compare both"
+    assert parsed.calls == [
+        {"function_name": "get_stock_price", "function_params": {"symbol": "AAPL"}},
+        {"function_name": "analyze_news", "function_params": {"symbol": "TSLA", "days": 3}},
+        {"function_name": "report.send", "function_params": {"param_0": "get_stock_price(symbol)", "limit": 2.5}},
+        {"function_name": "get_stock_price", "function_params": {"symbol": "symbol"}},
+    ]
+    assert parsed.function == parsed.calls[0]
+
+
+def test_code_action_falls_back_to_regex_for_invalid_code():
+    parsed = parse_code_action('Thought: x\nAction:\nget_stock_price("AAPL") then stop\nEnd Action', SIGNATURES)
+
+    assert parsed.function == {"function_name": "get_stock_price", "function_params": {"symbol": "AAPL"}}
+
+
+def test_code_action_without_action_block():
+    parsed = parse_code_action("Thought: done\nAnswer: buy")
+
+    assert parsed.thought == "done"
+    assert parsed.calls == []
+    assert parsed.function == {}
+
+
+def test_benchmark_corpus_is_deterministic_and_mixed():
+    corpus = build_corpus(samples=50, seed=1)
+
+    assert corpus == build_corpus(samples=50, seed=1)
+    assert set(corpus) == set(GENERATORS)
+    for response_format, outputs in corpus.items():
+        stats = benchmark_parser(response_format, outputs, min_time=0)
+        assert stats["samples"] == 50
+        assert stats["parses_per_sec"] > 0
+        # Well-formed samples parse, malformed ones are counted as failures
+        assert 0 < stats["failure_rate"] < 1
@@ -0,0 +1,94 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.prompt_cache import PromptCacheConfig
+from src.agent.llm.router import BackendRouter
+from src.agent.llm.xml_llm import XmlProcessor
+from src.common.interfaces import Message
+
+
+def test_hints_disabled():
+    assert PromptCacheConfig(enabled=False, slots=4).hints("u1") == {}
+
+
+def test_hints_are_opt_in(monkeypatch):
+    monkeypatch.delenv("LLM_PROMPT_CACHE", raising=False)
+    assert PromptCacheConfig.from_env().hints("u1") == {}
+
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "true")
+    assert PromptCacheConfig.from_env().hints("u1") == {"cache_prompt": True}
+
+
+def test_hints_pin_session_to_stable_slot():
+    config = PromptCacheConfig(slots=4)
+
+    hints = config.hints("u1")
+
+    assert hints["cache_prompt"] is True
+    assert 0 <= hints["id_slot"] < 4
+    assert config.hints("u1") == hints
+    assert PromptCacheConfig(slots=4).hints("u1") == hints
+    assert "id_slot" not in PromptCacheConfig().hints("u1")
+    assert "id_slot" not in config.hints(None)
+
+
+def test_router_keeps_session_on_its_backend():
+    router = BackendRouter(["http://a", "http://b"])
+    first = router.choose(affinity="u1")
+    first.outstanding = 5
+
+    assert router.choose(affinity="u1") is first
+    assert router.choose().url != first.url
+    assert first.affinity_hits == 1
+
+
+def test_router_moves_session_off_ejected_or_excluded_backend():
+    router = BackendRouter(["http://a", "http://b"], failure_threshold=1)
+    first = router.choose(affinity="u1")
+
+    assert router.choose(exclude=[first.url], affinity="u1").url != first.url
+
+    router.record_failure(first)
+    moved = router.choose(affinity="u1")
+    assert moved is not first
+    # The session stays on its new backend after the old one recovers
+    router.record_success(first)
+    assert router.choose(affinity="u1") is moved
+
+
+@pytest.mark.asyncio
+async def test_conversation_steps_hit_same_backend_and_slot():
+    payloads = {0: [], 1: []}
+    servers = []
+    for index in payloads:
+
+        async def completions(request, index=index):
+            payloads[index].append(await request.json())
+            return web.json_response({"choices": [{"message": {"content": "<response></response>"}}]})
+
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", completions)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+
+    try:
+        processor = XmlProcessor()
+        processor.router = BackendRouter([str(server.make_url("/v1")) for server in servers])
+        processor.prompt_cache = PromptCacheConfig(slots=8)
+
+        for step in range(3):
+            await processor.process_message(Message(content=f"alice step {step}", user_id="alice"))
+            await processor.process_message(Message(content=f"bob step {step}", user_id="bob"))
+    finally:
+        for server in servers:
+            await server.close()
+
+    for requests in payloads.values():
+        users = {request["messages"][-1]["content"].split()[0] for request in requests}
+        assert len(users) <= 1
+        assert len({request.get("id_slot") for request in requests}) <= 1
+        assert all(request["cache_prompt"] is True for request in requests)
+        assert all(request["messages"][0]["content"] == processor.system_prompt for request in requests)
+    assert sum(len(requests) for requests in payloads.values()) == 6
@@ -0,0 +1,207 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerRegistry,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMBackendError,
+    RetryPolicy,
+)
+from src.agent.llm.router import BackendRouter
+from src.agent.llm.xml_llm import XmlProcessor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def no_sleep_policy(**kwargs):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    return RetryPolicy(sleep=sleep, **kwargs), sleeps
+
+
+@pytest.mark.asyncio
+async def test_retries_retryable_status_until_success():
+    policy, sleeps = no_sleep_policy(max_attempts=3)
+    statuses = [503, 429]
+
+    async def call():
+        if statuses:
+            raise LLMBackendError(statuses.pop(0))
+        return "ok"
+
+    assert await policy.run(call) == "ok"
+    assert len(sleeps) == 2
+    assert policy.stats() == {
+        "calls": 1,
+        "retries": 2,
+        "exhausted": 0,
+        "retries_by_reason": {"503": 1, "429": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_status_is_raised_immediately():
+    policy, sleeps = no_sleep_policy()
+
+    async def call():
+        raise LLMBackendError(400)
+
+    with pytest.raises(LLMBackendError, match="status code 400"):
+        await policy.run(call)
+    assert sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_raise_last_error():
+    policy, sleeps = no_sleep_policy(max_attempts=2)
+
+    async def call():
+        raise LLMBackendError(500)
+
+    with pytest.raises(LLMBackendError):
+        await policy.run(call)
+    assert policy.exhausted == 1
+    assert len(sleeps) == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_is_retried_only_with_another_backend_left():
+    policy, sleeps = no_sleep_policy(max_attempts=3)
+    errors = [CircuitOpenError("open", alternatives_available=True)]
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert await policy.run(call) == "ok"
+
+    async def all_open():
+        raise CircuitOpenError("open")
+
+    with pytest.raises(CircuitOpenError):
+        await policy.run(all_open)
+    assert len(sleeps) == 1
+
+
+def test_backoff_is_jittered_capped_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+
+    for retry in range(6):
+        assert 0 <= policy.backoff(retry) <= min(4.0, 2**retry)
+    assert policy.backoff(0, LLMBackendError(429, retry_after=3)) >= 3
+    assert policy.backoff(0, LLMBackendError(429, retry_after=60)) == 4.0
+
+
+def test_breaker_opens_fails_fast_and_closes_after_probe():
+    clock = FakeClock()
+    transitions = []
+    breaker = CircuitBreaker(
+        "b", failure_threshold=2, reset_timeout=10, clock=clock, on_transition=lambda *t: transitions.append(t[1:])
+    )
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+def test_failed_probe_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.available
+
+
+@pytest.mark.asyncio
+async def test_guard_ignores_client_errors_and_cancellation():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    with pytest.raises(LLMBackendError):
+        async with breaker.guard():
+            raise LLMBackendError(400)
+    with pytest.raises(asyncio.CancelledError):
+        async with breaker.guard():
+            raise asyncio.CancelledError()
+    assert breaker.state == CLOSED
+
+    with pytest.raises(LLMBackendError):
+        async with breaker.guard():
+            raise LLMBackendError(502)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        async with breaker.guard():
+            pass
+
+
+def test_registry_logs_transitions():
+    registry = BreakerRegistry(failure_threshold=1)
+    registry.get("http://a").record_failure()
+
+    stats = registry.stats()
+    assert stats["breakers"]["http://a"]["state"] == OPEN
+    assert stats["transitions"][0]["backend"] == "http://a"
+    assert registry.unavailable() == ["http://a"]
+
+
+@pytest.mark.asyncio
+async def test_processor_retries_on_another_backend():
+    async def overloaded(request):
+        return web.Response(status=503, headers={"Retry-After": "0"})
+
+    async def healthy(request):
+        return web.json_response({"choices": [{"message": {"content": "ok"}}]})
+
+    servers = []
+    for handler in (overloaded, healthy):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", handler)
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+
+    try:
+        processor = XmlProcessor()
+        processor.router = BackendRouter([str(server.make_url("/v1")) for server in servers])
+        processor.hedging = None
+        processor.retry_policy, sleeps = no_sleep_policy()
+
+        content = await processor._create_chat_completion([{"role": "user", "content": "hi"}])
+
+        assert content == "ok"
+        assert processor.retry_policy.stats()["retries_by_reason"] == {"503": 1}
+    finally:
+        for server in servers:
+            await server.close()
@@ -0,0 +1,186 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.resilience import CircuitOpenError, LLMBackendError
+from src.agent.llm.router import BackendRouter, RouterRegistry
+from src.agent.llm.xml_llm import XmlProcessor
+from src.common.interfaces import Message
+
+XML_RESPONSE = """<response>
+    <thought>Check the price.</thought>
+    <actions>
+        <action>
+            <name>get_coin_price</name>
+            <argument>BTC</argument>
+        </action>
+    </actions>
+</response>"""
+
+
+class StubBackend:
+    """Local OpenAI-compatible stub that counts requests and can be slowed down or broken."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.status = 200
+        self.requests = 0
+        self.server = None
+
+    def app(self):
+        async def completions(request):
+            self.requests += 1
+            await asyncio.sleep(self.delay)
+            if self.status != 200:
+                return web.Response(status=self.status)
+            return web.json_response({"choices": [{"message": {"content": XML_RESPONSE}}]})
+
+        async def models(request):
+            return web.json_response({"data": []}, status=self.status)
+
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", completions)
+        app.router.add_get("/v1/models", models)
+        return app
+
+    async def __aenter__(self):
+        self.server = TestServer(self.app())
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.server.close()
+
+    @property
+    def url(self):
+        return str(self.server.make_url("/v1"))
+
+
+def test_choose_prefers_fewest_outstanding():
+    router = BackendRouter(["http://a", "http://b"])
+    router.backends[0].outstanding = 2
+
+    assert router.choose().url == "http://b"
+
+
+def test_choose_weights_outstanding_by_latency():
+    router = BackendRouter(["http://slow", "http://fast"])
+    slow, fast = router.backends
+    slow.latency, fast.latency = 4.0, 1.0
+    fast.outstanding = 2
+
+    # 1 * 4.0 for the idle slow backend vs 3 * 1.0 for the busy fast one
+    assert router.choose().url == "http://fast"
+
+    fast.outstanding = 4
+    assert router.choose().url == "http://slow"
+
+
+def test_failing_backend_is_ejected_and_readmitted():
+    router = BackendRouter(["http://a", "http://b"], failure_threshold=2)
+    a = router.backends[0]
+
+    router.record_failure(a)
+    assert a.healthy
+    router.record_failure(a)
+    assert not a.healthy
+    assert router.choose().url == "http://b"
+    # Exclusion wins over health: with no other candidate the ejected backend is still used
+    assert router.choose(exclude=["http://b"]).url == "http://a"
+
+    router.record_success(a)
+    assert a.healthy
+    assert a.consecutive_failures == 0
+
+
+def test_all_backends_ejected_still_routes():
+    router = BackendRouter(["http://a"], failure_threshold=1)
+    router.record_failure(router.backends[0])
+
+    assert router.choose().url == "http://a"
+
+
+@pytest.mark.asyncio
+async def test_route_records_only_backend_failures():
+    router = BackendRouter(["http://a"], failure_threshold=1)
+    backend = router.backends[0]
+
+    for error in (LLMBackendError(400), CircuitOpenError("open")):
+        with pytest.raises(type(error)):
+            async with router.route():
+                raise error
+    assert backend.healthy
+    assert backend.failures == 0
+
+    with pytest.raises(LLMBackendError):
+        async with router.route():
+            raise LLMBackendError(503)
+    assert not backend.healthy
+
+
+def test_registry_lists_each_backend_once():
+    registry = RouterRegistry()
+    registry.get(["http://a", "http://b"])
+    registry.get(["http://b", "http://c"])
+
+    assert registry.urls == ["http://a", "http://b", "http://c"]
+
+
+def test_registry_shares_router_per_backend_list(monkeypatch):
+    registry = RouterRegistry()
+    monkeypatch.setenv("TEST_LLM_URLS", "http://a, http://b")
+
+    router = registry.from_env_urls("TEST_LLM_URLS", "TEST_LLM_URL", "http://default")
+
+    assert [backend.url for backend in router.backends] == ["http://a", "http://b"]
+    assert registry.get(["http://a", "http://b"]) is router
+    assert registry.from_env_urls("UNSET_URLS", "UNSET_URL", "http://default").primary_url == "http://default"
+
+
+@pytest.mark.asyncio
+async def test_processor_spreads_load_towards_faster_backend():
+    async with StubBackend(delay=0.2) as slow, StubBackend(delay=0.01) as fast:
+        processor = XmlProcessor()
+        processor.router = BackendRouter([slow.url, fast.url])
+        http_client = LLMHttpClient()
+        processor.http_client = http_client
+        try:
+            messages = [{"role": "user", "content": "BTC?"}]
+            results = []
+            for _ in range(5):
+                results += await asyncio.gather(*(processor._create_chat_completion(messages) for _ in range(4)))
+        finally:
+            await http_client.close()
+
+    assert all(result == XML_RESPONSE for result in results)
+    assert slow.requests + fast.requests == 20
+    assert fast.requests > slow.requests
+    assert all(backend.outstanding == 0 for backend in processor.router.backends)
+
+
+@pytest.mark.asyncio
+async def test_processor_routes_around_ejected_backend_until_health_check_passes():
+    async with StubBackend() as broken, StubBackend() as healthy:
+        broken.status = 500
+        processor = XmlProcessor()
+        processor.router = BackendRouter([broken.url, healthy.url], failure_threshold=1)
+        message = Message(content="BTC?", user_id="u1", llm_type="xmlBasedLLM")
+
+        processor.retry_policy = None
+
+        results = [await processor.process_message(message) for _ in range(5)]
+
+        assert broken.requests == 1
+        assert healthy.requests == 4
+        assert not processor.router.backends[0].healthy
+        assert sum(1 for result in results if result["actions"]) == 4
+
+        await processor.router.check_health()
+        assert not processor.router.backends[0].healthy
+
+        broken.status = 200
+        await processor.router.check_health()
+        assert processor.router.backends[0].healthy
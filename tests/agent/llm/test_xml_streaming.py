@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.http_client import LLMHttpClient
+from src.agent.llm.streaming import AnswerStreamExtractor, XmlActionStreamParser
+from src.agent.llm.xml_llm import XmlProcessor
+from src.common.interfaces import Message
+
+XML_RESPONSE = """Sure, here you go:
+<response>
+    <thought>The user wants BTC and AAPL prices.</thought>
+    <actions>
+        <action>
+            <name>get_coin_price</name>
+            <argument>BTC</argument>
+        </action>
+        <action>
+            <name>get_market_news</name>
+        </action>
+    </actions>
+</response>
+Trailing text after the block."""
+
+
+def chunked(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, len(XML_RESPONSE)])
+def test_parser_emits_actions_for_any_chunking(size):
+    parser = XmlActionStreamParser()
+    events = []
+    for chunk in chunked(XML_RESPONSE, size):
+        events.extend(parser.feed(chunk))
+
+    assert events == [
+        {"event": "thought", "thought": "The user wants BTC and AAPL prices."},
+        {"event": "action", "action": {"name": "get_coin_price", "argument": "BTC"}},
+        {"event": "action", "action": {"name": "get_market_news"}},
+    ]
+    assert parser.done
+    assert parser.error is None
+
+
+def test_parser_emits_action_before_response_is_complete():
+    parser = XmlActionStreamParser()
+    head = XML_RESPONSE[: XML_RESPONSE.find("</action>") + len("</action>")]
+
+    events = parser.feed(head)
+
+    assert events[-1] == {"event": "action", "action": {"name": "get_coin_price", "argument": "BTC"}}
+    assert not parser.done
+
+
+def test_parser_reports_malformed_xml():
+    parser = XmlActionStreamParser()
+    parser.feed("<response><thought>a & b</thought>")
+
+    assert parser.error is not None
+
+
+def sse_app(text, chunk_size=5):
+    async def handler(request):
+        body = await request.json()
+        assert body["stream"] is True
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for chunk in chunked(text, chunk_size):
+            payload = {"choices": [{"delta": {"content": chunk}}]}
+            await response.write(f"data: {json.dumps(payload)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_stream_actions_over_sse():
+    async with TestServer(sse_app(XML_RESPONSE)) as server:
+        processor = XmlProcessor(http_client=LLMHttpClient())
+        processor.base_url = str(server.make_url("/v1"))
+
+        events = [event async for event in processor.stream_actions(Message(content="prices", user_id="u1"))]
+        await processor.http_client.close()
+
+    assert [event["event"] for event in events] == ["thought", "action", "action"]
+    assert events[1]["action"] == {"name": "get_coin_price", "argument": "BTC"}
+
+
+@pytest.mark.asyncio
+async def test_stream_actions_without_xml_block():
+    async with TestServer(sse_app("I cannot answer that.")) as server:
+        processor = XmlProcessor()
+        processor.base_url = str(server.make_url("/v1"))
+
+        events = [event async for event in processor.stream_actions(Message(content="hi", user_id="u1"))]
+
+    assert len(events) == 1
+    assert "couldn't parse" in events[0]["thought"]
+
+
+@pytest.mark.asyncio
+async def test_stream_stopped_on_closing_tag_completes():
+    text = XML_RESPONSE[XML_RESPONSE.find("<response>") : XML_RESPONSE.find("</response>")]
+    async with TestServer(sse_app(text)) as server:
+        processor = XmlProcessor()
+        processor.base_url = str(server.make_url("/v1"))
+        parsers = []
+        original_parser = XmlActionStreamParser
+
+        def tracking_parser():
+            parsers.append(original_parser())
+            return parsers[-1]
+
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr("src.agent.llm.xml_llm.XmlActionStreamParser", tracking_parser)
+            events = [event async for event in processor.stream_actions(Message(content="prices", user_id="u1"))]
+
+    assert [event["event"] for event in events] == ["thought", "action", "action"]
+    assert parsers[0].done
+
+
+ANSWER_RESPONSE = """<response>
+    <thought>Answer directly.</thought>
+    <actions>
+        <action>
+            <name>response_to_user</name>
+            <argument>BTC &amp; ETH are up &lt;5% today.</argument>
+        </action>
+    </actions>
+</response>"""
+
+
+@pytest.mark.parametrize("size", [1, 4, 9])
+def test_answer_extractor_streams_unescaped_answer(size):
+    extractor = AnswerStreamExtractor("xml")
+    deltas = [extractor.feed(chunk) for chunk in chunked(ANSWER_RESPONSE, size)]
+
+    assert "".join(deltas) == "BTC & ETH are up <5% today."
+    assert extractor.done
+    # The answer arrives before the response is complete
+    assert deltas.index(next(delta for delta in deltas if delta)) < len(deltas) - 1
+
+
+@pytest.mark.asyncio
+async def test_stream_actions_yields_answer_deltas():
+    async with TestServer(sse_app(ANSWER_RESPONSE)) as server:
+        processor = XmlProcessor()
+        processor.base_url = str(server.make_url("/v1"))
+
+        events = [event async for event in processor.stream_actions(Message(content="hi", user_id="u1"))]
+
+    answer = "".join(event["text"] for event in events if event["event"] == "answer_delta")
+    assert answer == "BTC & ETH are up <5% today."
+    assert events[-1] == {
+        "event": "action",
+        "action": {"name": "response_to_user", "argument": "BTC & ETH are up <5% today."},
+    }
@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agent.loop import AgentLoop, InProcessToolExecutor, normalize_actions, tool_call_of, tool_executor_from_env
+from src.common.interfaces import Message
+
+
+class RecordingExecutor(InProcessToolExecutor):
+    def __init__(self, delay: float = 0.0):
+        super().__init__(self._handle)
+        self.calls = []
+        self.delay = delay
+
+    async def _handle(self, tool_call):
+        self.calls.append(tool_call)
+        await asyncio.sleep(self.delay)
+        return {"price": 42}
+
+
+def scripted_process(responses):
+    messages = []
+
+    async def process(message):
+        messages.append(message.content)
+        return responses[len(messages) - 1]
+
+    return process, messages
+
+
+def test_loop_runs_tools_and_feeds_results_back():
+    executor = RecordingExecutor()
+    process, messages = scripted_process(
+        [
+            {
+                "thought": "Need prices",
+                "actions": [
+                    {"name": "get_coin_price", "argument": "BTC"},
+                    {"name": "get_stock_price", "argument": "AAPL"},
+                ],
+            },
+            {"thought": "Done", "actions": [{"name": "response_to_user", "argument": "BTC is at 42"}]},
+        ]
+    )
+
+    log = asyncio.run(AgentLoop(executor).run_to_completion(Message(content="Prices?", user_id="1"), process))
+
+    assert log[-1] == {"event": "final", "step": 2, "message": "BTC is at 42", "reason": "answered"}
+    assert executor.calls == [
+        {"type": "get_coin_price", "coin_symbol": "BTC"},
+        {"type": "get_stock_price", "coin_symbol": "AAPL"},
+    ]
+    assert "Here are the results" in messages[1] and "'Prices?'" in messages[1]
+    results = [event["result"] for event in log if event["event"] == "tool_result"]
+    assert results == [{"price": 42, "type": "get_coin_price"}, {"price": 42, "type": "get_stock_price"}]
+
+
+def test_loop_stops_at_step_budget():
+    executor = RecordingExecutor()
+
+    async def process(message):
+        return {"thought": "Still looking", "actions": [{"name": "get_news", "argument": {}}]}
+
+    log = asyncio.run(AgentLoop(executor, max_steps=3).run_to_completion(Message(content="?", user_id="1"), process))
+
+    assert log[-1]["reason"] == "max_steps"
+    assert log[-1]["message"] == "Still looking"
+    assert len(executor.calls) == 3
+
+
+def test_loop_reports_processing_errors():
+    async def process(message):
+        raise RuntimeError("backend down")
+
+    log = asyncio.run(AgentLoop(RecordingExecutor()).run_to_completion(Message(content="?", user_id="1"), process))
+
+    assert log[-1]["event"] == "error"
+    assert log[-1]["error"] == "backend down"
+    assert log[-1]["error_type"] == "RuntimeError"
+
+
+def test_streamed_actions_start_tools_while_generating():
+    executor = RecordingExecutor(delay=0.05)
+    stream_finished = []
+    calls_when_finished = []
+
+    async def stream(message):
+        if "Here are the results" in message.content:
+            yield {"event": "action", "action": {"name": "response_to_user", "argument": "done"}}
+            return
+        yield {"event": "thought", "thought": "Fetch both"}
+        yield {"event": "action", "action": {"name": "get_coin_price", "argument": "BTC"}}
+        await asyncio.sleep(0.02)
+        yield {"event": "action", "action": {"name": "get_coin_price", "argument": "ETH"}}
+        await asyncio.sleep(0.02)
+        calls_when_finished.append(len(executor.calls))
+        stream_finished.append(True)
+
+    async def process(message):
+        raise AssertionError("streaming processors do not use process")
+
+    log = asyncio.run(AgentLoop(executor).run_to_completion(Message(content="?", user_id="1"), process, stream))
+
+    assert log[-1]["message"] == "done"
+    # Both tool calls were dispatched before the completion finished
+    assert calls_when_finished == [2]
+    assert [event["event"] for event in log[:4]] == ["step", "thought", "action", "action"]
+
+
+def test_normalize_actions_of_function_call_results():
+    result = {"function": {"function_name": "response_to_user", "function_params": {"message": "Hi"}}}
+
+    assert normalize_actions(result) == [{"name": "response_to_user", "argument": {"message": "Hi"}}]
+    assert normalize_actions({"thought": "x", "actions": []}) == []
+    assert tool_call_of({"name": "get_news", "argument": {"query": "btc"}}) == {"type": "get_news", "query": "btc"}
+
+
+@pytest.fixture
+def agent_client():
+    from src.agent.run import app
+
+    return TestClient(app)
+
+
+def test_run_endpoint_answers_with_dummy_processor(agent_client):
+    response = agent_client.post("/run", json={"content": "Hello", "user_id": "loop_user", "llm_type": "dummy"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["steps"] == 1
+    assert body["reason"] == "answered"
+    assert "stocks" in body["message"].lower()
+
+
+def test_run_endpoint_streams_step_log(agent_client):
+    with agent_client.stream(
+        "POST",
+        "/run",
+        params={"stream": "true"},
+        json={"content": "Hello", "user_id": "loop_user", "llm_type": "dummy"},
+    ) as response:
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert events[0] == {"event": "step", "step": 1}
+    assert events[-1]["event"] == "final"
+
+
+def test_tools_of_a_step_run_concurrently():
+    executor = RecordingExecutor(delay=0.05)
+    process, _ = scripted_process(
+        [
+            {"thought": "", "actions": [{"name": "get_coin_price", "argument": s} for s in ("BTC", "ETH", "SOL")]},
+            {"thought": "", "actions": [{"name": "response_to_user", "argument": "done"}]},
+        ]
+    )
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        log = await AgentLoop(executor).run_to_completion(Message(content="?", user_id="1"), process)
+        return log, asyncio.get_running_loop().time() - started
+
+    log, elapsed = asyncio.run(run())
+
+    assert log[-1]["message"] == "done"
+    assert len(executor.calls) == 3
+    assert elapsed < 0.12
+
+
+def test_tools_of_a_step_respect_the_concurrency_cap():
+    executor = RecordingExecutor(delay=0.01)
+    running = []
+    peak = 0
+
+    async def handle(tool_call):
+        nonlocal peak
+        running.append(tool_call)
+        peak = max(peak, len(running))
+        await executor._handle(tool_call)
+        running.remove(tool_call)
+        return {"price": 42}
+
+    executor.handle = handle
+    process, _ = scripted_process(
+        [
+            {"thought": "", "actions": [{"name": "get_coin_price", "argument": s} for s in ("BTC", "ETH", "SOL")]},
+            {"thought": "", "actions": [{"name": "response_to_user", "argument": "done"}]},
+        ]
+    )
+
+    log = asyncio.run(
+        AgentLoop(executor, max_tool_concurrency=2).run_to_completion(Message(content="?", user_id="1"), process)
+    )
+
+    assert log[-1]["message"] == "done"
+    assert len(executor.calls) == 3
+    assert peak == 2
+
+
+def test_in_process_executor_applies_tool_deadlines(monkeypatch):
+    for key in ("COINAPI_KEY", "NEWSAPI_KEY", "ALPHA_VANTAGE_KEY"):
+        monkeypatch.setenv(key, "test")
+    monkeypatch.setenv("AGENT_TOOL_EXECUTOR", "inprocess")
+
+    executor = tool_executor_from_env()
+
+    assert executor.handle.__name__ == "handle_with_deadline"
@@ -0,0 +1,132 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.agent import run
+from src.agent.llm.lmstudio_llm import LMStudioProcessor
+from src.agent.llm.parsing import parse_code_action
+from src.agent.llm.xml_llm import XmlProcessor
+from src.agent.memory import SUMMARY_HEADER, ConversationMemory, render_result
+from src.agent.response_cache import LLMResponseCache
+from src.common.interfaces import Message
+
+RESULT = {"thought": "Check BTC", "actions": [{"name": "get_coin_price", "argument": "BTC"}]}
+
+
+def test_render_result():
+    assert render_result(RESULT) == "Thought: Check BTC\nAction: get_coin_price(BTC)"
+    assert render_result({"message": "hello"}) == "hello"
+
+
+def test_render_code_action_result():
+    def get_stock_price(symbol):
+        pass
+
+    processor = LMStudioProcessor(mock_functions=[get_stock_price])
+    content = 'Thought: Check Apple\nAction:\nget_stock_price("AAPL")\nEnd Action'
+    parsed = parse_code_action(content, processor._signatures)
+    result = {"message": content, "thought": parsed.thought, "function": parsed.function, "calls": parsed.calls}
+
+    assert render_result(result) == "Thought: Check Apple\nAction: get_stock_price(symbol='AAPL')"
+
+    answer = "Thought: Done\nAnswer: AAPL is at 190"
+    assert render_result({"message": answer, "thought": "Done", "function": None, "calls": []}) == answer
+
+
+def test_history_records_turns_per_session():
+    memory = ConversationMemory()
+    memory.append("alice", "price of BTC?", RESULT)
+
+    assert memory.history("alice") == [
+        {"role": "user", "content": "price of BTC?"},
+        {"role": "assistant", "content": render_result(RESULT)},
+    ]
+    assert memory.history("bob") == []
+
+    memory.clear("alice")
+    assert memory.history("alice") == []
+
+
+def test_old_turns_are_compacted_into_summary():
+    memory = ConversationMemory(max_turns=4)
+    for step in range(4):
+        memory.append("alice", f"question {step}", {"thought": f"answer {step}"})
+
+    history = memory.history("alice")
+
+    assert len(history) == 5
+    assert history[0]["role"] == "system"
+    assert history[0]["content"].startswith(SUMMARY_HEADER)
+    assert "- user: question 0" in history[0]["content"]
+    assert "- assistant: Thought: answer 1" in history[0]["content"]
+    assert history[1:] == [
+        {"role": "user", "content": "question 2"},
+        {"role": "assistant", "content": "Thought: answer 2"},
+        {"role": "user", "content": "question 3"},
+        {"role": "assistant", "content": "Thought: answer 3"},
+    ]
+
+
+def test_prompt_size_stays_bounded():
+    memory = ConversationMemory(max_turns=100, max_chars=2000, summary_chars=500, snippet_chars=50)
+    for step in range(200):
+        memory.append("alice", f"message {step} " + "x" * 300, {"thought": "y" * 300})
+
+    history = memory.history("alice")
+    total = sum(len(message["content"]) for message in history)
+
+    assert total <= 2000 + 500 + len(SUMMARY_HEADER) + 1
+    assert history[-2]["content"].startswith("message 199")
+
+
+def test_latest_exchange_is_kept_even_if_over_budget():
+    memory = ConversationMemory(max_chars=10)
+    memory.append("alice", "a" * 100, {"thought": "b" * 100})
+
+    assert [message["role"] for message in memory.history("alice")] == ["user", "assistant"]
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    memory = ConversationMemory()
+    monkeypatch.setattr(run, "conversation_memory", memory)
+    monkeypatch.setattr(run, "response_cache", LLMResponseCache(enabled=False))
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_run_processor_feeds_history_to_processor(fresh_state):
+    processor = XmlProcessor()
+    processor.process_message = AsyncMock(return_value=RESULT)
+
+    await run.run_processor(processor, Message(content="price of BTC?", user_id="alice"))
+    await run.run_processor(processor, Message(content="and ETH?", user_id="alice"))
+
+    first_history = processor.process_message.await_args_list[0].args[1]
+    second_history = processor.process_message.await_args_list[1].args[1]
+    assert first_history == []
+    assert second_history == [
+        {"role": "user", "content": "price of BTC?"},
+        {"role": "assistant", "content": render_result(RESULT)},
+    ]
+    formatted = processor._format_message_history(Message(content="and ETH?", user_id="alice"), second_history)
+    assert [message["role"] for message in formatted] == ["system", "user", "assistant", "user"]
+
+
+@pytest.mark.asyncio
+async def test_background_requests_skip_memory(fresh_state):
+    processor = XmlProcessor()
+    processor.process_message = AsyncMock(return_value=RESULT)
+
+    await run.run_processor(processor, Message(content="news", user_id="alice", metadata={"priority": "background"}))
+
+    assert processor.process_message.await_args.args[1] is None
+    assert fresh_state.history("alice") == []
+
+
+def test_memory_is_opt_in(monkeypatch):
+    monkeypatch.delenv("AGENT_MEMORY_ENABLED", raising=False)
+    assert not ConversationMemory.from_env().enabled
+
+    monkeypatch.setenv("AGENT_MEMORY_ENABLED", "true")
+    assert ConversationMemory.from_env().enabled
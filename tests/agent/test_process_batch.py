@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock
+
+from fastapi.testclient import TestClient
+
+from src.agent import run
+from src.agent.llm.xml_llm import XmlProcessor
+
+client = TestClient(run.app)
+
+
+def test_process_batch_returns_results_in_order():
+    response = client.post(
+        "/process_batch",
+        json=[
+            {"content": "Hello", "user_id": "1"},
+            {"content": "Hi", "user_id": "2", "llm_type": "dummy"},
+        ],
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert all(item["result"]["function"]["function_name"] == "response_to_user" for item in results)
+
+
+def test_process_batch_reports_per_item_errors(monkeypatch):
+    failing = XmlProcessor()
+    failing.process_message = AsyncMock(side_effect=RuntimeError("backend down"))
+    monkeypatch.setitem(run.llm_processors, "failing", failing)
+
+    response = client.post(
+        "/process_batch",
+        json=[
+            {"content": "Hello", "user_id": "1", "llm_type": "failing"},
+            {"content": "Hello", "user_id": "2"},
+        ],
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {"error": "backend down"}
+    assert "result" in results[1]
+
+
+def test_process_batch_empty():
+    response = client.post("/process_batch", json=[])
+
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from src.agent import run
+from src.agent.llm.xml_llm import XmlProcessor
+from src.agent.memory import ConversationMemory
+from src.agent.response_cache import LLMResponseCache
+from src.common.interfaces import Message
+from src.common.single_flight import SingleFlight
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+@pytest.mark.asyncio
+async def test_identical_in_flight_requests_are_coalesced(monkeypatch, cache_enabled):
+    monkeypatch.setattr(run, "response_cache", LLMResponseCache(enabled=cache_enabled))
+    monkeypatch.setattr(run, "request_coalescer", SingleFlight())
+    monkeypatch.setattr(run, "conversation_memory", ConversationMemory())
+    processor = XmlProcessor()
+    calls = 0
+
+    async def slow_completion(message, chat_history=None):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"thought": "t", "actions": [{"name": "get_news"}]}
+
+    processor.process_message = slow_completion
+    messages = [Message(content="Analyze market", user_id=str(i)) for i in range(4)]
+
+    results = await asyncio.gather(*(run.run_processor(processor, message) for message in messages))
+
+    assert calls == 1
+    assert all(result == results[0] for result in results)
+    assert run.request_coalescer.stats()["collapsed"] == 3
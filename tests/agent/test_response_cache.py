@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.agent import run
+from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.xml_llm import XmlProcessor
+from src.agent.memory import ConversationMemory
+from src.agent.response_cache import LLMResponseCache
+from src.common.interfaces import Message
+
+RESULT = {"thought": "t", "actions": [{"name": "get_news"}]}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = LLMResponseCache(max_size=8, ttl=60)
+    monkeypatch.setattr(run, "response_cache", cache)
+    monkeypatch.setattr(run, "conversation_memory", ConversationMemory())
+    return cache
+
+
+def test_key_depends_on_processor_and_prompt():
+    message = Message(content="Analyze market", user_id="1")
+
+    assert LLMResponseCache.make_key(XmlProcessor(), message) == LLMResponseCache.make_key(
+        XmlProcessor(), Message(content="Analyze market", user_id="2")
+    )
+    assert LLMResponseCache.make_key(XmlProcessor(), message) != LLMResponseCache.make_key(JsonProcessor(), message)
+    assert LLMResponseCache.make_key(XmlProcessor(), message) != LLMResponseCache.make_key(
+        XmlProcessor(), Message(content="Recommend", user_id="1")
+    )
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_hit_the_cache(cache):
+    processor = XmlProcessor()
+    processor.process_message = AsyncMock(return_value=RESULT)
+
+    first = await run.run_processor(processor, Message(content="Analyze market", user_id="1"))
+    second = await run.run_processor(processor, Message(content="Analyze market", user_id="2"))
+
+    assert first == second == RESULT
+    assert processor.process_message.await_count == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_metadata_opt_out_bypasses_cache(cache):
+    processor = XmlProcessor()
+    processor.process_message = AsyncMock(return_value=RESULT)
+    message = Message(content="Analyze market", user_id="1", metadata={"no_cache": True})
+
+    await run.run_processor(processor, message)
+    await run.run_processor(processor, message)
+
+    assert processor.process_message.await_count == 2
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_results_are_not_cached(cache):
+    processor = XmlProcessor()
+    processor.process_message = AsyncMock(return_value={"thought": "Error in LLM processing: boom", "actions": []})
+
+    await run.run_processor(processor, Message(content="Analyze market", user_id="1"))
+
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from src.agent.scheduler import BACKGROUND, INTERACTIVE, AdmissionScheduler, QueueFullError
+
+
+async def hold(scheduler, priority, user_id, order, release):
+    async with scheduler.slot(priority, user_id):
+        order.append((priority, user_id))
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_are_admitted_before_background():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+    release.set()
+    blocker = asyncio.Event()
+
+    running = asyncio.create_task(hold(scheduler, INTERACTIVE, "first", order, blocker))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(hold(scheduler, BACKGROUND, f"news{i}", order, release)) for i in range(3)]
+    waiters.append(asyncio.create_task(hold(scheduler, INTERACTIVE, "user", order, release)))
+    await asyncio.sleep(0)
+
+    blocker.set()
+    await asyncio.gather(running, *waiters)
+
+    assert order[1] == (INTERACTIVE, "user")
+    assert [priority for priority, _ in order[2:]] == [BACKGROUND] * 3
+
+
+@pytest.mark.asyncio
+async def test_users_share_a_class_round_robin():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    order = []
+    release = asyncio.Event()
+    release.set()
+    blocker = asyncio.Event()
+
+    running = asyncio.create_task(hold(scheduler, BACKGROUND, "seed", order, blocker))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(hold(scheduler, BACKGROUND, "heavy", order, release)) for _ in range(3)]
+    waiters.append(asyncio.create_task(hold(scheduler, BACKGROUND, "light", order, release)))
+    await asyncio.sleep(0)
+
+    blocker.set()
+    await asyncio.gather(running, *waiters)
+
+    assert [user for _, user in order] == ["seed", "heavy", "light", "heavy", "heavy"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_immediately():
+    scheduler = AdmissionScheduler(max_concurrency=1, max_queue_depth={INTERACTIVE: 1, BACKGROUND: 0})
+    blocker = asyncio.Event()
+    order = []
+
+    running = asyncio.create_task(hold(scheduler, INTERACTIVE, "a", order, blocker))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(hold(scheduler, INTERACTIVE, "b", order, blocker))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFullError):
+        async with scheduler.slot(INTERACTIVE, "c"):
+            pass
+    with pytest.raises(QueueFullError):
+        async with scheduler.slot(BACKGROUND, "d"):
+            pass
+
+    blocker.set()
+    await asyncio.gather(running, queued)
+    stats = scheduler.stats()
+    assert stats["classes"][INTERACTIVE]["rejected"] == 1
+    assert stats["classes"][BACKGROUND]["rejected"] == 1
+    assert stats["classes"][INTERACTIVE]["admitted"] == 2
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = AdmissionScheduler(max_concurrency=1)
+    blocker = asyncio.Event()
+    order = []
+
+    running = asyncio.create_task(hold(scheduler, INTERACTIVE, "a", order, blocker))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(hold(scheduler, INTERACTIVE, "b", order, blocker))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+
+    assert scheduler.stats()["classes"][INTERACTIVE]["queued"] == 0
+    blocker.set()
+    await running
+    assert scheduler.stats()["active"] == 0
+
+
+def test_priority_defaults_to_interactive():
+    assert AdmissionScheduler.priority_of({}) == INTERACTIVE
+    assert AdmissionScheduler.priority_of({"priority": "background"}) == BACKGROUND
+    assert AdmissionScheduler.priority_of({"priority": "bogus"}) == INTERACTIVE
+
+
+def test_concurrency_defaults_to_given_backend_capacity(monkeypatch):
+    monkeypatch.delenv("AGENT_MAX_CONCURRENCY", raising=False)
+    assert AdmissionScheduler.from_env(default_concurrency=128).max_concurrency == 128
+
+    monkeypatch.setenv("AGENT_MAX_CONCURRENCY", "8")
+    assert AdmissionScheduler.from_env(default_concurrency=128).max_concurrency == 8
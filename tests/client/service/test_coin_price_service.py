@@ -1,69 +1,59 @@
-from unittest.mock import Mock, patch
-
+import httpx
 import pandas as pd
 import pytest
 
 from src.client.service.coin_price_service import CoinPriceService
 
-
-@pytest.fixture
-def coin_service():
-    return CoinPriceService()
+RATES = [
+    {"time_period_start": "2021-01-01T00:00:00.0000000Z", "rate_close": 29000.0},
+    {"time_period_start": "2021-01-02T00:00:00.0000000Z", "rate_close": 29500.0},
+    {"time_period_start": "2021-01-03T00:00:00.0000000Z", "rate_close": 30000.0},
+]
 
 
-@pytest.fixture
-def mock_response():
-    mock = Mock()
-    mock.status_code = 200
-    mock.json.return_value = {
-        "prices": [
-            [1609459200000, 29000.0],  # 2021-01-01
-            [1609545600000, 29500.0],  # 2021-01-02
-            [1609632000000, 30000.0],  # 2021-01-03
-        ]
-    }
-    return mock
+def coin_service(handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return CoinPriceService(base_url="https://coinapi.test/v1", api_key="test", http_client=client)
 
 
 def test_init():
-    service = CoinPriceService(base_url="https://custom.api.com")
+    service = CoinPriceService(base_url="https://custom.api.com", api_key="test")
     assert service.base_url == "https://custom.api.com"
 
 
-@patch("requests.get")
-def test_get_coin_price_history_success(mock_get, coin_service, mock_response):
-    mock_get.return_value = mock_response
+@pytest.mark.asyncio
+async def test_get_coin_price_history_success():
+    requests = []
 
-    df = coin_service.get_coin_price_history("bitcoin", "usd", 3)
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=RATES)
+
+    df = await coin_service(handler).get_coin_price_history("BTC", "USD", 3)
 
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 3
     assert "price" in df.columns
-    assert df.index.name == "timestamp"
+    assert df.index.name == "time_period_start"
     assert df.iloc[0]["price"] == 29000.0
+    assert requests[0].url.path == "/v1/exchangerate/BTC/USD/history"
+    assert requests[0].headers["X-CoinAPI-Key"] == "test"
 
 
-@patch("requests.get")
-def test_get_coin_price_history_error_response(mock_get, coin_service):
-    mock_response = Mock()
-    mock_response.status_code = 404
-    mock_get.return_value = mock_response
+@pytest.mark.asyncio
+async def test_get_coin_price_history_error_response():
+    service = coin_service(lambda request: httpx.Response(404))
 
     with pytest.raises(Exception) as exc_info:
-        coin_service.get_coin_price_history("invalid_coin")
+        await service.get_coin_price_history("invalid_coin")
 
     assert "Error fetching data: 404" in str(exc_info.value)
 
 
-@patch("requests.get")
-def test_get_coin_price_history_no_data(mock_get, coin_service):
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {}
-    mock_get.return_value = mock_response
-
-    df = coin_service.get_coin_price_history("bitcoin")
+@pytest.mark.asyncio
+async def test_get_coin_price_history_no_data():
+    df = await coin_service(lambda request: httpx.Response(200, json=[])).get_coin_price_history("BTC")
 
     assert isinstance(df, pd.DataFrame)
     assert df.empty
-    assert list(df.columns) == ["timestamp", "price"]
+    assert list(df.columns) == ["price"]
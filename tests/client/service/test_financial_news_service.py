@@ -1,7 +1,7 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import httpx
 import pytest
-from newsapi.newsapi_exception import NewsAPIException
 
 from src.client.service.financial_news_service import FinancialNewsService
 
@@ -14,13 +14,17 @@ def mock_dotenv():
 
 
 @pytest.fixture
-def mock_news_api(sample_articles):
-    with patch("newsapi.NewsApiClient") as mock_class:
-        mock_instance = MagicMock()
-        # Configure the mock with default successful response
-        mock_instance.get_everything.return_value = sample_articles
-        mock_class.return_value = mock_instance
-        yield mock_instance
+def news_requests():
+    return []
+
+
+@pytest.fixture
+def http_client(sample_articles, news_requests):
+    def handler(request):
+        news_requests.append(request)
+        return httpx.Response(200, json=sample_articles)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
 
 @pytest.fixture
@@ -47,7 +51,7 @@ def sample_articles():
 def test_init_success():
     with patch("os.getenv", return_value="test_key"):
         service = FinancialNewsService()
-        assert service.api is not None
+        assert service.api_key == "test_key"
 
 
 def test_init_missing_api_key():
@@ -58,54 +62,50 @@ def test_init_missing_api_key():
             assert "NEWSAPI_KEY environment variable is not set" in str(exc_info.value)
 
 
-# def test_get_financial_news_success(mock_news_api, sample_articles):
-#     with patch("os.getenv", return_value="test_key"):
-#         service = FinancialNewsService()
-#         articles = service.get_financial_news(keywords="test", page_size=2)
+@pytest.mark.asyncio
+async def test_get_financial_news_success(http_client, news_requests, monkeypatch):
+    monkeypatch.setenv("NEWSAPI_KEY", "test_key")
+    monkeypatch.delenv("NEWSAPI_BASE_URL", raising=False)
+    service = FinancialNewsService(http_client=http_client)
 
-#         assert len(articles) == 2
-#         assert articles[0]["title"] == "Test Article 1"
-#         assert articles[1]["title"] == "Test Article 2"
-#         mock_news_api.get_everything.assert_called_once_with(
-#             q="test",
-#             language="en",
-#             sort_by="relevancy",
-#             page_size=2
-#         )
+    articles = await service.get_financial_news(keywords="test", page_size=2)
 
+    assert len(articles) == 2
+    assert articles[0]["title"] == "Test Article 1"
+    assert articles[1]["title"] == "Test Article 2"
+    request = news_requests[0]
+    assert str(request.url).startswith("https://newsapi.org/v2/everything")
+    assert dict(request.url.params) == {"q": "test", "language": "en", "sortBy": "relevancy", "pageSize": "2"}
+    assert request.headers["X-Api-Key"] == "test_key"
 
-# def test_get_financial_news_failed_status(mock_news_api):
-#     with patch("os.getenv", return_value="test_key"):
-#         # Override the default mock response for this specific test
-#         mock_news_api.get_everything.return_value = {
-#             "status": "error",
-#             "code": "apiKeyInvalid"
-#         }
 
-#         service = FinancialNewsService()
-#         articles = service.get_financial_news(keywords="test", page_size=2)
+@pytest.mark.asyncio
+async def test_get_financial_news_failed_status(monkeypatch):
+    monkeypatch.setenv("NEWSAPI_KEY", "test_key")
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(401, json={"status": "error", "code": "apiKeyInvalid"})
+        )
+    )
+    service = FinancialNewsService(http_client=client)
 
-#         assert articles == []
-#         mock_news_api.get_everything.assert_called_once_with(
-#             q="test",
-#             language="en",
-#             sort_by="relevancy",
-#             page_size=2
-#         )
+    assert await service.get_financial_news(keywords="test", page_size=2) == []
 
 
-def test_get_financial_news_error(mock_news_api):
-    with patch("os.getenv", return_value="test_key"):
-        # Configure the mock instance before creating the service
-        mock_news_api.get_everything.side_effect = NewsAPIException("API Error")
+@pytest.mark.asyncio
+async def test_get_financial_news_error(monkeypatch):
+    monkeypatch.setenv("NEWSAPI_KEY", "test_key")
 
-        service = FinancialNewsService()
-        articles = service.get_financial_news()
+    def handler(request):
+        raise httpx.ConnectError("API Error")
+
+    service = FinancialNewsService(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    articles = await service.get_financial_news()
 
-        assert articles == []
+    assert articles == []
 
 
-def test_print_news(mock_news_api, sample_articles):
+def test_print_news(sample_articles):
     with patch("os.getenv", return_value="test_key"):
         service = FinancialNewsService()
         output = service.print_news(sample_articles["articles"])
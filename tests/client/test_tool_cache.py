@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from src.client.tool_cache import ToolResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTool:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, tool_call):
+        self.calls.append(tool_call)
+        await asyncio.sleep(self.delay)
+        return {"type": tool_call["type"], "price": float(len(self.calls))}
+
+
+def test_keys_are_normalized_on_symbol_currency_and_window():
+    key = ToolResultCache.make_key
+
+    assert key({"type": "get_coin_price", "coin_symbol": "BTC"}) == key(
+        {"type": "get_coin_price", "coin_symbol": " btc", "currency": "USD"}
+    )
+    assert key({"type": "get_coin_history", "coin_symbol": "BTC"}) == key(
+        {"type": "get_coin_history", "coin_symbol": "btc", "days": 30.0}
+    )
+    assert key({"type": "get_coin_history", "coin_symbol": "BTC", "days": 7}) != key(
+        {"type": "get_coin_history", "coin_symbol": "BTC"}
+    )
+    assert key({"type": "response_to_user", "message": "hi"}) is None
+
+
+@pytest.mark.asyncio
+async def test_fresh_results_are_served_from_the_cache():
+    clock = FakeClock()
+    cache = ToolResultCache(ttls={"get_coin_price": 60}, stale_ttl=0, clock=clock)
+    tool = FakeTool()
+
+    first = await cache.fetch({"type": "get_coin_price", "coin_symbol": "BTC"}, tool)
+    first["price"] = -1  # Callers get copies
+    second = await cache.fetch({"type": "get_coin_price", "coin_symbol": "btc"}, tool)
+    clock.now += 61
+    third = await cache.fetch({"type": "get_coin_price", "coin_symbol": "BTC"}, tool)
+
+    assert second["price"] == 1.0
+    assert third["price"] == 2.0
+    assert len(tool.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_results_are_served_while_one_refresh_runs():
+    clock = FakeClock()
+    cache = ToolResultCache(ttls={"get_coin_price": 60}, stale_ttl=60, clock=clock)
+    tool = FakeTool(delay=0.01)
+    call = {"type": "get_coin_price", "coin_symbol": "BTC"}
+
+    await cache.fetch(call, tool)
+    clock.now += 90
+    stale = await asyncio.gather(cache.fetch(call, tool), cache.fetch(call, tool))
+    await asyncio.sleep(0.05)
+    refreshed = await cache.fetch(call, tool)
+
+    assert [result["price"] for result in stale] == [1.0, 1.0]
+    assert refreshed["price"] == 2.0
+    assert len(tool.calls) == 2
+    assert cache.stats()["stale_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call_and_errors_are_not_cached():
+    cache = ToolResultCache()
+    tool = FakeTool(delay=0.01)
+    call = {"type": "get_coin_price", "coin_symbol": "ETH"}
+
+    results = await asyncio.gather(*(cache.fetch(call, tool) for _ in range(5)))
+
+    assert len(tool.calls) == 1
+    assert {result["price"] for result in results} == {1.0}
+
+    async def failing(tool_call):
+        return {"type": "get_news", "error": "NewsAPI down"}
+
+    await cache.fetch({"type": "get_news"}, failing)
+    assert ToolResultCache.make_key({"type": "get_news"}) not in cache._cache
+    assert not ToolResultCache.is_cacheable({"type": "get_news", "articles": ""})
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded():
+    cache = ToolResultCache(max_size=2)
+    tool = FakeTool()
+
+    for symbol in ("BTC", "ETH", "SOL"):
+        await cache.fetch({"type": "get_coin_price", "coin_symbol": symbol}, tool)
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
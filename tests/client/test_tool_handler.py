@@ -1,8 +1,10 @@
+import asyncio
+import time
 from unittest.mock import patch
 
 import pytest
 
-from src.client.services import ToolCallHandler
+from src.client.services import ToolCallHandler, ToolExecutionPolicy
 
 
 @pytest.fixture
@@ -80,3 +82,54 @@ async def test_handle_user_response_no_message(tool_handler):
     assert isinstance(result, dict)
     assert "error" in result
     assert "No message provided" in result["error"]
+
+
+@pytest.fixture
+def keyed_handler(monkeypatch):
+    for key in ("COINAPI_KEY", "NEWSAPI_KEY", "ALPHA_VANTAGE_KEY"):
+        monkeypatch.setenv(key, "test")
+    monkeypatch.setenv("NEWSAPI_BASE_URL", "http://localhost")
+    return ToolCallHandler(ToolExecutionPolicy(max_concurrency=2, default_timeout=1.0, timeouts={"get_news": 0.05}))
+
+
+@pytest.mark.asyncio
+async def test_handle_all_runs_tools_concurrently_with_partial_results(keyed_handler):
+    running = []
+    peak = []
+
+    async def slow_price(tool_call):
+        running.append(tool_call["coin_symbol"])
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.remove(tool_call["coin_symbol"])
+        return {"coin_symbol": tool_call["coin_symbol"], "price": 1.0}
+
+    async def hanging_news(tool_call):
+        await asyncio.sleep(10)
+
+    keyed_handler._handle_coin_price = slow_price
+    keyed_handler._handle_news = hanging_news
+    calls = [{"type": "get_coin_price", "coin_symbol": symbol} for symbol in ("BTC", "ETH", "SOL")]
+
+    started = time.perf_counter()
+    results = await keyed_handler.handle_all(calls + [{"type": "get_news"}])
+    elapsed = time.perf_counter() - started
+
+    assert [result.get("coin_symbol") for result in results[:3]] == ["BTC", "ETH", "SOL"]
+    assert max(peak) == 2
+    assert results[3]["timed_out"] is True
+    assert results[3]["type"] == "get_news"
+    # Two rounds of the concurrency limit instead of three sequential calls plus the hanging one
+    assert elapsed < 0.14
+
+
+def test_tool_execution_policy_from_env(monkeypatch):
+    monkeypatch.setenv("TOOL_TIMEOUT", "5")
+    monkeypatch.setenv("TOOL_TIMEOUTS", "get_news=2.5, get_coin_price=1")
+
+    policy = ToolExecutionPolicy.from_env()
+
+    assert policy.timeout_for("get_news") == 2.5
+    assert policy.timeout_for("get_coin_price") == 1
+    assert policy.timeout_for("get_coin_history") == 30
+    assert policy.timeout_for("unknown") == 5
@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.common.metrics import (
+    HTTP_REQUEST_DURATION,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    instrument_app,
+)
+
+
+def test_counter_and_gauge_render_in_exposition_format():
+    registry = MetricsRegistry()
+    calls = Counter("calls_total", "Calls", ["api", "outcome"], registry=registry)
+    in_flight = Gauge("in_flight", "In flight", registry=registry)
+
+    calls.labels(api="coinapi", outcome="success").inc()
+    calls.labels(api="coinapi", outcome="success").inc(2)
+    in_flight.set(3)
+    in_flight.dec()
+
+    text = registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{api="coinapi",outcome="success"} 3' in text
+    assert "in_flight 2" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 6.25" in text
+
+
+def test_gauge_function_and_track_inprogress():
+    registry = MetricsRegistry()
+    queued = Gauge("queued", "Queued", ["priority"], registry=registry)
+    queued.set_function(lambda: 7, priority="background")
+
+    with queued.track_inprogress(priority="interactive"):
+        assert 'queued{priority="interactive"} 1' in registry.render()
+
+    text = registry.render()
+    assert 'queued{priority="interactive"} 0' in text
+    assert 'queued{priority="background"} 7' in text
+
+
+def test_labels_must_match_and_names_are_unique():
+    registry = MetricsRegistry()
+    calls = Counter("calls_total", "Calls", ["api"], registry=registry)
+
+    with pytest.raises(ValueError):
+        calls.labels(outcome="success")
+    with pytest.raises(ValueError):
+        calls.inc()
+    with pytest.raises(ValueError):
+        Counter("calls_total", "Calls", registry=registry)
+
+
+def test_instrumented_app_records_route_templates_and_serves_metrics():
+    app = FastAPI()
+    instrument_app(app, "metrics_test")
+
+    @app.get("/memory/{session_id}")
+    async def memory(session_id: str):
+        return {"session_id": session_id}
+
+    client = TestClient(app)
+    client.get("/memory/a")
+    client.get("/memory/b")
+
+    child = HTTP_REQUEST_DURATION.labels(
+        service="metrics_test", method="GET", endpoint="/memory/{session_id}", status="200"
+    )
+    assert child.count == 2
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{service="metrics_test",method="GET",endpoint="/memory/{session_id}",status="200"} 2'
+        in response.text
+    )
+    assert 'endpoint="/metrics"' not in response.text
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.common.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert "key" in flight and "other" not in flight
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["result"] * 5
+    assert executions == 1
+    assert flight.stats() == {"calls": 1, "collapsed": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_and_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == 42
@@ -0,0 +1,9 @@
+from src.common.tool_results import format_results_message
+
+
+def test_results_message_marks_partial_results():
+    results = [{"type": "get_coin_price", "price": 1}, {"type": "get_news", "error": "late", "timed_out": True}]
+
+    assert "results are partial" in format_results_message(results, "News?")
+    assert "partial" not in format_results_message(results[:1], "News?")
+    assert format_results_message(results[:1], "News?").endswith("original message: 'News?'")
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.common import tracing
+
+
+@pytest.fixture
+def tracer(monkeypatch, tmp_path):
+    test_tracer = tracing.Tracer(service="test", export_path=str(tmp_path / "spans.jsonl"))
+    monkeypatch.setattr(tracing, "tracer", test_tracer)
+    return test_tracer
+
+
+def test_traceparent_round_trip():
+    context = tracing.SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+
+    assert tracing.parse_traceparent(context.traceparent()) == context
+    assert tracing.parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+    assert tracing.parse_traceparent("garbage") is None
+    assert tracing.parse_traceparent(None) is None
+
+
+def test_nested_spans_share_the_trace_and_link_parents(tracer):
+    with tracing.start_span("root") as root:
+        with tracing.start_span("child", "llm") as child:
+            carrier = tracing.inject({})
+    assert tracing.current_span() is None
+
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert tracing.extract(carrier) == child.context
+    assert [span.name for span in tracer.spans(root.trace_id)] == ["child", "root"]
+
+
+def test_concurrent_tasks_keep_their_own_current_span(tracer):
+    async def step(name):
+        with tracing.start_span(name) as span:
+            await asyncio.sleep(0.01)
+            return span, tracing.current_span()
+
+    async def run():
+        with tracing.start_span("loop") as root:
+            results = await asyncio.gather(step("a"), step("b"))
+        return root, results
+
+    root, results = asyncio.run(run())
+
+    for span, current in results:
+        assert current is span
+        assert span.parent_id == root.span_id
+
+
+def test_remote_parent_and_resume(tracer):
+    remote = tracing.SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+    metadata = {"traceparent": remote.traceparent()}
+
+    assert tracing.resume(metadata) == remote
+    with tracing.start_span("server", parent=remote) as server:
+        # Already inside the trace: keep the local parent instead of jumping back to the remote one
+        assert tracing.resume(metadata) is None
+        with tracing.start_span("process", parent=tracing.resume(metadata)) as process:
+            pass
+
+    assert server.trace_id == remote.trace_id and server.parent_id == remote.span_id
+    assert process.parent_id == server.span_id
+
+
+def test_failed_spans_are_exported_as_otlp_json(tracer):
+    with pytest.raises(ValueError):
+        with tracing.start_span("coinapi.history", "api", {"peer": "coinapi", "days": 30}):
+            raise ValueError("boom")
+    tracer.flush()
+
+    line = json.loads(open(tracer.export_path).read().splitlines()[0])
+    resource = line["resourceSpans"][0]
+    span = resource["scopeSpans"][0]["spans"][0]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "test"}
+    assert span["name"] == "coinapi.history"
+    assert span["kind"] == 3
+    assert span["status"]["code"] == 2 and "boom" in span["status"]["message"]
+    assert {"key": "days", "value": {"intValue": "30"}} in span["attributes"]
+
+
+def test_breakdown_merges_overlapping_dependency_spans(tracer):
+    def span(name, category, start, end, peer=None):
+        return {
+            "trace_id": "t",
+            "span_id": name,
+            "parent_id": None,
+            "name": name,
+            "service": "client",
+            "category": category,
+            "peer": peer,
+            "start_ns": int(start * 1e9),
+            "end_ns": int(end * 1e9),
+        }
+
+    spans = [
+        span("root", "server", 0, 40),
+        span("llm1", "llm", 1, 11),
+        span("llm2", "llm", 20, 35),
+        span("coin1", "api", 12, 15, "coinapi"),
+        span("coin2", "api", 13, 16, "coinapi"),
+        span("user", "db", 0.5, 0.75, "postgres"),
+    ]
+
+    report = tracing.breakdown(spans)
+
+    assert report["total"] == 40
+    assert report["llm"] == 25
+    assert report["api:coinapi"] == 4
+    assert report["db:postgres"] == 0.25
+
+
+def test_spans_are_exported_in_batches(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    batched = tracing.Tracer(service="test", export_path=str(path), batch_size=2, flush_interval=0.05)
+
+    def span(name):
+        return tracing.Span(name=name, category="internal", service="test", trace_id="1" * 32, span_id="1" * 16)
+
+    batched.export(span("a"))
+    for _ in range(100):
+        if path.exists():
+            break
+        time.sleep(0.01)
+    # Written by the background thread once the interval has passed, without a flush
+    assert len(path.read_text().splitlines()) == 1
+
+    for name in ("b", "c", "d"):
+        batched.export(span(name))
+    batched.flush()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [len(line["resourceSpans"][0]["scopeSpans"][0]["spans"]) for line in lines] == [1, 2, 1]
+
+
+def test_load_spans_reads_exported_files(tracer):
+    with tracing.start_span("root"):
+        with tracing.start_span("db.get_or_create_user", "db", {"peer": "postgres"}):
+            pass
+    tracer.flush()
+
+    spans = tracing.load_spans([tracer.export_path])
+
+    assert {span["name"] for span in spans} == {"root", "db.get_or_create_user"}
+    assert "db:postgres" in tracing.breakdown(spans)
+
+
+def test_traced_app_continues_incoming_traces(tracer):
+    app = FastAPI()
+    tracing.trace_app(app, "tracing_test")
+
+    @app.get("/work")
+    async def work():
+        with tracing.start_span("inner"):
+            return {"traceparent": tracing.current_span().context.traceparent()}
+
+    remote = tracing.SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+    client = TestClient(app)
+    response = client.get("/work", headers={"traceparent": remote.traceparent()})
+
+    server = tracing.parse_traceparent(response.headers["traceparent"])
+    assert server.trace_id == remote.trace_id
+    spans = client.get("/traces", params={"trace_id": remote.trace_id}).json()["resourceSpans"][0]["scopeSpans"][0]
+    by_name = {span["name"]: span for span in spans["spans"]}
+    assert by_name["GET /work"]["parentSpanId"] == remote.span_id
+    assert by_name["inner"]["parentSpanId"] == server.span_id
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.loadtest.load_test import LoadTest, format_report, parse_mix, percentile, summarize
+
+
+def test_percentile_and_summary():
+    assert percentile([], 50) is None
+    assert percentile([0.3, 0.1, 0.2, 0.4], 50) == 0.2
+    assert percentile(list(range(1, 101)), 99) == 99
+
+    report = summarize([("analyze", 1.0, True), ("analyze", 3.0, True), ("update", 0.5, False)], elapsed=2.0)
+
+    assert report["analyze"]["p50"] == 1.0
+    assert report["analyze"]["throughput"] == 1.0
+    assert report["update"]["error_rate"] == 1.0
+    assert report["total"]["requests"] == 3
+
+
+def test_parse_mix():
+    assert parse_mix("analyze=2,update") == {"analyze": 2.0, "update": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+
+
+@pytest.mark.asyncio
+async def test_run_drives_client_and_telegram():
+    received = {"client": [], "telegram": []}
+
+    async def process_message(request):
+        body = await request.json()
+        received["client"].append(body)
+        await asyncio.sleep(0.01)
+        if body["content"].startswith("update"):
+            return web.json_response({"detail": "error"}, status=500)
+        return web.json_response({"message": "ok"})
+
+    async def send_message(request):
+        received["telegram"].append(await request.json())
+        return web.json_response({"status": "success"})
+
+    app = web.Application()
+    app.router.add_post("/process_message", process_message)
+    app.router.add_post("/send_message", send_message)
+    async with TestServer(app) as server:
+        url = str(server.make_url(""))
+        load_test = LoadTest(client_url=url, telegram_url=url, rate=200, duration=0.2, users=5)
+        results = await load_test.run()
+
+    scenarios = results["scenarios"]
+    assert scenarios["total"]["requests"] == len(received["client"]) + len(received["telegram"])
+    assert scenarios["update"]["error_rate"] == 1.0
+    assert scenarios["send_message"]["requests"] == len(received["client"]) - scenarios["update"]["requests"]
+    assert {int(body["user_id"]) for body in received["client"]} <= set(range(100000, 100005))
+    assert "total" in format_report(results, results)
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from src.agent.llm.json_llm import JsonProcessor
+from src.agent.llm.lmstudio_llm import LMStudioProcessor
+from src.agent.llm.xml_llm import XmlProcessor
+from src.agent.planning.prompts.mock_functions import MOCK_FUNCTIONS
+from src.common.interfaces import Message
+from src.loadtest.mock_llm_server import PROFILES, LatencyProfile, MockLLMServer, apply_limits, plan, render
+
+RESULTS = "I've gathered the information you requested. Here are the results:\n\n- get_coin_price: 1.0"
+
+
+def test_plan_tool_call_then_answer():
+    assert plan([{"role": "user", "content": "What is the price of ETH?"}]) == (
+        "The user asks about ETH; I need get_coin_price first.",
+        [{"name": "get_coin_price", "argument": "ETH"}],
+    )
+    assert plan([{"role": "user", "content": "AAPL history please"}])[1] == [
+        {"name": "get_stock_history", "argument": "AAPL"}
+    ]
+    assert plan([{"role": "user", "content": RESULTS}])[1][0]["name"] == "response_to_user"
+
+
+def test_apply_limits():
+    assert apply_limits("<response>abc</response> more", ["</response>"], None) == (
+        ["<res", "pons", "e>ab", "c"],
+        "stop",
+    )
+    assert apply_limits("abcdefgh", None, 1) == (["abcd"], "length")
+
+
+async def run_processor(processor, server, content):
+    processor.base_url = str(server.make_url("/v1"))
+    return await processor.process_message(Message(content=content, user_id="u1"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processor_class", [XmlProcessor, JsonProcessor])
+async def test_processors_run_against_mock(processor_class):
+    mock = MockLLMServer(PROFILES["instant"])
+    async with TestServer(mock.app()) as server:
+        first = await run_processor(processor_class(), server, "price of bitcoin?")
+        final = await run_processor(processor_class(), server, RESULTS)
+
+    assert first["actions"] == [{"name": "get_coin_price", "argument": "BTC"}]
+    assert final["actions"][0]["name"] == "response_to_user"
+    assert mock.stats()["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_code_action_format():
+    async with TestServer(MockLLMServer(PROFILES["instant"]).app()) as server:
+        result = await run_processor(LMStudioProcessor(mock_functions=MOCK_FUNCTIONS), server, "TSLA price")
+
+    assert result["function"] == {"function_name": "get_stock_price", "function_params": {"symbol": "TSLA"}}
+
+
+def test_code_format_renders_the_planned_tools():
+    assert render("code", "Check.", [{"name": "get_coin_news", "argument": "BTC"}, {"name": "get_market_news"}]) == (
+        'Thought: Check.\nAction:\nget_coin_news("BTC")\nget_market_news()\nEnd Action'
+    )
+
+
+@pytest.mark.asyncio
+async def test_streaming():
+    async with TestServer(MockLLMServer(LatencyProfile(ttft=0.0, tokens_per_sec=1000.0)).app()) as server:
+        processor = XmlProcessor()
+        processor.base_url = str(server.make_url("/v1"))
+
+        events = [event async for event in processor.stream_actions(Message(content="SOL news", user_id="u1"))]
+
+    assert events[-1] == {"event": "action", "action": {"name": "get_coin_news", "argument": "SOL"}}
+
+
+@pytest.mark.asyncio
+async def test_injected_errors():
+    async with TestServer(MockLLMServer(LatencyProfile(ttft=0.0, error_rate=1.0)).app()) as server:
+        processor = XmlProcessor()
+        processor.retry_policy = None
+
+        result = await run_processor(processor, server, "BTC")
+
+    assert "status code 503" in result["thought"]
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_queues_requests():
+    mock = MockLLMServer(LatencyProfile(ttft=0.05, tokens_per_sec=0.0, jitter=0.0, max_concurrency=2))
+    async with TestServer(mock.app()) as server:
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(run_processor(XmlProcessor(), server, "BTC") for _ in range(4)))
+        elapsed = asyncio.get_running_loop().time() - started
+
+    assert mock.peak_active == 2
+    assert elapsed >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_drift_is_cut_by_stop_sequences():
+    mock = MockLLMServer(LatencyProfile(ttft=0.0, drift_rate=1.0))
+    async with TestServer(mock.app()) as server:
+        processor = XmlProcessor()
+        with_stop = await run_processor(processor, server, "BTC")
+        tokens_with_stop = mock.completion_tokens
+        processor.stop_sequences = None
+        without_stop = await run_processor(processor, server, "BTC")
+
+    assert with_stop["actions"] == without_stop["actions"] == [{"name": "get_coin_price", "argument": "BTC"}]
+    assert mock.completion_tokens - tokens_with_stop > tokens_with_stop
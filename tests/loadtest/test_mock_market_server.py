@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from aiohttp.test_utils import TestServer
+
+from src.client.service.coin_price_service import CoinPriceService
+from src.client.service.financial_news_service import FinancialNewsService
+from src.client.service.stock_price_service import StockPriceService
+from src.loadtest.mock_market_server import MockMarketServer
+
+
+@pytest.mark.asyncio
+async def test_services_read_mock_market_data(monkeypatch):
+    mock = MockMarketServer(latency=0.0)
+    async with TestServer(mock.app()) as server:
+        base = str(server.make_url("")).rstrip("/")
+        monkeypatch.setenv("ALPHA_VANTAGE_KEY", "test")
+        monkeypatch.setenv("ALPHA_VANTAGE_BASE_URL", base)
+        monkeypatch.setenv("NEWSAPI_KEY", "test")
+        monkeypatch.setenv("NEWSAPI_BASE_URL", f"{base}/v2")
+
+        async with httpx.AsyncClient() as client:
+            coins = await CoinPriceService(
+                base_url=f"{base}/v1", api_key="test", http_client=client
+            ).get_coin_price_history("BTC", "USD", 7)
+            stocks = await StockPriceService(http_client=client).get_stock_price_history("AAPL")
+            articles = await FinancialNewsService(http_client=client).get_financial_news("crypto OR BTC", page_size=3)
+
+    assert len(coins) == 7
+    assert list(coins["price"]) == MockMarketServer.price_series("BTC", 7)
+    assert len(stocks) == 100
+    # Alpha Vantage lists the most recent day first
+    assert stocks.iloc[0]["Close"] == pytest.approx(MockMarketServer.price_series("AAPL", 100)[-1])
+    assert [article["title"] for article in articles][0] == "BTC rallies as investors weigh rate outlook"
+    assert mock.requests == {"v1": 1, "query": 1, "v2": 1}
+
+
+@pytest.mark.asyncio
+async def test_service_calls_do_not_block_each_other():
+    mock = MockMarketServer(latency=0.1)
+    async with TestServer(mock.app()) as server:
+        async with httpx.AsyncClient() as client:
+            service = CoinPriceService(base_url=str(server.make_url("/v1")), api_key="test", http_client=client)
+            started = time.perf_counter()
+            frames = await asyncio.gather(*(service.get_coin_price_history(s, "USD", 3) for s in ("BTC", "ETH", "SOL")))
+            elapsed = time.perf_counter() - started
+
+    assert [len(frame) for frame in frames] == [3, 3, 3]
+    assert elapsed < 0.25
+
+
+@pytest.mark.asyncio
+async def test_telegram_send_message():
+    mock = MockMarketServer(latency=0.0)
+    async with TestServer(mock.app()) as server:
+        from telegram import Bot
+
+        bot = Bot(token="123:abc", base_url=str(server.make_url("/bot")))
+        async with bot:
+            message = await bot.send_message(chat_id=42, text="hello")
+
+    assert message.chat.id == 42
+    assert message.text == "hello"
+    assert mock.sent_messages == 1
@@ -0,0 +1,79 @@
+import asyncio
+
+from telegram.error import BadRequest
+
+from src.telegram_server.streaming import (
+    MESSAGE_LIMIT,
+    StreamProgress,
+    ThrottledMessageEditor,
+    split_message,
+)
+
+
+class FakeMessage:
+    def __init__(self, text="Generating..."):
+        self.text = text
+        self.edits = []
+        self.replies = []
+
+    async def edit_text(self, text, reply_markup=None):
+        if text == self.text and reply_markup is None:
+            raise BadRequest("Message is not modified")
+        self.text = text
+        self.edits.append(text)
+
+    async def reply_text(self, text, reply_markup=None):
+        self.replies.append(text)
+
+
+def test_editor_coalesces_updates_within_the_interval():
+    message = FakeMessage()
+
+    async def run():
+        editor = ThrottledMessageEditor(message, min_interval=0.05)
+        for index in range(1, 21):
+            await editor.update(f"answer {index}")
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.06)
+        return message.edits[:]
+
+    edits = asyncio.run(run())
+
+    assert edits[0] == "answer 1"
+    # The last update is flushed at the end of the interval without another update
+    assert edits[-1] == "answer 20"
+    assert len(edits) <= 4
+
+
+def test_finish_splits_long_answers_and_ignores_unmodified_text():
+    message = FakeMessage()
+    answer = "\n".join(["line"] * 1000)
+
+    async def run():
+        editor = ThrottledMessageEditor(message, min_interval=0)
+        await editor.update("Generating...")
+        await editor.finish(answer)
+
+    asyncio.run(run())
+
+    assert len(message.edits[-1]) <= MESSAGE_LIMIT
+    assert "\n".join([message.edits[-1]] + message.replies) == answer
+    assert split_message("short") == ["short"]
+
+
+def test_progress_shows_tools_then_the_streamed_answer():
+    progress = StreamProgress("Analyzing...")
+    action = {"name": "get_coin_price", "argument": "BTC"}
+
+    progress.apply({"event": "step", "step": 1})
+    progress.apply({"event": "thought", "step": 1, "thought": "Check BTC"})
+    progress.apply({"event": "action", "step": 1, "action": action})
+    assert progress.render() == "Analyzing...\n\nCheck BTC\n\n⏳ get_coin_price BTC"
+
+    progress.apply({"event": "tool_result", "step": 1, "action": action, "result": {"price": 1}})
+    assert progress.render().endswith("✅ get_coin_price BTC")
+
+    progress.apply({"event": "step", "step": 2})
+    progress.apply({"event": "answer_delta", "step": 2, "text": "BTC is "})
+    progress.apply({"event": "answer_delta", "step": 2, "text": "at 1"})
+    assert progress.render() == "BTC is at 1"
@@ -84,3 +84,16 @@ async def test_error_handling():
     )
 
     assert response.status_code == 422  # Validation error
+
+
+def test_metrics_endpoint_reports_processor_latency():
+    """Test that processed messages show up in the Prometheus metrics"""
+    client.post("/process", json={"content": "Metrics", "user_id": "metrics_user", "llm_type": "dummy"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'agent_processor_duration_seconds_count{processor="DummyStockProcessor"' in response.text
+    assert 'http_request_duration_seconds_count{service="agent",method="POST",endpoint="/process",status="200"}' in (
+        response.text
+    )